@@ -1,10 +1,20 @@
 # agents/__init__.py
-from .triage_agent import TriageAgent
-from .treatment_agent import TreatmentAgent
-from .resource_agent import ResourceAgent
-
-__all__ = [
-    "TriageAgent",
-    "TreatmentAgent", 
-    "ResourceAgent"
-]
+import importlib
+
+# Agent modules pull in langchain and the Groq client; import them on first use
+_EXPORTS = {
+    "TriageAgent": ".triage_agent",
+    "TreatmentAgent": ".treatment_agent",
+    "ResourceAgent": ".resource_agent",
+    "ConversationAgent": ".conversation",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
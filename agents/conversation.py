@@ -0,0 +1,219 @@
+# rescura/agents/conversation.py
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import BaseModel, Field
+from langchain_core.callbacks import get_usage_metadata_callback
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from dotenv import load_dotenv
+from llm.http_clients import get_http_clients
+from llm.scheduled_chat import ScheduledChatGroq
+from llm.scheduler import PRIORITY_TREATMENT
+from llm.router import ModelRouter, MODELS, ROUTE_SMALL
+from llm.tokenizer import count_tokens
+from retrieval.context_builder import ContextBuilder, MAX_INPUT_TOKENS
+from .session import CaseSession, SessionStore
+from .structured import StructuredResponder
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Verbatim history kept in the prompt; older turns are folded into a summary
+HISTORY_TOKENS = int(os.getenv("RESCURA_SESSION_HISTORY_TOKENS", "600"))
+# Guideline chunks a session accumulates across follow-up retrievals
+MAX_GUIDELINE_CHUNKS = 12
+# Below this query-term overlap with the stored chunks, a follow-up retrieves for itself
+MIN_COVERAGE = float(os.getenv("RESCURA_FOLLOWUP_MIN_COVERAGE", "0.25"))
+
+
+def _severity(assessment: dict) -> int:
+    severity = assessment.get("severity")
+    return severity if isinstance(severity, int) else 0
+
+
+class FollowUpAnswer(BaseModel):
+    """Answer to a follow-up question about an ongoing emergency"""
+    answer: str = Field(description="What the caller should do or know now, in plain language")
+    severity: int = Field(ge=1, le=5, description="Severity given everything reported so far")
+    call_emergency_services: bool = Field(default=False, description="True if they must call emergency services now")
+
+
+class ConversationAgent:
+    """Answers follow-up turns on a case from its session.
+
+    A turn reuses the stored triage and guideline chunks. Only the new
+    message is processed: it is checked for red flags, retrieval runs only
+    when the stored chunks say nothing relevant to it, and one LLM call
+    answers. History past ``history_tokens`` is folded into a running
+    summary by the small model.
+    """
+
+    def __init__(
+        self,
+        groq_api_key: str = None,
+        retriever=None,
+        store: Optional[SessionStore] = None,
+        fast_triage=None,
+        router=None,
+        llms: Optional[Dict[str, Any]] = None,
+        history_tokens: int = HISTORY_TOKENS
+    ):
+        if llms is None:
+            http_client, http_async_client = get_http_clients()
+            llms = {
+                route: ScheduledChatGroq(
+                    temperature=0.1,
+                    model_name=model,
+                    api_key=groq_api_key,
+                    http_client=http_client,
+                    http_async_client=http_async_client,
+                    priority=PRIORITY_TREATMENT
+                )
+                for route, model in MODELS.items()
+            }
+        self.llms = llms
+        self.retriever = retriever
+        self.store = store or SessionStore()
+        self.fast_triage = fast_triage
+        # Severity carried over from triage decides the model, as for treatment
+        self.router = router or ModelRouter("followup", default_policy="keywords")
+        self.context_builder = ContextBuilder.for_agent("followup")
+        self.history_tokens = history_tokens
+        self.responders = {
+            route: StructuredResponder(
+                llm,
+                FollowUpAnswer,
+                "You are an emergency physician following up on a case you already triaged. "
+                "Answer the latest message using the case, the conversation and the guidelines.",
+                "Case: {case}\n\nConversation so far:\n{history}\n\nLatest message: {message}"
+            )
+            for route, llm in llms.items()
+        }
+        self.summarizer = ChatPromptTemplate.from_messages([
+            ("system", "Summarize this emergency conversation in at most five short sentences. "
+                       "Keep symptoms, changes, actions taken and advice given."),
+            ("user", "{text}")
+        ]) | llms[ROUTE_SMALL] | StrOutputParser()
+
+    def start(self, text: str, assessment: dict, case_id: Optional[str] = None) -> CaseSession:
+        """Open a session for a case that has just been triaged"""
+        return self.store.create(text, assessment, case_id)
+
+    def reply(self, case_id: str, message: str) -> dict:
+        session = self._session(case_id)
+        start = time.perf_counter()
+        with get_usage_metadata_callback() as usage:
+            message, context, retrieved, escalated = self._prepare(session, message)
+            folded = self._fold(session)
+            if folded:
+                self._set_summary(session, folded, self.summarizer.invoke({"text": folded[1]}))
+
+            def run(route):
+                return self.responders[route].invoke(**self._inputs(session, message, context))
+
+            answer = self.router.invoke(message, run, severity=_severity(session.assessment) or None)
+        return self._finish(session, message, answer, retrieved, escalated, usage, start)
+
+    async def areply(self, case_id: str, message: str) -> dict:
+        session = self._session(case_id)
+        async with session.lock:
+            start = time.perf_counter()
+            with get_usage_metadata_callback() as usage:
+                # Red-flag check and retrieval are CPU-bound; keep them off the event loop
+                prepared = await asyncio.get_running_loop().run_in_executor(None, self._prepare, session, message)
+                message, context, retrieved, escalated = prepared
+                folded = self._fold(session)
+                if folded:
+                    self._set_summary(session, folded, await self.summarizer.ainvoke({"text": folded[1]}))
+
+                async def run(route):
+                    return await self.responders[route].ainvoke(**self._inputs(session, message, context))
+
+                answer = await self.router.ainvoke(message, run, severity=_severity(session.assessment) or None)
+            return self._finish(session, message, answer, retrieved, escalated, usage, start)
+
+    def _session(self, case_id: str) -> CaseSession:
+        session = self.store.get(case_id)
+        if session is None:
+            raise KeyError(f"Unknown or expired case id '{case_id}'")
+        return session
+
+    def _prepare(self, session: CaseSession, message: str) -> Tuple[str, str, bool, bool]:
+        message = self.context_builder.truncate(message.strip(), MAX_INPUT_TOKENS)
+
+        # A follow-up can reveal a worse emergency than the first report
+        escalated = False
+        provisional = self.fast_triage.assess(message) if self.fast_triage is not None else None
+        if provisional and provisional["severity"] > _severity(session.assessment):
+            logger.info(f"Case {session.case_id}: follow-up raised severity to {provisional['severity']}")
+            session.assessment.update(severity=provisional["severity"], rationale=provisional["rationale"])
+            escalated = True
+
+        retrieved = False
+        if session.guidelines is None:
+            # First follow-up: the chunks the original case needed
+            session.guidelines = self._retrieve(session.input)
+            retrieved = True
+        elif self.retriever is not None and self.context_builder.best_relevance(message, session.guidelines) < MIN_COVERAGE:
+            # Nothing stored covers this question; fetch for it alone
+            chunks = [c for c in self._retrieve(message) if c not in session.guidelines]
+            session.guidelines = (session.guidelines + chunks)[-MAX_GUIDELINE_CHUNKS:]
+            retrieved = True
+        context = self.context_builder.build(message, session.guidelines)
+        return message, context or "None available.", retrieved, escalated
+
+    def _retrieve(self, query: str) -> List[str]:
+        if self.retriever is None:
+            return []
+        return [doc.page_content for doc in self.retriever.get_relevant_documents(query, k=3)]
+
+    def _fold(self, session: CaseSession) -> Optional[Tuple[int, str]]:
+        """Oldest turns to summarize so the rest fit in half the budget, as (count, text)"""
+        costs = [count_tokens(turn.text) for turn in session.history]
+        if sum(costs) <= self.history_tokens:
+            return None
+        keep, used = 0, 0
+        for cost in reversed(costs):
+            if used + cost > self.history_tokens // 2:
+                break
+            keep, used = keep + 1, used + cost
+        count = len(session.history) - keep
+        text = "\n".join(f"{t.role}: {t.text}" for t in session.history[:count])
+        return count, f"Earlier summary: {session.summary}\n{text}" if session.summary else text
+
+    def _set_summary(self, session: CaseSession, folded: Tuple[int, str], summary: str) -> None:
+        count, _ = folded
+        session.summary = summary.strip()
+        session.history = session.history[count:]
+
+    def _inputs(self, session: CaseSession, message: str, context: str) -> dict:
+        assessment = session.assessment
+        case = (
+            f"{session.input}\nTriage: severity {assessment.get('severity', '?')}/5. "
+            f"{assessment.get('rationale', '')}"
+        )
+        lines = [f"Summary of earlier conversation: {session.summary}"] if session.summary else []
+        lines += [f"{turn.role}: {turn.text}" for turn in session.history]
+        return {"case": case, "history": "\n".join(lines) or "(none)", "message": message, "context": context}
+
+    def _finish(self, session, message, answer: FollowUpAnswer, retrieved, escalated, usage, start) -> dict:
+        session.add_turn("user", message)
+        session.add_turn("assistant", answer.answer)
+        if answer.severity > _severity(session.assessment):
+            session.assessment["severity"] = answer.severity
+            escalated = True
+        self.store.save(session)
+        return {
+            "case_id": session.case_id,
+            "answer": answer.answer,
+            "severity": session.assessment.get("severity"),
+            "call_emergency_services": answer.call_emergency_services,
+            "escalated": escalated,
+            "retrieved": retrieved,
+            "tokens": sum(u.get("total_tokens", 0) for u in usage.usage_metadata.values()),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
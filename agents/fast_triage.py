@@ -0,0 +1,198 @@
+# rescura/agents/fast_triage.py
+import os
+import re
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import List, Optional
+import numpy as np
+from input_processing.text_processor import TextProcessor
+
+logger = logging.getLogger(__name__)
+
+# Below this a provisional answer is withheld and only the full agent answers
+MIN_CONFIDENCE = float(os.getenv("RESCURA_FAST_TRIAGE_CONFIDENCE", "0.85"))
+# Cosine similarity an input needs to an exemplar to count as a match
+EMBEDDING_THRESHOLD = float(os.getenv("RESCURA_FAST_TRIAGE_SIMILARITY", "0.8"))
+
+CALL_EMS = "Call emergency services (911) now"
+
+# A red flag preceded by one of these within NEGATION_WINDOW words of its own clause is ignored
+NEGATION_CUES = {"no", "not", "denies", "denied", "deny", "without", "never", "isn't", "wasn't", "doesn't", "don't", "didn't"}
+NEGATION_WINDOW = 3
+CLAUSE_BREAK = re.compile(r"[.,;:!?]|\b(?:but|and|now|although|though)\b")
+
+
+@dataclass
+class TriageRule:
+    """A red-flag pattern with its provisional severity and first actions"""
+    name: str
+    pattern: str
+    severity: int
+    confidence: float
+    actions: List[str]
+    exemplars: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.regex = re.compile(self.pattern, re.IGNORECASE)
+
+
+RULES = [
+    TriageRule(
+        "cardiac_arrest",
+        r"\b(not breathing|stopped breathing|no pulse|no heartbeat|unresponsive|cardiac arrest)\b",
+        5, 0.97,
+        [CALL_EMS, "Start chest compressions (CPR)", "Send someone for an AED"],
+        ["he collapsed and is not breathing", "she has no pulse", "person is unresponsive and not breathing normally"]
+    ),
+    TriageRule(
+        "severe_bleeding",
+        r"\b(severe bleeding|bleeding heavily|heavy bleeding|won'?t stop bleeding|spurting blood|bleeding out)\b",
+        5, 0.95,
+        [CALL_EMS, "Apply firm direct pressure to the wound", "Use a tourniquet above the wound if pressure fails"],
+        ["blood is spurting from his leg", "deep cut that won't stop bleeding"]
+    ),
+    TriageRule(
+        "airway",
+        r"\b(choking|can'?t breathe|cannot breathe|throat (is )?(closing|swelling)|anaphyla\w*)\b",
+        5, 0.93,
+        [CALL_EMS, "Use an epinephrine auto-injector if available", "Give back blows and abdominal thrusts if choking"],
+        ["her throat is swelling after a bee sting", "he is choking on food and turning blue"]
+    ),
+    TriageRule(
+        "stroke",
+        r"\b(stroke|face (is )?drooping|slurred speech|one side (of (his|her|their) body )?(is )?(weak|numb))\b",
+        5, 0.9,
+        [CALL_EMS, "Note the time symptoms started", "Do not give food or drink"],
+        ["his face is drooping and his speech is slurred", "sudden weakness on one side of her body"]
+    ),
+    TriageRule(
+        "chest_pain",
+        r"\b(chest pain|crushing chest|pain (in|radiating to) (my|his|her|the) (left )?arm|heart attack)\b",
+        4, 0.88,
+        [CALL_EMS, "Keep the person seated and calm", "Give aspirin to chew unless allergic"],
+        ["crushing pain in the chest spreading to the left arm"]
+    ),
+    TriageRule(
+        "seizure",
+        r"\b(seizure|convulsing|convulsions|fitting)\b",
+        4, 0.87,
+        ["Move hard objects away and protect the head", "Do not put anything in the mouth",
+         "Call 911 if it lasts over 5 minutes"],
+        ["she is shaking uncontrollably on the floor"]
+    ),
+    TriageRule(
+        "poisoning",
+        r"\b(overdose|overdosed|swallowed (bleach|poison|pills)|poisoned)\b",
+        4, 0.86,
+        [CALL_EMS, "Call Poison Control", "Do not induce vomiting"],
+        ["my toddler swallowed a bottle of pills"]
+    ),
+    TriageRule(
+        "explicit_emergency",
+        r"\b(911|call an ambulance|need an ambulance)\b",
+        4, 0.85,
+        [CALL_EMS],
+    ),
+]
+
+
+class FastTriage:
+    """Millisecond pre-triage from red-flag rules and exemplar embeddings.
+
+    Returns a provisional assessment only when it is confident; anything
+    else is left to the full TriageAgent, which also refines every
+    provisional answer.
+    """
+
+    def __init__(
+        self,
+        embeddings=None,
+        rules: Optional[List[TriageRule]] = None,
+        min_confidence: float = MIN_CONFIDENCE,
+        similarity_threshold: float = EMBEDDING_THRESHOLD,
+        text_processor: Optional[TextProcessor] = None
+    ):
+        self.embeddings = embeddings
+        self.rules = rules or RULES
+        self.min_confidence = min_confidence
+        self.similarity_threshold = similarity_threshold
+        self.text_processor = text_processor or TextProcessor()
+        self._exemplars = None  # (matrix, rule per row), embedded on first use
+        self._lock = threading.Lock()
+
+    def assess(self, text: str) -> Optional[dict]:
+        """Provisional assessment, or None when the full agent must decide"""
+        text = self.text_processor.clean_text(text)
+        assessment = self._match_rules(text) or self._match_embeddings(text)
+        if assessment is None or assessment["confidence"] < self.min_confidence:
+            return None
+        return assessment
+
+    @staticmethod
+    def _negated(text: str, start: int) -> bool:
+        clause = CLAUSE_BREAK.split(text[:start])[-1]
+        return any(word in NEGATION_CUES for word in clause.split()[-NEGATION_WINDOW:])
+
+    def _search(self, rule: TriageRule, text: str):
+        """First match of the rule that is not negated ("no chest pain", "denies seizure")"""
+        return next((m for m in rule.regex.finditer(text) if not self._negated(text, m.start())), None)
+
+    def _match_rules(self, text: str) -> Optional[dict]:
+        hits = [(rule, self._search(rule, text)) for rule in self.rules]
+        hits = [(rule, match) for rule, match in hits if match]
+        if not hits:
+            return None
+
+        rule, match = max(hits, key=lambda hit: (hit[0].severity, hit[0].confidence))
+        # Several independent red flags make the call more certain
+        confidence = min(0.99, rule.confidence + 0.02 * (len(hits) - 1))
+        return self._assessment(rule, confidence, "rules", f"Matched red flag '{match.group(0)}'")
+
+    def _match_embeddings(self, text: str) -> Optional[dict]:
+        exemplars = self._exemplar_matrix()
+        if exemplars is None:
+            return None
+
+        matrix, owners = exemplars
+        query = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        scores = matrix @ query
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            return None
+
+        rule = owners[best]
+        if rule.regex.search(text) and self._search(rule, text) is None:
+            # The text names this red flag only to rule it out
+            return None
+        # Never more certain than the rule itself would be
+        confidence = min(rule.confidence, float(scores[best]))
+        return self._assessment(rule, confidence, "embeddings", f"Resembles '{rule.name}' presentation")
+
+    def _exemplar_matrix(self):
+        if self.embeddings is None:
+            return None
+        if self._exemplars is None:
+            with self._lock:
+                if self._exemplars is None:
+                    owners = [rule for rule in self.rules for _ in rule.exemplars]
+                    vectors = np.asarray(
+                        self.embeddings.embed_documents([e for rule in self.rules for e in rule.exemplars]),
+                        dtype=np.float32
+                    )
+                    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+                    self._exemplars = (vectors, owners)
+        return self._exemplars
+
+    @staticmethod
+    def _assessment(rule: TriageRule, confidence: float, source: str, rationale: str) -> dict:
+        return {
+            "severity": rule.severity,
+            "confidence": round(confidence, 3),
+            "rationale": rationale,
+            "immediate_actions": list(rule.actions),
+            "provisional": True,
+            "source": source,
+            "rule": rule.name
+        }
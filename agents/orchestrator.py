@@ -0,0 +1,180 @@
+# rescura/agents/orchestrator.py
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Stage:
+    """A single agent call in the post-triage dependency graph"""
+    name: str
+    func: Callable[[Dict[str, Any]], Any]
+    depends_on: Tuple[str, ...] = ()
+
+
+@dataclass
+class StageResult:
+    """Outcome of one stage, emitted as soon as the stage finishes"""
+    name: str
+    value: Any = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class PipelineResult:
+    """Collected results and per-stage timings of a pipeline run"""
+    results: Dict[str, StageResult] = field(default_factory=dict)
+    total_time: float = 0.0
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        return {name: r.elapsed for name, r in self.results.items()}
+
+    def value(self, name: str, default: Any = None) -> Any:
+        result = self.results.get(name)
+        return result.value if result and result.ok else default
+
+
+class AgentPipeline:
+    """Runs independent agent calls concurrently, respecting dependencies"""
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self.stages: Dict[str, Stage] = {}
+
+    def add_stage(
+        self,
+        name: str,
+        func: Callable[[Dict[str, Any]], Any],
+        depends_on: Tuple[str, ...] = ()
+    ) -> "AgentPipeline":
+        """Register a stage; func receives a dict of its dependencies' values"""
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        for dep in depends_on:
+            if dep not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+        self.stages[name] = Stage(name, func, tuple(depends_on))
+        return self
+
+    def stream(self) -> Iterator[StageResult]:
+        """Run all stages and yield each result as soon as it is ready"""
+        done: Dict[str, StageResult] = {}
+        pending = dict(self.stages)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    failed = [d for d in stage.depends_on if d in done and not done[d].ok]
+                    if failed:
+                        del pending[name]
+                        result = StageResult(name, error=f"Skipped: dependency '{failed[0]}' failed")
+                        done[name] = result
+                        yield result
+                    elif all(d in done for d in stage.depends_on):
+                        del pending[name]
+                        inputs = {d: done[d].value for d in stage.depends_on}
+                        running[pool.submit(self._run_stage, stage, inputs)] = name
+
+                if not running:
+                    continue
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    del running[future]
+                    result = future.result()
+                    done[result.name] = result
+                    yield result
+
+    def run(self, on_result: Optional[Callable[[StageResult], None]] = None) -> PipelineResult:
+        """Run all stages, invoking on_result for each as it completes"""
+        start = time.perf_counter()
+        pipeline_result = PipelineResult()
+        for result in self.stream():
+            pipeline_result.results[result.name] = result
+            if on_result:
+                on_result(result)
+        pipeline_result.total_time = time.perf_counter() - start
+        return pipeline_result
+
+    @staticmethod
+    def _run_stage(stage: Stage, inputs: Dict[str, Any]) -> StageResult:
+        start = time.perf_counter()
+        try:
+            value = stage.func(inputs)
+            return StageResult(stage.name, value=value, elapsed=time.perf_counter() - start)
+        except Exception as e:
+            logger.error(f"Stage '{stage.name}' failed: {str(e)}")
+            return StageResult(stage.name, error=str(e), elapsed=time.perf_counter() - start)
+
+
+def build_post_triage_pipeline(
+    assessment: Dict[str, Any],
+    environment: str,
+    treatment_agent=None,
+    prevention_agent=None,
+    followup_agent=None,
+    resource_agent=None,
+    max_workers: int = 4
+) -> AgentPipeline:
+    """Build the dependency graph of agent calls that follow a triage assessment.
+
+    Only follow-up depends on the treatment plan; prevention, resources and
+    treatment all run concurrently straight after triage.
+    """
+    pipeline = AgentPipeline(max_workers=max_workers)
+    severity = assessment.get("severity", 0)
+    diagnosis = assessment.get("diagnosis", "")
+
+    needs_treatment = treatment_agent is not None and severity >= 3
+    if needs_treatment:
+        pipeline.add_stage(
+            "treatment",
+            lambda _: treatment_agent.generate_treatment_plan(diagnosis, assessment)
+        )
+
+    if prevention_agent is not None:
+        pipeline.add_stage(
+            "prevention",
+            lambda _: prevention_agent.suggest_prevention_measures(
+                incident=diagnosis,
+                environment=environment
+            )
+        )
+
+    if followup_agent is not None:
+        pipeline.add_stage(
+            "followup",
+            lambda deps: followup_agent.create_plan(
+                treatment=deps.get("treatment", "Basic first aid applied"),
+                severity=severity
+            ),
+            depends_on=("treatment",) if needs_treatment else ()
+        )
+
+    if resource_agent is not None:
+        pipeline.add_stage(
+            "resources",
+            lambda _: resource_agent.find_resources(
+                resource_type="hospital",
+                location=environment
+            )
+        )
+
+    return pipeline
+
+
+def format_timings(timings: List[Tuple[str, float]]) -> str:
+    """Render (stage, seconds) pairs as an aligned report"""
+    width = max((len(name) for name, _ in timings), default=0)
+    return "\n".join(f"{name:<{width}}  {seconds:6.2f}s" for name, seconds in timings)
@@ -1,22 +1,44 @@
 # rescura/agents/resource_agent.py
-from langchain.agents import create_structured_chat_agent, AgentExecutor
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from dotenv import load_dotenv
+from llm.http_clients import get_http_clients
+from llm.scheduled_chat import ScheduledChatGroq
+from llm.scheduler import PRIORITY_BACKGROUND
+from llm.router import MODELS, ROUTE_SMALL, policy_for
+from .structured import StructuredResponder, ResourceList, AGENT_MODE
 
 load_dotenv()
 
 
 
 class ResourceAgent:
-    def __init__(self, groq_api_key: str):
-        self.llm = ChatGroq(
+    def __init__(self, groq_api_key: str, mode: str = None):
+        http_client, http_async_client = get_http_clients()
+        self.llm = ScheduledChatGroq(
             temperature=0.1,
-            model_name="llama3-8b-8192",
-            api_key=groq_api_key
+            # Directory lookups never need 70b; RESCURA_ROUTE_RESOURCE=large overrides
+            model_name=MODELS.get(policy_for("resource", ROUTE_SMALL), MODELS[ROUTE_SMALL]),
+            api_key=groq_api_key,
+            http_client=http_client,
+            http_async_client=http_async_client,
+            priority=PRIORITY_BACKGROUND
         )
         
         self.tools = self._define_tools()
+        self.mode = mode or AGENT_MODE
+        if self.mode == "structured":
+            self.responder = StructuredResponder(
+                self.llm,
+                ResourceList,
+                "You are a medical resource coordinator. List the hospitals, pharmacies "
+                "and emergency services from the search results that fit the request.",
+                "Location: {location}\nResource: {resource_type}"
+            )
+            self.executor = None
+            return
+
+        from langchain.agents import create_structured_chat_agent, AgentExecutor
+
         self.prompt = ChatPromptTemplate.from_messages([
             ("system", """You are a medical resource coordinator. Find:
             - Hospitals
@@ -41,8 +63,35 @@ class ResourceAgent:
             "description": "Find locations near coordinates/address"
         }]
 
+    def _search_context(self, location: str) -> str:
+        # The lookup the agent would have decided to make, done up front
+        return "\n".join(self.tools[0]["func"](location))
+
     def find(self, resource_type: str, location: str) -> list:
+        if self.mode == "structured":
+            result = self.responder.invoke(
+                resource_type=resource_type,
+                location=location,
+                context=self._search_context(location)
+            )
+            return [resource.model_dump() for resource in result.resources]
+
         return self.executor.invoke({
             "resource_type": resource_type,
             "location": location
-        })['output']
\ No newline at end of file
+        })['output']
+
+    async def afind(self, resource_type: str, location: str) -> list:
+        if self.mode == "structured":
+            result = await self.responder.ainvoke(
+                resource_type=resource_type,
+                location=location,
+                context=self._search_context(location)
+            )
+            return [resource.model_dump() for resource in result.resources]
+
+        response = await self.executor.ainvoke({
+            "resource_type": resource_type,
+            "location": location
+        })
+        return response['output']
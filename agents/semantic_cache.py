@@ -0,0 +1,190 @@
+# rescura/agents/semantic_cache.py
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    text: str
+    context: str
+    vector: np.ndarray
+    value: Any
+    created_at: float
+
+
+class SemanticCache:
+    """Reuses agent answers for inputs that embed close to earlier ones.
+
+    Entries are grouped per namespace (one per agent). A lookup first tries
+    an exact match on the normalized text, then falls back to cosine
+    similarity against the namespace's embeddings. ``context`` must match
+    exactly, e.g. a treatment plan is only reused for the same severity.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        threshold: float = 0.92,
+        ttl: Optional[float] = 24 * 3600,
+        max_entries: int = 1000,
+        path: Optional[str] = None
+    ):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = Path(path) if path else None
+
+        self._entries: Dict[str, "OrderedDict[str, CacheEntry]"] = defaultdict(OrderedDict)
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self._lock = threading.RLock()
+        self._db = None
+
+        if self.path:
+            self._open_db()
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return " ".join(text.lower().split())
+
+    @staticmethod
+    def _key(text: str, context: str) -> str:
+        return f"{context}\x1f{text}"
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expired(self, entry: CacheEntry, now: float) -> bool:
+        return self.ttl is not None and now - entry.created_at > self.ttl
+
+    def get(self, namespace: str, text: str, context: str = "") -> Optional[Any]:
+        """Return a cached value for a similar enough input, or None"""
+        normalized = self._normalize(text)
+        now = time.time()
+
+        with self._lock:
+            entries = self._entries[namespace]
+            key = self._key(normalized, context)
+            entry = entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                self._delete(namespace, key)
+                entry = None
+            if entry is None:
+                entry = self._nearest(namespace, normalized, context, now)
+
+            if entry is None:
+                self._stats[namespace]["misses"] += 1
+                return None
+
+            entries.move_to_end(self._key(entry.text, entry.context))
+            self._stats[namespace]["hits"] += 1
+            return entry.value
+
+    def _nearest(self, namespace: str, text: str, context: str, now: float) -> Optional[CacheEntry]:
+        entries = self._entries[namespace]
+        for key in [k for k, e in entries.items() if self._expired(e, now)]:
+            self._delete(namespace, key)
+
+        candidates = [e for e in entries.values() if e.context == context]
+        if not candidates:
+            return None
+
+        query = self._embed(text)
+        scores = np.stack([e.vector for e in candidates]) @ query
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        return candidates[best]
+
+    def set(self, namespace: str, text: str, value: Any, context: str = "") -> None:
+        """Store an answer, evicting the least recently used entries when full"""
+        normalized = self._normalize(text)
+        entry = CacheEntry(normalized, context, self._embed(normalized), value, time.time())
+        key = self._key(normalized, context)
+
+        with self._lock:
+            entries = self._entries[namespace]
+            entries[key] = entry
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                self._delete(namespace, next(iter(entries)))
+            self._persist(namespace, key, entry)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-namespace hit/miss counters"""
+        with self._lock:
+            return {ns: dict(counts) for ns, counts in self._stats.items()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._db:
+                self._db.execute("DELETE FROM entries")
+                self._db.commit()
+
+    def _delete(self, namespace: str, key: str) -> None:
+        self._entries[namespace].pop(key, None)
+        if self._db:
+            self._db.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+            self._db.commit()
+
+    def _open_db(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                text TEXT NOT NULL,
+                context TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        self._db.commit()
+
+        now = time.time()
+        rows = self._db.execute(
+            "SELECT namespace, key, text, context, vector, value, created_at "
+            "FROM entries ORDER BY created_at"
+        ).fetchall()
+        for namespace, key, text, context, vector, value, created_at in rows:
+            entry = CacheEntry(
+                text, context, np.frombuffer(vector, dtype=np.float32),
+                json.loads(value), created_at
+            )
+            if self._expired(entry, now):
+                self._delete(namespace, key)
+            else:
+                self._entries[namespace][key] = entry
+        for namespace in list(self._entries):
+            while len(self._entries[namespace]) > self.max_entries:
+                self._delete(namespace, next(iter(self._entries[namespace])))
+        logger.info(f"Loaded {len(rows)} cached responses from {self.path}")
+
+    def _persist(self, namespace: str, key: str, entry: CacheEntry) -> None:
+        if not self._db:
+            return
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (namespace, key, entry.text, entry.context, entry.vector.tobytes(),
+                 json.dumps(entry.value), entry.created_at)
+            )
+            self._db.commit()
+        except (TypeError, sqlite3.Error) as e:
+            logger.warning(f"Could not persist cache entry: {str(e)}")
@@ -0,0 +1,265 @@
+# rescura/agents/session.py
+import os
+import time
+import uuid
+import json
+import sqlite3
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SESSION_TTL = float(os.getenv("RESCURA_SESSION_TTL", str(2 * 3600)))
+MAX_SESSIONS = int(os.getenv("RESCURA_MAX_SESSIONS", "1000"))
+SESSION_MAX_MB = float(os.getenv("RESCURA_SESSION_MAX_MB", "64"))
+# Shared by all workers on this host (api.prefork); empty keeps sessions in process memory
+SESSION_PATH = os.getenv("RESCURA_SESSION_PATH", "data/cache/sessions.sqlite3")
+
+
+@dataclass
+class Turn:
+    role: str  # "user" or "assistant"
+    text: str
+
+
+@dataclass
+class CaseSession:
+    """What a follow-up turn needs without re-running the pipeline"""
+    case_id: str
+    input: str  # the original emergency description
+    assessment: dict  # latest triage result
+    guidelines: Optional[List[str]] = None  # retrieved chunk texts; None until first needed
+    history: List[Turn] = field(default_factory=list)
+    summary: str = ""  # older turns, folded to stay within the history budget
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    # Serializes turns of one case; follow-ups arrive one at a time anyway
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    def add_turn(self, role: str, text: str) -> None:
+        self.history.append(Turn(role, text))
+
+    def update_assessment(self, assessment: dict) -> None:
+        """Take a newer assessment without lowering a severity raised since (e.g. by a follow-up)"""
+        current = self.assessment.get("severity")
+        merged = {**self.assessment, **assessment}
+        merged.pop("provisional", None)
+        if isinstance(current, int) and (not isinstance(merged.get("severity"), int) or current > merged["severity"]):
+            merged["severity"] = current
+            merged["rationale"] = self.assessment.get("rationale", merged.get("rationale"))
+        self.assessment = merged
+
+    def size(self) -> int:
+        """Approximate bytes held, for the store's memory bound"""
+        text = len(self.input) + len(self.summary) + len(json.dumps(self.assessment, default=str))
+        text += sum(len(chunk) for chunk in self.guidelines or [])
+        text += sum(len(turn.text) for turn in self.history)
+        return text + 512  # object overhead
+
+    def dump(self) -> str:
+        """Everything but the lock, as JSON for the shared store"""
+        return json.dumps({
+            "case_id": self.case_id,
+            "input": self.input,
+            "assessment": self.assessment,
+            "guidelines": self.guidelines,
+            "history": [[t.role, t.text] for t in self.history],
+            "summary": self.summary,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }, default=str)
+
+    @classmethod
+    def load(cls, data: str) -> "CaseSession":
+        fields = json.loads(data)
+        fields["history"] = [Turn(role, text) for role, text in fields["history"]]
+        return cls(**fields)
+
+    def to_dict(self) -> dict:
+        return {
+            "case_id": self.case_id,
+            "assessment": self.assessment,
+            "turns": len(self.history),
+            "history": [{"role": t.role, "text": t.text} for t in self.history],
+            "summary": self.summary,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+class SessionStore:
+    """Case sessions, least recently used first out.
+
+    Sessions expire ``ttl`` seconds after their last turn. Past
+    ``max_sessions`` or ``max_bytes`` (approximate text size) the least
+    recently used ones are dropped; call ``save`` after changing a session so
+    its size is re-counted.
+
+    With ``path`` the sessions live in a sqlite file that every worker
+    process opens, so a follow-up can land on any worker. Each process keeps
+    the session objects it has served and re-reads one only when another
+    process saved it since; bounds are then applied to the file, oldest turn
+    first.
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = SESSION_TTL,
+        max_sessions: int = MAX_SESSIONS,
+        max_bytes: int = int(SESSION_MAX_MB * 1024 * 1024),
+        clock: Callable[[], float] = time.time,
+        path: Optional[str] = None
+    ):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.path = Path(path) if path else None
+        self._sessions: "OrderedDict[str, CaseSession]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"created": 0, "hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+        self._db = None
+        if self.path:
+            self._open_db()
+
+    def create(self, text: str, assessment: dict, case_id: Optional[str] = None) -> CaseSession:
+        now = self.clock()
+        session = CaseSession(case_id or uuid.uuid4().hex, text, dict(assessment), created_at=now, updated_at=now)
+        with self._lock:
+            self._stats["created"] += 1
+            self._put(session)
+        return session
+
+    def get(self, case_id: str) -> Optional[CaseSession]:
+        with self._lock:
+            session = self._sessions.get(case_id)
+            if self._db is not None:
+                session = self._fetch(case_id, session)
+            if session is not None and self._expired(session):
+                self._remove(case_id)
+                self._stats["expired"] += 1
+                session = None
+            if session is None:
+                self._stats["misses"] += 1
+                return None
+            self._sessions.move_to_end(case_id)
+            self._stats["hits"] += 1
+            return session
+
+    def save(self, session: CaseSession) -> None:
+        session.updated_at = self.clock()
+        with self._lock:
+            self._put(session)
+
+    def delete(self, case_id: str) -> None:
+        with self._lock:
+            self._remove(case_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            if self._db is not None:
+                sessions, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM sessions").fetchone()
+            else:
+                sessions, size = len(self._sessions), self._bytes
+            return {**self._stats, "sessions": sessions, "bytes": size}
+
+    def __len__(self) -> int:
+        return self.stats()["sessions"]
+
+    def _expired(self, session: CaseSession) -> bool:
+        return self.ttl is not None and self.clock() - session.updated_at > self.ttl
+
+    def _put(self, session: CaseSession) -> None:
+        self._remember(session)
+        if self._db is not None:
+            self._write(session)
+            return
+        for case_id in [c for c, s in self._sessions.items() if self._expired(s)]:
+            self._remove(case_id)
+            self._stats["expired"] += 1
+        # Never evict the session just written, even if it alone is over the bound
+        while len(self._sessions) > 1 and (len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._sessions)))
+            self._stats["evicted"] += 1
+
+    def _remember(self, session: CaseSession) -> None:
+        self._forget(session.case_id)
+        self._sessions[session.case_id] = session
+        self._sizes[session.case_id] = session.size()
+        self._bytes += self._sizes[session.case_id]
+        if self._db is not None:
+            # Only a cache of the file here; drop quietly
+            while len(self._sessions) > max(1, self.max_sessions):
+                self._forget(next(iter(self._sessions)))
+
+    def _remove(self, case_id: str) -> None:
+        self._forget(case_id)
+        if self._db is not None:
+            self._db.execute("DELETE FROM sessions WHERE case_id = ?", (case_id,))
+            self._db.commit()
+
+    def _forget(self, case_id: str) -> None:
+        if self._sessions.pop(case_id, None) is not None:
+            self._bytes -= self._sizes.pop(case_id)
+
+    def _open_db(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # One connection per process, opened after any fork
+        self._db = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                case_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._db.commit()
+
+    def _fetch(self, case_id: str, local: Optional[CaseSession]) -> Optional[CaseSession]:
+        row = self._db.execute("SELECT data, updated_at FROM sessions WHERE case_id = ?", (case_id,)).fetchone()
+        if row is None:
+            # Expired or evicted by another process
+            self._forget(case_id)
+            return None
+        if local is not None and local.updated_at >= row[1]:
+            return local
+        session = CaseSession.load(row[0])
+        if local is not None:
+            # Turns of one case stay serialized within this process
+            session.lock = local.lock
+        self._remember(session)
+        return session
+
+    def _write(self, session: CaseSession) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?)",
+            (session.case_id, session.dump(), self._sizes[session.case_id], session.updated_at)
+        )
+        if self.ttl is not None:
+            expired = self._db.execute("DELETE FROM sessions WHERE updated_at < ?", (self.clock() - self.ttl,)).rowcount
+            self._stats["expired"] += max(0, expired)
+        rows = self._db.execute(
+            "SELECT case_id, size FROM sessions ORDER BY case_id = ? DESC, updated_at DESC", (session.case_id,)
+        ).fetchall()
+        kept, used, drop = 0, 0, []
+        for case_id, size in rows:
+            # The session just written comes first and is always kept
+            if drop or (kept and (kept + 1 > self.max_sessions or used + size > self.max_bytes)):
+                drop.append(case_id)
+                continue
+            kept, used = kept + 1, used + size
+        if drop:
+            self._db.executemany("DELETE FROM sessions WHERE case_id = ?", [(c,) for c in drop])
+            for case_id in drop:
+                self._forget(case_id)
+            self._stats["evicted"] += len(drop)
+        self._db.commit()
@@ -0,0 +1,37 @@
+# rescura/agents/streaming.py
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Optional
+
+
+@dataclass
+class StreamEvent:
+    """A token as it is generated, or the agent's final result"""
+    type: str  # "token" or "result"
+    text: str = ""
+    data: Any = None
+    ttft: Optional[float] = None  # seconds to first token, set on the result
+
+
+async def stream_executor(executor, inputs: Dict[str, Any]) -> AsyncIterator[StreamEvent]:
+    """Stream LLM tokens from an AgentExecutor run, then its final output.
+
+    Tokens of every LLM call in the run are forwarded (including ReAct
+    reasoning steps), so clients see progress from the first round trip.
+    """
+    start = time.perf_counter()
+    ttft = None
+    output = None
+
+    async for event in executor.astream_events(inputs, version="v2"):
+        kind = event["event"]
+        if kind == "on_chat_model_stream":
+            text = event["data"]["chunk"].content
+            if text:
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                yield StreamEvent("token", text=text)
+        elif kind == "on_chain_end" and not event.get("parent_ids"):
+            output = event["data"].get("output")
+
+    yield StreamEvent("result", data=output, ttft=ttft)
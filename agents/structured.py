@@ -0,0 +1,100 @@
+# rescura/agents/structured.py
+import os
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Type
+from pydantic import BaseModel, Field
+from langchain_core.prompts import ChatPromptTemplate
+
+logger = logging.getLogger(__name__)
+
+# "agent": ReAct/tool-calling AgentExecutor, "structured": retrieve once, one LLM call
+AGENT_MODE = os.getenv("RESCURA_AGENT_MODE", "agent")
+AGENT_MODES = ("agent", "structured")
+
+
+class TriageResult(BaseModel):
+    """Severity assessment for an emergency description"""
+    severity: int = Field(ge=1, le=5, description="1 = minor, 5 = life-threatening")
+    confidence: float = Field(ge=0, le=1, description="How certain the severity is")
+    rationale: str = Field(description="One or two sentences explaining the severity")
+    immediate_actions: List[str] = Field(default_factory=list, description="First things a bystander should do")
+
+
+class TreatmentPlan(BaseModel):
+    """First-aid treatment plan for a diagnosis"""
+    steps: List[str] = Field(description="Ordered treatment steps")
+    warnings: List[str] = Field(default_factory=list, description="Key cautions")
+    follow_up: str = Field(default="", description="Monitoring instructions")
+
+    def to_text(self) -> str:
+        lines = ["Steps:"] + [f"{i}. {step}" for i, step in enumerate(self.steps, 1)]
+        if self.warnings:
+            lines += ["Warnings:"] + [f"- {warning}" for warning in self.warnings]
+        if self.follow_up:
+            lines += [f"FollowUp: {self.follow_up}"]
+        return "\n".join(lines)
+
+
+class Resource(BaseModel):
+    name: str
+    address: str = ""
+    distance: str = ""
+    contact: str = ""
+
+
+class ResourceList(BaseModel):
+    """Medical facilities near a location"""
+    resources: List[Resource] = Field(default_factory=list)
+
+
+class StructuredResponder:
+    """Retrieve-then-generate: guidelines are fetched up front and the model
+    answers in a single call, validated into ``schema``.
+
+    Replaces the agent loop's tool-decision round trip and the regex JSON
+    parsing of free-text answers.
+    """
+
+    def __init__(
+        self,
+        llm,
+        schema: Type[BaseModel],
+        system_prompt: str,
+        user_template: str,
+        retriever=None,
+        k: int = 3,
+        query_field: Optional[str] = None,
+        context_builder=None
+    ):
+        self.schema = schema
+        self.retriever = retriever
+        self.k = k
+        self.query_field = query_field
+        self.context_builder = context_builder
+        self.prompt = ChatPromptTemplate.from_messages([
+            ("system", system_prompt + "\n\nRelevant guidelines:\n{context}"),
+            ("user", user_template)
+        ])
+        self.chain = self.prompt | llm.with_structured_output(schema)
+
+    def _inputs(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        if "context" in inputs:
+            return inputs  # caller gathered the context itself
+        context = "None available."
+        if self.retriever is not None and self.query_field:
+            query = str(inputs[self.query_field])
+            docs = self.retriever.get_relevant_documents(query, k=self.k)
+            if docs and self.context_builder is not None:
+                context = self.context_builder.build(query, docs) or context
+            elif docs:
+                context = "\n\n".join(doc.page_content for doc in docs)
+        return {**inputs, "context": context}
+
+    def invoke(self, **inputs: Any) -> BaseModel:
+        return self.chain.invoke(self._inputs(inputs))
+
+    async def ainvoke(self, **inputs: Any) -> BaseModel:
+        # Retrieval is CPU-bound (embedding + FAISS); keep it off the event loop
+        prepared = await asyncio.get_running_loop().run_in_executor(None, self._inputs, inputs)
+        return await self.chain.ainvoke(prepared)
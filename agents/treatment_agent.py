@@ -1,19 +1,56 @@
-from langchain.agents import create_tool_calling_agent, AgentExecutor
-from langchain_groq import ChatGroq
+import time
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from dotenv import load_dotenv
+from llm.http_clients import get_http_clients
+from llm.scheduled_chat import ScheduledChatGroq
+from llm.scheduler import PRIORITY_TREATMENT
+from llm.router import ModelRouter, MODELS, ROUTE_LARGE
+from .streaming import StreamEvent, stream_executor
+from retrieval.context_builder import ContextBuilder
+from .structured import StructuredResponder, TreatmentPlan, AGENT_MODE
 
 load_dotenv()
 
 
 class TreatmentAgent:
-    def __init__(self, retriever, groq_api_key: str):
-        self.llm = ChatGroq(
-            temperature=0.1,
-            model_name="llama3-70b-8192", 
-            api_key=groq_api_key
-        )
+    def __init__(self, retriever, groq_api_key: str, cache=None, router=None, mode: str = None):
+        http_client, http_async_client = get_http_clients()
+        self.llms = {
+            route: ScheduledChatGroq(
+                temperature=0.1,
+                model_name=model,
+                api_key=groq_api_key,
+                http_client=http_client,
+                http_async_client=http_async_client,
+                priority=PRIORITY_TREATMENT
+            )
+            for route, model in MODELS.items()
+        }
+        self.llm = self.llms[ROUTE_LARGE]
+        # Triage severity is known here, so routing is by severity alone
+        self.router = router or ModelRouter("treatment", default_policy="keywords")
         self.retriever = retriever
+        self.cache = cache
+        self.context_builder = ContextBuilder.for_agent("treatment")
+        self.mode = mode or AGENT_MODE
+        if self.mode == "structured":
+            self.responders = {
+                route: StructuredResponder(
+                    llm,
+                    TreatmentPlan,
+                    "You are an emergency physician. Create a first-aid treatment plan.",
+                    "Diagnosis: {diagnosis}\nSeverity: {severity}",
+                    retriever=retriever,
+                    query_field="diagnosis",
+                    context_builder=self.context_builder
+                )
+                for route, llm in self.llms.items()
+            }
+            self.executor = None
+            return
+
+        from langchain.agents import create_tool_calling_agent, AgentExecutor
+
         self.tools = self._define_tools()
         
         self.prompt = ChatPromptTemplate.from_messages([
@@ -27,18 +64,79 @@ class TreatmentAgent:
             ("user", "Diagnosis: {diagnosis}\nSeverity: {severity}")
         ])
         
-        self.agent = create_tool_calling_agent(self.llm, self.tools, self.prompt)
-        self.executor = AgentExecutor(agent=self.agent, tools=self.tools, verbose=True)
+        self.executors = {
+            route: AgentExecutor(agent=create_tool_calling_agent(llm, self.tools, self.prompt), tools=self.tools, verbose=True)
+            for route, llm in self.llms.items()
+        }
+        self.executor = self.executors[ROUTE_LARGE]
 
     def _define_tools(self):
         return [{
             "name": "treatment_guidelines",
-            "func": lambda q: self.retriever.similarity_search(q, k=3),
+            "func": lambda q: self.context_builder.build(q, self.retriever.get_relevant_documents(q, k=3)),
             "description": "First aid and emergency treatment protocols"
         }]
 
     def plan(self, diagnosis: str, severity: int) -> str:
-        return self.executor.invoke({
+        cached = self._cached(diagnosis, severity)
+        if cached is not None:
+            return cached
+
+        def run(route):
+            if self.mode == "structured":
+                return self.responders[route].invoke(**self._inputs(diagnosis, severity)).to_text()
+            return self.executors[route].invoke(self._inputs(diagnosis, severity))['output']
+
+        output = self.router.invoke(diagnosis, run, severity=severity)
+        return self._store(diagnosis, severity, output)
+
+    async def aplan(self, diagnosis: str, severity: int) -> str:
+        cached = self._cached(diagnosis, severity)
+        if cached is not None:
+            return cached
+
+        async def run(route):
+            if self.mode == "structured":
+                return (await self.responders[route].ainvoke(**self._inputs(diagnosis, severity))).to_text()
+            response = await self.executors[route].ainvoke(self._inputs(diagnosis, severity))
+            return response['output']
+
+        output = await self.router.ainvoke(diagnosis, run, severity=severity)
+        return self._store(diagnosis, severity, output)
+
+    async def astream_plan(self, diagnosis: str, severity: int):
+        """Yield StreamEvents: tokens as generated, then the full plan"""
+        cached = self._cached(diagnosis, severity)
+        if cached is not None:
+            yield StreamEvent("result", data=cached, ttft=0.0)
+            return
+
+        if self.mode == "structured":
+            start = time.perf_counter()
+            plan = await self.aplan(diagnosis, severity)
+            yield StreamEvent("result", data=plan, ttft=time.perf_counter() - start)
+            return
+
+        route = self.router.choose(diagnosis, severity)
+        with self.router.track(route):
+            async for event in stream_executor(self.executors[route], self._inputs(diagnosis, severity)):
+                if event.type == "result":
+                    event.data = self._store(diagnosis, severity, (event.data or {}).get("output", ""))
+                yield event
+
+    def _inputs(self, diagnosis: str, severity: int) -> dict:
+        return {
             "diagnosis": diagnosis,
             "severity": severity
-        })['output']
+        }
+
+    def _cached(self, diagnosis: str, severity: int):
+        if self.cache is None:
+            return None
+        # A plan is only reusable for the same severity level
+        return self.cache.get("treatment", diagnosis, context=str(severity))
+
+    def _store(self, diagnosis: str, severity: int, plan: str) -> str:
+        if self.cache is not None:
+            self.cache.set("treatment", diagnosis, plan, context=str(severity))
+        return plan
@@ -1,23 +1,60 @@
-from langchain.agents import create_react_agent, AgentExecutor
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_community.vectorstores import FAISS
 from langchain_core.messages import AIMessage
 import json
 import re
+import time
 from dotenv import load_dotenv
+from llm.http_clients import get_http_clients
+from llm.scheduled_chat import ScheduledChatGroq
+from llm.scheduler import PRIORITY_TRIAGE
+from llm.router import ModelRouter, MODELS, ROUTE_LARGE
+from .streaming import StreamEvent, stream_executor
+from retrieval.context_builder import ContextBuilder, MAX_INPUT_TOKENS
+from .structured import StructuredResponder, TriageResult, AGENT_MODE
 
 load_dotenv()
 
 
 class TriageAgent:
-    def __init__(self, retriever, groq_api_key: str):
-        self.llm = ChatGroq(
-            temperature=0.2,
-            model_name="llama3-70b-8192",
-            api_key=groq_api_key
-        )
+    def __init__(self, retriever, groq_api_key: str, cache=None, router=None, mode: str = None):
+        http_client, http_async_client = get_http_clients()
+        self.llms = {
+            route: ScheduledChatGroq(
+                temperature=0.2,
+                model_name=model,
+                api_key=groq_api_key,
+                http_client=http_client,
+                http_async_client=http_async_client,
+                priority=PRIORITY_TRIAGE
+            )
+            for route, model in MODELS.items()
+        }
+        self.llm = self.llms[ROUTE_LARGE]
+        self.router = router or ModelRouter("triage", default_policy="keywords")
         self.retriever = retriever
+        self.cache = cache
+        self.context_builder = ContextBuilder.for_agent("triage")
+        self.mode = mode or AGENT_MODE
+        if self.mode == "structured":
+            self.responders = {
+                route: StructuredResponder(
+                    llm,
+                    TriageResult,
+                    "You are an emergency medical triage specialist. Assess severity from 1-5 "
+                    "and list the immediate actions a bystander should take.",
+                    "Symptoms: {symptoms}",
+                    retriever=retriever,
+                    query_field="symptoms",
+                    context_builder=self.context_builder
+                )
+                for route, llm in self.llms.items()
+            }
+            self.executor = None
+            return
+
+        # langchain.agents is the slowest import in the tree; structured mode never needs it
+        from langchain.agents import create_react_agent, AgentExecutor
+
         self.tools = self._define_tools()
         
         self.prompt = ChatPromptTemplate.from_messages([
@@ -27,27 +64,93 @@ class TriageAgent:
             
             Use format:
             Thought: {agent_scratchpad}
-            Final Answer: JSON with 'severity' (1-5) and 'rationale'"""),
+            Final Answer: JSON with 'severity' (1-5), 'confidence' (0-1) and 'rationale'"""),
             ("user", "{input}"),
             MessagesPlaceholder("agent_scratchpad")
         ])
         
-        self.agent = create_react_agent(self.llm, self.tools, self.prompt)
-        self.executor = AgentExecutor(agent=self.agent, tools=self.tools, verbose=True)
+        self.executors = {
+            route: AgentExecutor(agent=create_react_agent(llm, self.tools, self.prompt), tools=self.tools, verbose=True)
+            for route, llm in self.llms.items()
+        }
+        self.executor = self.executors[ROUTE_LARGE]
 
     def _define_tools(self):
         return [{
             "name": "medical_guidelines",
-            "func": lambda q: [doc.page_content for doc in self.retriever.invoke(q)],
+            "func": lambda q: self.context_builder.build(q, self.retriever.get_relevant_documents(q)),
             "description": "Access medical guidelines and protocols"
         }]
 
     def assess(self, symptoms: str) -> dict:
-        response = self.executor.invoke({
-            "input": f"Symptoms: {symptoms}",
+        cached = self._cached(symptoms)
+        if cached is not None:
+            return cached
+
+        def run(route):
+            if self.mode == "structured":
+                return self.responders[route].invoke(symptoms=self._fit(symptoms)).model_dump()
+            response = self.executors[route].invoke(self._inputs(symptoms))
+            return self._parse_response(response['output'])
+
+        return self._store(symptoms, self.router.invoke(symptoms, run))
+
+    async def aassess(self, symptoms: str) -> dict:
+        cached = self._cached(symptoms)
+        if cached is not None:
+            return cached
+
+        async def run(route):
+            if self.mode == "structured":
+                return (await self.responders[route].ainvoke(symptoms=self._fit(symptoms))).model_dump()
+            response = await self.executors[route].ainvoke(self._inputs(symptoms))
+            return self._parse_response(response['output'])
+
+        return self._store(symptoms, await self.router.ainvoke(symptoms, run))
+
+    async def astream_assess(self, symptoms: str):
+        """Yield StreamEvents: tokens as generated, then the parsed assessment"""
+        cached = self._cached(symptoms)
+        if cached is not None:
+            yield StreamEvent("result", data=cached, ttft=0.0)
+            return
+
+        if self.mode == "structured":
+            # One validated JSON answer; there is no useful text to stream
+            start = time.perf_counter()
+            assessment = await self.aassess(symptoms)
+            yield StreamEvent("result", data=assessment, ttft=time.perf_counter() - start)
+            return
+
+        # Streamed tokens can't be taken back, so there is no 8b-then-70b retry here
+        route = self.router.choose(symptoms)
+        with self.router.track(route):
+            async for event in stream_executor(self.executors[route], self._inputs(symptoms)):
+                if event.type == "result":
+                    output = (event.data or {}).get("output", "")
+                    event.data = self._store(symptoms, self._parse_response(output))
+                yield event
+
+    def _fit(self, symptoms: str) -> str:
+        # Long transcripts would otherwise crowd out guidelines in the 8k context
+        return self.context_builder.truncate(symptoms, MAX_INPUT_TOKENS)
+
+    def _inputs(self, symptoms: str) -> dict:
+        return {
+            "input": f"Symptoms: {self._fit(symptoms)}",
             "agent_scratchpad": []
-        })
-        return self._parse_response(response['output'])
+        }
+
+    def _cached(self, symptoms: str):
+        if self.cache is None:
+            return None
+        return self.cache.get("triage", symptoms)
+
+    def _store(self, symptoms: str, assessment: dict) -> dict:
+        # Never cache parse failures; the next call deserves a fresh attempt
+        if self.cache is not None and "error" not in assessment:
+            self.cache.set("triage", symptoms, assessment)
+        return assessment
 
     def _parse_response(self, raw: str) -> dict:
         try:
@@ -1,38 +1,526 @@
-from fastapi import FastAPI, UploadFile
-from input_processing.audio_transcriber import AudioTranscriber
-from input_processing.image_analyzer import ImageAnalyzer
-from agents.triage_agent import TriageAgent
-from retrieval.retriever import RescuraRetriever
+import os
+import json
+import time
+import asyncio
+import uuid
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, AsyncExitStack
+from typing import Dict, Optional
+from fastapi import FastAPI, UploadFile, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
+from pydantic import BaseModel
+from input_processing.audio_stream import decode_pcm, save_upload
+from components import components
+from jobs.pool import JobFailed, QueueFull
+from utils.model_registry import model_registry
+from llm.scheduler import scheduler, scheduling_priority, priority_for_severity, PRIORITY_TRIAGE
+from llm.router import route_stats
+
+logger = logging.getLogger(__name__)
+
+# Admission control: at most MAX_IN_FLIGHT requests run inference at once,
+# up to MAX_QUEUED wait for a slot, everything beyond that gets a 429.
+MAX_IN_FLIGHT = int(os.getenv("RESCURA_MAX_IN_FLIGHT", "4"))
+MAX_QUEUED = int(os.getenv("RESCURA_MAX_QUEUED", "16"))
+QUEUE_TIMEOUT = float(os.getenv("RESCURA_QUEUE_TIMEOUT", "30"))
+INFERENCE_WORKERS = int(os.getenv("RESCURA_INFERENCE_WORKERS", "2"))
+# Load Whisper/BLIP/embeddings at startup so no request pays model load time
+WARM_UP_MODELS = os.getenv("RESCURA_WARM_UP_MODELS", "1") == "1"
+# Refined assessments kept for polling after a fast-path answer
+MAX_REFINEMENTS = int(os.getenv("RESCURA_MAX_REFINEMENTS", "256"))
+# Run Whisper/BLIP for /process-emergency on the media job workers instead of in this process
+MEDIA_JOBS = os.getenv("RESCURA_MEDIA_JOBS", "0") == "1"
+MEDIA_JOB_MODELS = ("whisper:", "faster_whisper:", "blip:")
 
 app = FastAPI()
-retriever = RescuraRetriever()
-triage_agent = TriageAgent(retriever)
+# Retriever, agents and input processors are built on first use (or at warm-up)
+refinements: "OrderedDict[str, dict]" = OrderedDict()
+# asyncio holds tasks weakly; this keeps background refinements alive until they finish
+refinement_tasks = set()
+
+# Whisper and BLIP are CPU-bound; keep them off the event loop in a bounded pool
+inference_pool = ThreadPoolExecutor(
+    max_workers=INFERENCE_WORKERS,
+    thread_name_prefix="rescura-inference"
+)
+admission = asyncio.Semaphore(MAX_IN_FLIGHT)
+queued = 0
+
+
+@asynccontextmanager
+async def admission_slot():
+    """Wait for an inference slot, rejecting with 429 when overloaded"""
+    global queued
+    # The queue bound only matters when every slot is taken; a free slot is never refused
+    if admission.locked() and queued >= MAX_QUEUED:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests in progress",
+            headers={"Retry-After": "1"}
+        )
+
+    queued += 1
+    try:
+        await asyncio.wait_for(admission.acquire(), timeout=QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=429,
+            detail="Timed out waiting for an inference slot",
+            headers={"Retry-After": str(int(QUEUE_TIMEOUT))}
+        )
+    finally:
+        queued -= 1
+
+    try:
+        yield
+    finally:
+        admission.release()
+
+
+def triage_priority(assessment: Optional[dict] = None) -> int:
+    """Scheduler priority for LLM calls on a case: by its known severity, else as triage"""
+    severity = (assessment or {}).get("severity")
+    return priority_for_severity(severity) if isinstance(severity, int) else PRIORITY_TRIAGE
+
+
+def transcribe_audio(audio_file) -> str:
+    return components.transcriber.transcribe(audio_file)
+
+
+async def run_inference(func, *args):
+    """Run a blocking model call on the inference pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(inference_pool, func, *args)
+
+
+def warm_up(component_names=None) -> Dict[str, float]:
+    """Build components (all by default) and load every model they use; returns timings"""
+    if component_names is None:
+        # Building the job pool starts its worker processes; only do that when it's used
+        component_names = [n for n in components.names() if n != "media_jobs" or MEDIA_JOBS]
+    timings = components.warm_up(component_names)
+    names = model_registry.names()
+    if MEDIA_JOBS:
+        # The job workers hold Whisper and BLIP
+        names = [n for n in names if not n.startswith(MEDIA_JOB_MODELS)]
+    elif components.transcriber.engine != "whisper":
+        # Load the selected ASR engine, and skip openai-whisper
+        components.transcriber.model
+        names = [n for n in names if not n.startswith("whisper:")]
+    timings.update(model_registry.warm_up(names))
+    return timings
+
+
+@app.on_event("startup")
+async def warm_up_models():
+    if not WARM_UP_MODELS:
+        return
+    # Under api.prefork most of this was loaded before the fork and returns at once
+    timings = await run_inference(warm_up)
+    for name, seconds in timings.items():
+        logger.info(f"Warmed up {name} in {seconds:.2f}s")
+
+
+@app.on_event("shutdown")
+def shutdown_inference_pool():
+    inference_pool.shutdown(wait=False)
+    if components.is_loaded("media_jobs"):
+        components.media_jobs.shutdown()
+
+
+async def gather_inputs(audio: UploadFile, image: UploadFile = None) -> str:
+    """Transcribe audio and caption the image concurrently, then combine them"""
+    if MEDIA_JOBS:
+        audio_task = run_media_job("transcribe", await audio.read())
+    else:
+        audio_task = run_inference(transcribe_audio, audio.file)
+    if image:
+        image_bytes = await image.read()
+        text_input, image_desc = await asyncio.gather(
+            audio_task,
+            run_media_job("caption", image_bytes) if MEDIA_JOBS else components.caption_batcher.adescribe(image_bytes)
+        )
+    else:
+        text_input, image_desc = await audio_task, ""
+    return f"{text_input}. Image context: {image_desc}"
+
+
+async def run_media_job(kind: str, payload: bytes):
+    """Run a job on the media workers; None if it fails, like the in-process path"""
+    try:
+        return await components.media_jobs.run(kind, payload)
+    except QueueFull:
+        raise HTTPException(status_code=429, detail="Too many media jobs queued", headers={"Retry-After": "1"})
+    except JobFailed as e:
+        logger.error(f"Media job {kind} failed: {str(e)}")
+        return None
+
 
 @app.post("/process-emergency")
 async def process_emergency(
     audio: UploadFile,
     image: UploadFile = None
 ):
-    # Process audio
-    transcriber = AudioTranscriber()
-    text_input = transcriber.transcribe(audio.file)
-    
-    # Process image
-    image_desc = ""
-    if image:
-        analyzer = ImageAnalyzer()
-        image_desc = analyzer.describe(image.file)
-    
-    # Combine inputs
-    full_input = f"{text_input}. Image context: {image_desc}"
-    
-    # Get triage assessment
-    assessment = triage_agent.assess_severity(
-        symptoms=full_input,
-        environment="urban"
-    )
-    
+    async with admission_slot():
+        full_input = await gather_inputs(audio, image)
+
+        # Obvious red flags are answered now; the agent refines in the background
+        provisional = await run_inference(components.fast_triage.assess, full_input)
+        if provisional is None:
+            # Get triage assessment without blocking the event loop
+            with scheduling_priority(triage_priority()):
+                assessment = await components.triage_agent.aassess(full_input)
+
+    # Follow-up questions continue from this case instead of re-running the pipeline
+    case = components.sessions.create(full_input, provisional or assessment)
+    if provisional is not None:
+        refinement_id = start_refinement(full_input, case.case_id, provisional)
+        return {
+            "assessment": provisional,
+            "refinement_id": refinement_id,
+            "refined": f"/process-emergency/{refinement_id}",
+            "case_id": case.case_id,
+            "follow_up": f"/cases/{case.case_id}/messages",
+            "next_steps": "/treatment etc."
+        }
+
     return {
         "assessment": assessment,
+        "case_id": case.case_id,
+        "follow_up": f"/cases/{case.case_id}/messages",
         "next_steps": "/treatment etc."
     }
+
+
+def start_refinement(full_input: str, case_id: str = None, provisional: Optional[dict] = None) -> str:
+    """Run the full triage agent in the background and keep its result for polling"""
+    refinement_id = uuid.uuid4().hex
+    entry = {"status": "pending", "assessment": None}
+    refinements[refinement_id] = entry
+    evict_refinements()
+
+    async def refine():
+        try:
+            async with admission_slot():
+                # The provisional severity is known: a critical case's refinement jumps the queue
+                with scheduling_priority(triage_priority(provisional)):
+                    entry["assessment"] = await components.triage_agent.aassess(full_input)
+            entry["status"] = "done"
+            case = components.sessions.get(case_id) if case_id else None
+            if case is not None:
+                # A follow-up may have raised the severity meanwhile; don't undo that
+                async with case.lock:
+                    case.update_assessment(entry["assessment"])
+                    components.sessions.save(case)
+        except HTTPException:
+            entry["status"] = "rejected"  # overloaded; the provisional answer stands
+        except Exception as e:
+            logger.error(f"Triage refinement failed: {str(e)}")
+            entry["status"] = "failed"
+
+    task = asyncio.create_task(refine())
+    refinement_tasks.add(task)
+    task.add_done_callback(refinement_tasks.discard)
+    return refinement_id
+
+
+def evict_refinements() -> None:
+    """Forget the oldest finished refinements beyond MAX_REFINEMENTS, pending ones only as a last resort"""
+    excess = len(refinements) - MAX_REFINEMENTS
+    if excess <= 0:
+        return
+    finished = [rid for rid, entry in refinements.items() if entry["status"] != "pending"]
+    pending = [rid for rid, entry in refinements.items() if entry["status"] == "pending"]
+    for refinement_id in (finished + pending)[:excess]:
+        del refinements[refinement_id]
+
+
+@app.get("/process-emergency/{refinement_id}")
+async def get_refinement(refinement_id: str):
+    entry = refinements.get(refinement_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired refinement id")
+    return {"status": entry["status"], "assessment": entry["assessment"]}
+
+
+def sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/process-emergency/stream")
+async def process_emergency_stream(
+    audio: UploadFile,
+    image: UploadFile = None
+):
+    """Server-Sent Events: partial transcripts, a fast provisional triage, then agent text as it is generated"""
+    image_bytes = await image.read() if image else None
+    # ffmpeg gets a real file: MP4/M4A with the index at the end can't be demuxed from a pipe
+    suffix = os.path.splitext(audio.filename or "")[1] or ".audio"
+    audio_path = await asyncio.get_running_loop().run_in_executor(None, save_upload, audio.file, suffix)
+    resources = AsyncExitStack()
+    resources.callback(os.unlink, audio_path)
+    try:
+        # Take the slot before responding so overload still surfaces as a 429
+        await resources.enter_async_context(admission_slot())
+    except BaseException:
+        await resources.aclose()
+        raise
+    return event_stream(emergency_events(audio_path, image_bytes), resources)
+
+
+@app.post("/process-emergency/live")
+async def process_emergency_live(request: Request):
+    """Like /stream, but the request body is the raw audio (any format ffmpeg reads).
+
+    Transcription starts with the first bytes received, so a chunked upload
+    of a call in progress is triaged while it is still being sent.
+    """
+    slot = AsyncExitStack()
+    await slot.enter_async_context(admission_slot())
+    return LiveEventStream(lambda audio: emergency_events(audio, None), request, slot)
+
+
+class EventStream(StreamingResponse):
+    """SSE response that closes ``resources`` (e.g. the admission slot) when it ends.
+
+    Closing them from the event generator is not enough: a client that
+    disconnects early cancels the response before the generator starts, and
+    its ``finally`` never runs.
+    """
+
+    def __init__(self, events, resources: Optional[AsyncExitStack] = None):
+        super().__init__(
+            events,
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+        self.resources = resources or AsyncExitStack()
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.respond(scope, receive, send)
+        finally:
+            # An exit stack closes each context once, however often it is closed
+            await self.resources.aclose()
+
+    async def respond(self, scope, receive, send):
+        await super().__call__(scope, receive, send)
+
+
+class LiveEventStream(EventStream):
+    """EventStream whose events consume the request body while they are sent.
+
+    Below ASGI spec 2.4 Starlette listens for a disconnect on ``receive``
+    during the response, taking the body messages the events still need.
+    Here only the events read the body; disconnects are watched once it is in.
+    """
+
+    def __init__(self, make_events, request: Request, resources: Optional[AsyncExitStack] = None):
+        self.body_read = asyncio.Event()
+        super().__init__(make_events(self.request_body(request)), resources)
+
+    async def request_body(self, request: Request):
+        async for chunk in request.stream():
+            yield chunk
+        self.body_read.set()
+
+    async def respond(self, scope, receive, send):
+        async def disconnected():
+            await self.body_read.wait()
+            await self.listen_for_disconnect(receive)
+
+        streaming = asyncio.ensure_future(self.stream_response(send))
+        watcher = asyncio.ensure_future(disconnected())
+        try:
+            await asyncio.wait([streaming, watcher], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            streaming.cancel()
+            watcher.cancel()
+        if not streaming.cancelled():
+            try:
+                streaming.result()
+            except OSError:
+                raise ClientDisconnect()
+
+
+def event_stream(events, resources: Optional[AsyncExitStack] = None) -> StreamingResponse:
+    return EventStream(events, resources)
+
+
+async def emergency_events(encoded_audio, image_bytes):
+    """SSE events for one call; ``encoded_audio`` is a file path or an async byte stream"""
+    start = time.perf_counter()
+    first_token = None
+    # Caption the image while the audio is still being transcribed
+    image_task = asyncio.ensure_future(components.caption_batcher.adescribe(image_bytes)) if image_bytes else None
+    try:
+        provisional = None
+        transcript = ""
+        async for partial in components.transcriber.astream(decode_pcm(encoded_audio), run_inference):
+            transcript = partial.transcript
+            if not partial.text:
+                continue
+            yield sse("transcript_partial", {
+                "text": partial.text,
+                "transcript": transcript,
+                "start": partial.start,
+                "end": partial.end,
+                "elapsed_ms": _ms(time.perf_counter() - start)
+            })
+            # Red flags are usually in the first sentences; don't wait for the whole call
+            if provisional is None:
+                provisional = await run_inference(components.fast_triage.assess, transcript)
+                if provisional is not None:
+                    first_token = first_token or time.perf_counter() - start
+                    yield sse("triage_provisional", {"assessment": provisional, "elapsed_ms": _ms(time.perf_counter() - start)})
+
+        image_desc = await image_task if image_task else ""
+        full_input = f"{transcript}. Image context: {image_desc}"
+        yield sse("input", {"text": full_input})
+
+        if provisional is None:
+            provisional = await run_inference(components.fast_triage.assess, full_input)
+            if provisional is not None:
+                first_token = first_token or time.perf_counter() - start
+                yield sse("triage_provisional", {"assessment": provisional, "elapsed_ms": _ms(time.perf_counter() - start)})
+
+        assessment = {}
+        with scheduling_priority(triage_priority(provisional)):
+            async for event in components.triage_agent.astream_assess(full_input):
+                if event.type == "token":
+                    first_token = first_token or time.perf_counter() - start
+                    yield sse("triage_token", {"text": event.text})
+                else:
+                    assessment = event.data
+                    yield sse("triage", {"assessment": assessment, "ttft_ms": _ms(event.ttft)})
+        case = components.sessions.create(full_input, assessment)
+        yield sse("case", {"case_id": case.case_id, "follow_up": f"/cases/{case.case_id}/messages"})
+
+        severity = assessment.get("severity", 0)
+        if isinstance(severity, int) and severity >= 3:
+            diagnosis = assessment.get("diagnosis") or full_input
+            # Critical cases jump the Groq rate-limit queue
+            with scheduling_priority(priority_for_severity(severity)):
+                async for event in components.treatment_agent.astream_plan(diagnosis, severity):
+                    if event.type == "token":
+                        first_token = first_token or time.perf_counter() - start
+                        yield sse("treatment_token", {"text": event.text})
+                    else:
+                        yield sse("treatment", {"plan": event.data, "ttft_ms": _ms(event.ttft)})
+
+        yield sse("done", {
+            "ttft_ms": _ms(first_token),
+            "total_ms": _ms(time.perf_counter() - start)
+        })
+    except Exception as e:
+        logger.error(f"Streaming request failed: {str(e)}")
+        yield sse("error", {"detail": str(e)})
+    finally:
+        if image_task is not None:
+            image_task.cancel()
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return components.response_cache.stats()
+
+
+@app.get("/scheduler/stats")
+async def scheduler_stats():
+    return scheduler.stats()
+
+
+@app.get("/router/stats")
+async def router_stats():
+    return route_stats.summary()
+
+
+class FollowUpMessage(BaseModel):
+    message: str
+
+
+@app.post("/cases/{case_id}/messages")
+async def follow_up(case_id: str, body: FollowUpMessage):
+    """Answer a follow-up on a triaged case from its session: no re-triage, retrieval only if needed"""
+    case = components.sessions.get(case_id)
+    if case is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired case id")
+    async with admission_slot():
+        try:
+            with scheduling_priority(triage_priority(case.assessment)):
+                return await components.conversation_agent.areply(case_id, body.message)
+        except KeyError:
+            raise HTTPException(status_code=404, detail="Unknown or expired case id")
+
+
+@app.get("/cases/{case_id}")
+async def get_case(case_id: str):
+    case = components.sessions.get(case_id)
+    if case is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired case id")
+    return case.to_dict()
+
+
+@app.get("/sessions/stats")
+async def session_stats():
+    return components.sessions.stats()
+
+
+@app.post("/jobs/{kind}")
+async def submit_job(kind: str, file: UploadFile):
+    """Queue a "transcribe" (audio) or "caption" (image) job; returns its id at once"""
+    try:
+        job = components.media_jobs.submit(kind, await file.read())
+    except ValueError:
+        raise HTTPException(status_code=404, detail=f"Unknown job kind '{kind}'")
+    except QueueFull:
+        raise HTTPException(status_code=429, detail="Too many media jobs queued", headers={"Retry-After": "1"})
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}",
+        "events_url": f"/jobs/{job.id}/events"
+    }
+
+
+@app.get("/jobs/stats")
+async def job_stats():
+    if not components.is_loaded("media_jobs"):
+        return {"workers": 0}
+    return components.media_jobs.stats()
+
+
+def find_job(job_id: str):
+    # A lookup never starts the worker pool
+    job = components.media_jobs.get(job_id) if components.is_loaded("media_jobs") else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job id")
+    return job
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    return find_job(job_id).to_dict()
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-Sent Events: a single "job" event when the job finishes, instead of polling"""
+    job = find_job(job_id)
+
+    async def events():
+        try:
+            # A disconnecting client cancels this task; shielded, the job's own future lives on
+            await asyncio.shield(asyncio.wrap_future(job.future))
+        except JobFailed:
+            pass
+        yield sse("job", job.to_dict())
+
+    return event_stream(events())
@@ -0,0 +1,203 @@
+# rescura/api/prefork.py
+"""Pre-forking server: load models once, then fork workers that share them.
+
+    python -m api.prefork --workers 8 --port 8000
+
+The parent loads Whisper, BLIP, the embedding model and the FAISS index,
+freezes the garbage collector, and forks. The workers then share those
+pages copy-on-write instead of each holding its own copy, as separate
+``uvicorn --workers`` processes would.
+
+Only components with no threads, sockets or database handles are built
+before the fork (``SHARED_COMPONENTS``). Agents, the semantic cache and
+case sessions (sqlite) and the caption batcher (a worker thread) are built
+in each worker by the app's startup warm-up. Sessions are shared between
+workers through their sqlite file (RESCURA_SESSION_PATH), so a follow-up
+may land on any worker.
+"""
+import gc
+import os
+import time
+import signal
+import socket
+import logging
+import argparse
+from typing import Callable, Dict, Iterable, Optional
+from utils.model_registry import limit_threads
+
+logger = logging.getLogger(__name__)
+
+PREFORK_WORKERS = int(os.getenv("RESCURA_PREFORK_WORKERS", str(os.cpu_count() or 1)))
+# Intra-op threads per worker; 0 splits the CPUs evenly between workers
+WORKER_THREADS = int(os.getenv("RESCURA_WORKER_THREADS", "0"))
+RESPAWN_DELAY = 1.0
+
+# Built in the parent: they hold the large read-only model weights and index arrays
+SHARED_COMPONENTS = ("retriever", "fast_triage", "transcriber", "analyzer")
+
+
+def threads_per_worker(workers: int, threads: int = WORKER_THREADS) -> int:
+    return threads or max(1, (os.cpu_count() or 1) // workers)
+
+
+def memory_usage(pid: int) -> Dict[str, int]:
+    """Resident, proportional and private memory of a process in bytes (Linux)"""
+    usage = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                usage[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    return {
+        "rss": usage.get("Rss", 0),
+        # Shared pages counted once in total, split across the processes mapping them
+        "pss": usage.get("Pss", 0),
+        # What the process would free on exit: its own copies only
+        "uss": usage.get("Private_Clean", 0) + usage.get("Private_Dirty", 0),
+        "shared": usage.get("Shared_Clean", 0) + usage.get("Shared_Dirty", 0),
+    }
+
+
+class PreforkServer:
+    """Runs ``preload`` once, then keeps ``workers`` forked copies of ``target`` alive.
+
+    ``gc.freeze()`` after preloading moves every object already created to a
+    permanent generation, so collections in the workers never write to their
+    headers and unshare the pages. ``target(index)`` runs in each worker and
+    its return (or exception) ends that worker.
+    """
+
+    def __init__(
+        self,
+        target: Callable[[int], None],
+        workers: int = PREFORK_WORKERS,
+        preload: Optional[Callable[[], None]] = None,
+        freeze: bool = True,
+        threads: int = WORKER_THREADS
+    ):
+        self.target = target
+        self.workers = workers
+        self.preload = preload
+        self.freeze = freeze
+        self.threads = threads_per_worker(workers, threads)
+        self.pids: Dict[int, int] = {}  # pid -> worker index
+        self.stopping = False
+
+    def start(self) -> None:
+        if self.freeze:
+            # No collections while loading; gc.freeze below takes care of the result
+            gc.disable()
+        if self.preload is not None:
+            start = time.perf_counter()
+            self.preload()
+            logger.info(f"Preloaded in {time.perf_counter() - start:.2f}s")
+        if self.freeze:
+            gc.collect()
+            gc.freeze()
+            logger.info(f"Froze {gc.get_freeze_count()} objects before forking")
+        for index in range(self.workers):
+            self.spawn(index)
+
+    def spawn(self, index: int) -> int:
+        pid = os.fork()
+        if pid:
+            self.pids[pid] = index
+            return pid
+
+        # Worker: plain signal handling, its own GC, a share of the CPUs
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        gc.enable()
+        limit_threads(self.threads)
+        code = 0
+        try:
+            self.target(index)
+        except BaseException as e:
+            logger.error(f"Worker {index} failed: {str(e)}")
+            code = 1
+        finally:
+            os._exit(code)
+
+    def supervise(self) -> None:
+        """Wait on workers, replacing any that die, until ``stop``"""
+        signal.signal(signal.SIGTERM, lambda *_: self.stop())
+        signal.signal(signal.SIGINT, lambda *_: self.stop())
+        while self.pids:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            index = self.pids.pop(pid, None)
+            if index is None or self.stopping:
+                continue
+            logger.warning(f"Worker {index} (pid {pid}) exited with status {status}; restarting")
+            time.sleep(RESPAWN_DELAY)
+            self.spawn(index)
+
+    def stop(self, sig: int = signal.SIGTERM) -> None:
+        self.stopping = True
+        for pid in list(self.pids):
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                self.pids.pop(pid, None)
+
+    def wait(self) -> None:
+        """Reap every worker (after ``stop``)"""
+        for pid in list(self.pids):
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+            self.pids.pop(pid, None)
+
+
+def preload_models(component_names: Iterable[str] = SHARED_COMPONENTS) -> Dict[str, float]:
+    """Build the shareable components and load every model, as the parent process"""
+    from api.fastapi_app import warm_up
+    return warm_up(list(component_names))
+
+
+def bind(host: str, port: int) -> socket.socket:
+    # One listening socket, inherited by every worker; the kernel spreads connections
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def serve(host: str = "0.0.0.0", port: int = 8000, workers: int = PREFORK_WORKERS) -> None:
+    import uvicorn
+
+    # The Groq rate limits are per account; each worker's scheduler takes its share
+    os.environ.setdefault("RESCURA_WORKERS", str(workers))
+    from api.fastapi_app import app
+
+    sock = bind(host, port)
+
+    def run_worker(index: int) -> None:
+        config = uvicorn.Config(app, lifespan="on", log_level="info")
+        uvicorn.Server(config).run(sockets=[sock])
+
+    server = PreforkServer(run_worker, workers=workers, preload=preload_models)
+    server.start()
+    logger.info(f"Serving on {host}:{port} with {workers} workers, {server.threads} threads each")
+    server.supervise()
+    server.wait()
+    sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=PREFORK_WORKERS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    serve(args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main()
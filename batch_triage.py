@@ -0,0 +1,355 @@
+# rescura/batch_triage.py
+"""Offline triage over archived incident reports.
+
+    python batch_triage.py incidents.jsonl results.jsonl --concurrency 8
+    python batch_triage.py incidents.csv results.jsonl --provider-batch
+
+Results are appended to the output JSONL as each case finishes, and the
+output doubles as the checkpoint: re-running the same command skips cases
+already written, so an interrupted run resumes where it stopped.
+"""
+import os
+import csv
+import json
+import time
+import asyncio
+import logging
+import argparse
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Set
+from dotenv import load_dotenv
+from langchain_core.callbacks import get_usage_metadata_callback
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+TEXT_FIELDS = ("text", "symptoms", "description", "report")
+ID_FIELDS = ("id", "case_id", "incident_id")
+BATCH_DONE = {"completed", "failed", "expired", "cancelled"}
+
+
+def read_cases(path: Path, text_field: Optional[str] = None) -> Iterator[dict]:
+    """Stream cases from JSONL or CSV as {"id", "text", "row"} without loading the file"""
+    with open(path, newline="") as f:
+        rows = csv.DictReader(f) if path.suffix.lower() == ".csv" else (json.loads(line) for line in f if line.strip())
+        for index, row in enumerate(rows):
+            field = text_field or next((name for name in TEXT_FIELDS if row.get(name)), None)
+            case_id = next((str(row[name]) for name in ID_FIELDS if row.get(name) not in (None, "")), str(index))
+            yield {"id": case_id, "text": row.get(field, "") if field else "", "row": row}
+
+
+def completed_ids(output: Path) -> Set[str]:
+    """Case ids already in the output file (the checkpoint)"""
+    done = set()
+    if not output.exists():
+        return done
+    with open(output) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by a crash; the case is re-run
+            done.add(str(record["id"]))
+    return done
+
+
+def trim_partial_line(output: Path) -> None:
+    """Cut a final line left unterminated by a crash so appends start on a fresh line"""
+    if not output.exists():
+        return
+    with open(output, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+class ThroughputReport:
+    """Cases/min and tokens/min since the run started"""
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.start = clock()
+        self.cases = 0
+        self.failures = 0
+        self.tokens = 0
+        self.latencies: List[float] = []
+
+    def record(self, latency: float, tokens: int, ok: bool) -> None:
+        self.cases += 1
+        self.failures += 0 if ok else 1
+        self.tokens += tokens
+        self.latencies.append(latency)
+
+    def summary(self) -> Dict[str, float]:
+        minutes = max(self.clock() - self.start, 1e-9) / 60
+        latencies = sorted(self.latencies) or [0.0]
+        return {
+            "cases": self.cases,
+            "failures": self.failures,
+            "cases_per_min": self.cases / minutes,
+            "tokens_per_min": self.tokens / minutes,
+            "p50_ms": latencies[len(latencies) // 2] * 1000,
+            "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        }
+
+    def format(self) -> str:
+        s = self.summary()
+        return (f"{s['cases']} cases ({s['failures']} failed) | {s['cases_per_min']:.1f} cases/min | "
+                f"{s['tokens_per_min']:.0f} tokens/min | p50 {s['p50_ms']:.0f} ms | p95 {s['p95_ms']:.0f} ms")
+
+
+async def run_batch(
+    cases: Iterable[dict],
+    process: Callable[[dict], Awaitable[Dict[str, Any]]],
+    output: Path,
+    concurrency: int = 8,
+    report_every: int = 100,
+    report: Optional[ThroughputReport] = None
+) -> ThroughputReport:
+    """Run ``process`` over cases with at most ``concurrency`` in flight, appending results.
+
+    ``process`` returns the record to write; a ``tokens`` key, if present,
+    feeds the tokens/min figure. Cases are pulled lazily, so memory stays
+    flat however large the input is.
+    """
+    report = report or ThroughputReport()
+    trim_partial_line(output)
+    done = completed_ids(output)
+    pending = (case for case in cases if case["id"] not in done)
+    in_flight = set()
+
+    async def one(case):
+        start = time.perf_counter()
+        try:
+            record = await process(case)
+        except Exception as e:
+            logger.error(f"Case {case['id']} failed: {str(e)}")
+            record = {"error": f"{e.__class__.__name__}: {e}"}
+        return {"id": case["id"], **record, "latency_ms": round((time.perf_counter() - start) * 1000, 1)}
+
+    with open(output, "a") as out:
+        while True:
+            for case in pending:
+                in_flight.add(asyncio.ensure_future(one(case)))
+                if len(in_flight) >= concurrency:
+                    break
+            if not in_flight:
+                break
+
+            finished, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                record = task.result()
+                # One flushed line per case: a crash loses at most the cases in flight
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                report.record(record["latency_ms"] / 1000, record.get("tokens", 0), not record.get("error"))
+                if report_every and report.cases % report_every == 0:
+                    logger.info(report.format())
+    return report
+
+
+def build_processor(mode: str, route: str, treatment: bool):
+    """Per-case coroutine running text cleanup, fast triage, retrieval and the agents"""
+    from agents.triage_agent import TriageAgent
+    from agents.treatment_agent import TreatmentAgent
+    from agents.fast_triage import FastTriage
+    from input_processing.text_processor import TextProcessor
+    from llm.router import ModelRouter
+    from llm.scheduler import scheduling_priority, PRIORITY_BACKGROUND
+    from retrieval.retriever import RescuraRetriever
+
+    api_key = os.getenv("GROQ_API_KEY")
+    retriever = RescuraRetriever()
+    text_processor = TextProcessor()
+    fast_triage = FastTriage(retriever.embeddings)
+    # No semantic cache: re-runs exist to evaluate prompt changes
+    triage_agent = TriageAgent(retriever, api_key, router=ModelRouter("triage", policy=route), mode=mode)
+    treatment_agent = TreatmentAgent(retriever, api_key, mode=mode) if treatment else None
+
+    async def process(case: dict) -> Dict[str, Any]:
+        text = text_processor.clean_text(case["text"])
+        # Archived cases must never delay live traffic sharing the Groq account
+        with scheduling_priority(PRIORITY_BACKGROUND), get_usage_metadata_callback() as usage:
+            record = {"fast_triage": fast_triage.assess(text), "assessment": await triage_agent.aassess(text)}
+            severity = record["assessment"].get("severity")
+            if treatment_agent and isinstance(severity, int) and severity >= 3:
+                record["treatment"] = await treatment_agent.aplan(record["assessment"].get("rationale") or text, severity)
+        record["tokens"] = sum(u.get("total_tokens", 0) for u in usage.usage_metadata.values())
+        if "error" in record["assessment"]:
+            record["error"] = record["assessment"]["error"]
+        return record
+
+    return process
+
+
+class ProviderBatch:
+    """Triage through Groq's Batch API: one upload, results within the completion window.
+
+    Context is retrieved locally and each case becomes a single JSON-mode
+    chat request (the structured-mode prompt), since the batch endpoint
+    cannot run a tool-calling loop. The batch id is kept next to the output
+    so an interrupted run polls the same batch instead of resubmitting.
+    """
+
+    def __init__(self, output: Path, model: str, poll_interval: float = 30.0):
+        from groq import Groq
+        from retrieval.retriever import RescuraRetriever
+        from retrieval.context_builder import ContextBuilder, MAX_INPUT_TOKENS
+        self.client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        self.retriever = RescuraRetriever()
+        self.builder = ContextBuilder.for_agent("triage")
+        self.max_input_tokens = MAX_INPUT_TOKENS
+        self.output = output
+        self.state_path = output.with_suffix(output.suffix + ".batch.json")
+        self.model = model
+        self.poll_interval = poll_interval
+
+    def request(self, case: dict) -> dict:
+        from agents.structured import TriageResult
+        text = self.builder.truncate(case["text"], self.max_input_tokens)
+        context = self.builder.build(text, self.retriever.get_relevant_documents(text)) or "None available."
+        schema = json.dumps(TriageResult.model_json_schema())
+        return {
+            "custom_id": case["id"],
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": self.model,
+                "temperature": 0.2,
+                "response_format": {"type": "json_object"},
+                "messages": [
+                    {"role": "system", "content": (
+                        "You are an emergency medical triage specialist. Assess severity from 1-5 "
+                        f"and answer with JSON matching this schema: {schema}\n\nRelevant guidelines:\n{context}"
+                    )},
+                    {"role": "user", "content": f"Symptoms: {text}"}
+                ]
+            }
+        }
+
+    def submit(self, cases: Iterable[dict]) -> Optional[str]:
+        done = completed_ids(self.output)
+        lines = [json.dumps(self.request(case)) for case in cases if case["id"] not in done]
+        if not lines:
+            return None
+        upload = self.client.files.create(file=("rescura_batch.jsonl", "\n".join(lines).encode()), purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=upload.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        self.state_path.write_text(json.dumps({"batch_id": batch.id, "cases": len(lines)}))
+        logger.info(f"Submitted batch {batch.id} with {len(lines)} cases")
+        return batch.id
+
+    def run(self, cases: Iterable[dict]) -> ThroughputReport:
+        report = ThroughputReport()
+        if self.state_path.exists():
+            batch_id = json.loads(self.state_path.read_text())["batch_id"]
+            logger.info(f"Resuming batch {batch_id}")
+        else:
+            batch_id = self.submit(cases)
+            if batch_id is None:
+                return report
+
+        batch = self.client.batches.retrieve(batch_id)
+        while batch.status not in BATCH_DONE:
+            logger.info(f"Batch {batch_id}: {batch.status} {batch.request_counts}")
+            time.sleep(self.poll_interval)
+            batch = self.client.batches.retrieve(batch_id)
+
+        # Latency is the batch's wall time, shared by every case in it
+        elapsed = (batch.completed_at or time.time()) - batch.created_at
+        trim_partial_line(self.output)
+        done = completed_ids(self.output)
+        with open(self.output, "a") as out:
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if not file_id:
+                    continue
+                for line in self.client.files.content(file_id).text().splitlines():
+                    record = self._parse(json.loads(line))
+                    if record["id"] in done:
+                        continue
+                    out.write(json.dumps(record) + "\n")
+                    report.record(elapsed, record.get("tokens", 0), not record.get("error"))
+        self.state_path.unlink()
+        logger.info(f"Batch {batch_id} finished with status {batch.status}")
+        return report
+
+    @staticmethod
+    def _parse(line: dict) -> dict:
+        from agents.structured import TriageResult
+        record = {"id": line["custom_id"]}
+        response = line.get("response") or {}
+        body = response.get("body") or {}
+        if line.get("error") or response.get("status_code", 200) != 200:
+            record["error"] = str(line.get("error") or body.get("error"))
+            return record
+        record["tokens"] = (body.get("usage") or {}).get("total_tokens", 0)
+        try:
+            content = body["choices"][0]["message"]["content"]
+            record["assessment"] = TriageResult.model_validate_json(content).model_dump()
+        except Exception as e:
+            record["error"] = f"Unparseable result: {e}"
+        return record
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run triage over a JSONL/CSV of incident reports")
+    parser.add_argument("input", type=Path, help="JSONL or CSV of cases")
+    parser.add_argument("output", type=Path, help="Results JSONL; also the resume checkpoint")
+    parser.add_argument("--text-field", help=f"Column holding the report (default: first of {', '.join(TEXT_FIELDS)})")
+    parser.add_argument("--concurrency", type=int, default=8, help="Cases in flight at once")
+    parser.add_argument("--mode", choices=("agent", "structured"), default="structured")
+    parser.add_argument("--route", default="keywords", help="Model routing policy for triage")
+    parser.add_argument("--treatment", action="store_true", help="Also plan treatment for severity >= 3")
+    parser.add_argument("--retry-failed", action="store_true", help="Re-run cases whose result has an error")
+    parser.add_argument("--provider-batch", action="store_true", help="Submit through the Groq Batch API")
+    parser.add_argument("--batch-model", default=None, help="Model for --provider-batch (default: large route model)")
+    parser.add_argument("--poll-interval", type=float, default=30.0)
+    parser.add_argument("--report-every", type=int, default=100)
+    return parser.parse_args()
+
+
+def drop_failed(output: Path) -> None:
+    """Remove failed records so they are retried; kept lines are rewritten atomically"""
+    if not output.exists():
+        return
+    tmp = output.with_suffix(output.suffix + ".tmp")
+    with open(output) as src, open(tmp, "w") as dst:
+        for line in src:
+            try:
+                if json.loads(line).get("error"):
+                    continue
+            except json.JSONDecodeError:
+                continue
+            dst.write(line)
+    os.replace(tmp, output)
+
+
+if __name__ == "__main__":
+    from utils import setup_logging
+    setup_logging()
+    args = parse_args()
+    if args.retry_failed:
+        drop_failed(args.output)
+    cases = read_cases(args.input, args.text_field)
+
+    report = None
+    if args.provider_batch:
+        from llm.router import MODELS, ROUTE_LARGE
+        batch = ProviderBatch(args.output, args.batch_model or MODELS[ROUTE_LARGE], args.poll_interval)
+        try:
+            report = batch.run(cases)
+        except Exception as e:
+            if batch.state_path.exists():
+                raise  # submitted already; rerun to resume polling rather than duplicating work
+            # Batch API access is per account; fall back to online calls
+            logger.warning(f"Provider batch unavailable ({e.__class__.__name__}: {e}), running online")
+            cases = read_cases(args.input, args.text_field)
+
+    if report is None:
+        process = build_processor(args.mode, args.route, args.treatment)
+        report = asyncio.run(run_batch(cases, process, args.output, args.concurrency, args.report_every))
+    print(report.format())
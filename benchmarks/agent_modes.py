@@ -0,0 +1,115 @@
+# rescura/benchmarks/agent_modes.py
+"""Compare ReAct agent mode with single-shot structured mode per case.
+
+    python -m benchmarks.agent_modes --agent triage --cases cases.jsonl
+
+LLM calls and tokens are read from the Groq request scheduler, which every
+agent call goes through; raise RESCURA_GROQ_RPM/TPM to your account's limits
+so rate limiting doesn't dominate latency (queue time is reported separately).
+"""
+import os
+import json
+import time
+import argparse
+import statistics
+from typing import Dict, List
+from dotenv import load_dotenv
+from llm.router import ModelRouter, POLICIES
+from llm.scheduler import scheduler
+
+load_dotenv()
+
+CASES = [
+    {"symptoms": "My father collapsed and is not breathing", "diagnosis": "Cardiac arrest", "severity": 5},
+    {"symptoms": "Deep cut on my palm from a kitchen knife, bleeding steadily", "diagnosis": "Hand laceration", "severity": 3},
+    {"symptoms": "Child touched a hot pan, small red blister on one finger", "diagnosis": "Superficial burn", "severity": 2},
+    {"symptoms": "Stung by a bee, now lips swelling and wheezing", "diagnosis": "Anaphylaxis", "severity": 5},
+    {"symptoms": "Twisted ankle playing football, swollen but can walk", "diagnosis": "Ankle sprain", "severity": 2},
+    {"symptoms": "Elderly woman fell, hip pain, cannot stand up", "diagnosis": "Suspected hip fracture", "severity": 4},
+]
+
+
+def load_cases(path: str) -> List[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def build_agent(agent: str, mode: str, policy: str, retriever):
+    api_key = os.getenv("GROQ_API_KEY")
+    router = ModelRouter(agent, policy=policy)
+    if agent == "triage":
+        from agents.triage_agent import TriageAgent
+        return TriageAgent(retriever, api_key, router=router, mode=mode)
+    from agents.treatment_agent import TreatmentAgent
+    return TreatmentAgent(retriever, api_key, router=router, mode=mode)
+
+
+def run_case(agent_name: str, agent, case: dict) -> Dict[str, float]:
+    before = scheduler.stats()
+    start = time.perf_counter()
+    failed = False
+    try:
+        if agent_name == "triage":
+            failed = "error" in agent.assess(case["symptoms"])
+        else:
+            agent.plan(case["diagnosis"], case["severity"])
+    except Exception as e:
+        print(f"  {case.get('symptoms') or case.get('diagnosis')}: {e.__class__.__name__}: {e}")
+        failed = True
+    after = scheduler.stats()
+    return {
+        "seconds": time.perf_counter() - start,
+        "calls": after["admitted"] - before["admitted"],
+        "tokens": after["actual_tokens"] - before["actual_tokens"],
+        "queued": after["wait_seconds"] - before["wait_seconds"],
+        "failed": failed,
+    }
+
+
+def summarize(mode: str, runs: List[Dict[str, float]]) -> dict:
+    latencies = sorted(r["seconds"] for r in runs)
+    return {
+        "mode": mode,
+        "cases": len(runs),
+        "calls/case": statistics.mean(r["calls"] for r in runs),
+        "tokens/case": statistics.mean(r["tokens"] for r in runs),
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        "queue_ms/case": statistics.mean(r["queued"] for r in runs) * 1000,
+        "failures": sum(r["failed"] for r in runs),
+    }
+
+
+def format_table(rows: List[dict]) -> str:
+    headers = list(rows[0])
+    lines = ["  ".join(f"{h:>13}" for h in headers)]
+    for row in rows:
+        lines.append("  ".join(
+            f"{row[h]:>13.1f}" if isinstance(row[h], float) else f"{row[h]:>13}" for h in headers
+        ))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agent", choices=("triage", "treatment"), default="triage")
+    parser.add_argument("--cases", help="JSONL with symptoms / diagnosis / severity per line")
+    parser.add_argument("--modes", nargs="+", default=["agent", "structured"])
+    parser.add_argument("--model", choices=POLICIES, default="large", help="Routing policy (pin a model for a fair comparison)")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    from retrieval.retriever import RescuraRetriever
+    retriever = RescuraRetriever()
+    cases = load_cases(args.cases) if args.cases else CASES
+
+    rows = []
+    for mode in args.modes:
+        agent = build_agent(args.agent, mode, args.model, retriever)
+        runs = [run_case(args.agent, agent, case) for _ in range(args.repeat) for case in cases]
+        rows.append(summarize(mode, runs))
+    print(format_table(rows))
+
+
+if __name__ == "__main__":
+    main()
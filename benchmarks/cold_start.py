@@ -0,0 +1,53 @@
+# rescura/benchmarks/cold_start.py
+"""Cold-start regression check for the API and CLI entry points.
+
+    python -m benchmarks.cold_start --runs 5 --budget 1.5
+
+Imports each entry point in fresh interpreters and reports the median wall
+time. Exits non-zero when the median is over ``--budget`` seconds or when a
+heavy module (langchain.agents, torch, whisper, ...) is imported eagerly,
+so CI catches an accidental top-level import. Use ``main.py
+--profile-startup`` to see which package a regression came from.
+"""
+import sys
+import argparse
+import statistics
+from utils.startup_profile import ENTRY_POINTS, profile_import, package_totals
+
+
+def measure(module: str, runs: int) -> dict:
+    profiles = [profile_import(module) for _ in range(runs)]
+    walls = [p.wall_s for p in profiles]
+    slowest = list(package_totals(profiles[-1].records).items())[:3]
+    return {
+        "module": module,
+        "median_s": statistics.median(walls),
+        "min_s": min(walls),
+        "heavy": profiles[-1].heavy(),
+        "slowest": ", ".join(f"{name} {seconds:.2f}s" for name, seconds in slowest)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=list(ENTRY_POINTS))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=1.5, help="max median cold start per entry point, seconds")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'entry point':<20} {'median':>8} {'min':>8}  slowest packages")
+    for module in args.modules:
+        result = measure(module, args.runs)
+        print(f"{module:<20} {result['median_s']:>7.2f}s {result['min_s']:>7.2f}s  {result['slowest']}")
+        if result["median_s"] > args.budget:
+            print(f"  over budget ({args.budget:.2f}s)")
+            failed = True
+        if result["heavy"]:
+            print(f"  imported eagerly: {', '.join(result['heavy'])}")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# rescura/benchmarks/prefork_memory.py
+"""Memory per worker: pre-forked shared models vs. independently loaded workers.
+
+    python -m benchmarks.prefork_memory --workers 4
+    python -m benchmarks.prefork_memory --workers 8 --synthetic-mb 400
+
+``independent`` is what ``uvicorn --workers N`` does: every worker loads its
+own models. ``prefork`` loads them in the parent before forking, and
+``prefork+freeze`` also calls ``gc.freeze()`` so garbage collections in the
+workers don't unshare the pages. Each worker runs a few collections, as a
+serving worker would, before it is measured. ``--synthetic-mb`` replaces the
+real models with an array of that size plus a heap of small Python objects,
+for machines without the model weights.
+
+USS is memory only that worker holds (freed if it exits); PSS adds its share
+of pages shared with the other processes. Linux only (/proc/<pid>/smaps_rollup).
+"""
+import gc
+import os
+import signal
+import argparse
+import statistics
+from typing import Callable, Dict
+import numpy as np
+from api.prefork import PreforkServer, memory_usage, preload_models
+from utils.model_registry import model_registry
+
+MODES = {
+    "independent": {"preload": False, "freeze": False},
+    "prefork": {"preload": True, "freeze": False},
+    "prefork+freeze": {"preload": True, "freeze": True},
+}
+MB = 1024 * 1024
+
+
+def synthetic_loader(size_mb: int) -> Callable[[], None]:
+    def build():
+        weights = np.random.default_rng(0).random(size_mb * MB // 8)
+        # Python objects are what reference counting and the collector write to
+        heap = [{"id": i, "term": f"token-{i}", "weight": float(i)} for i in range(size_mb * 2000)]
+        return weights, heap
+
+    def load():
+        if "synthetic" not in model_registry.names():
+            model_registry.register("synthetic", build)
+        model_registry.get("synthetic")
+
+    return load
+
+
+def run_mode(mode: str, workers: int, load: Callable[[], None]) -> Dict[str, float]:
+    settings = MODES[mode]
+    ready_r, ready_w = os.pipe()
+
+    def worker(index: int) -> None:
+        if not settings["preload"]:
+            load()
+        for _ in range(3):
+            gc.collect()
+        os.write(ready_w, b"1")
+        while True:
+            signal.pause()  # until the parent's SIGTERM
+
+    server = PreforkServer(worker, workers=workers, preload=load if settings["preload"] else None, freeze=settings["freeze"], threads=1)
+    try:
+        server.start()
+        received = 0
+        while received < workers:
+            received += len(os.read(ready_r, workers))
+        usage = [memory_usage(pid) for pid in server.pids]
+        parent = memory_usage(os.getpid())
+    finally:
+        server.stop()
+        server.wait()
+        os.close(ready_r)
+        os.close(ready_w)
+        if settings["freeze"]:
+            gc.unfreeze()
+        gc.enable()
+
+    uss = statistics.mean(u["uss"] for u in usage)
+    total_pss = sum(u["pss"] for u in usage) + (parent["pss"] if settings["preload"] else 0)
+    return {
+        "uss_mb": uss / MB,
+        "pss_mb": statistics.mean(u["pss"] for u in usage) / MB,
+        "rss_mb": statistics.mean(u["rss"] for u in usage) / MB,
+        "total_mb": total_pss / MB,
+        # Memory that does not grow with the worker count
+        "fixed_mb": max(0.0, total_pss - uss * workers) / MB,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--synthetic-mb", type=int, help="stand-in model size instead of the real models")
+    parser.add_argument("--node-gb", type=float, default=16.0, help="node memory for the workers-per-node estimate")
+    args = parser.parse_args()
+
+    load = synthetic_loader(args.synthetic_mb) if args.synthetic_mb else preload_models
+    node_mb = args.node_gb * 1024
+    print(f"{'mode':<16} {'USS/worker':>11} {'PSS/worker':>11} {'RSS/worker':>11} {'total PSS':>10} {'workers/node':>13}")
+    for mode in args.modes:
+        result = run_mode(mode, args.workers, load)
+        per_node = int((node_mb - result["fixed_mb"]) // result["uss_mb"]) if result["uss_mb"] else 0
+        print(
+            f"{mode:<16} {result['uss_mb']:>9.1f}MB {result['pss_mb']:>9.1f}MB {result['rss_mb']:>9.1f}MB "
+            f"{result['total_mb']:>8.1f}MB {per_node:>13}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# rescura/benchmarks/text_processor.py
+"""Entity extraction cost per document as the lexicon grows.
+
+    python -m benchmarks.text_processor --sizes 1000 10000 50000
+
+Pads the bundled lexicon with synthetic terms (one to three made-up words,
+sharing prefixes with each other as real terminologies do) up to each size,
+then times ``Lexicon.find`` over a corpus of emergency reports. The
+automaton's per-document time should stay flat across sizes; ``--regex``
+adds a single alternation regex over the same terms for comparison.
+"""
+import re
+import json
+import time
+import random
+import argparse
+import statistics
+from typing import List, Tuple
+from input_processing.lexicon import DEFAULT_LEXICON_PATH, Lexicon
+from input_processing.text_processor import TextProcessor
+
+REPORTS = [
+    "My father collapsed in the kitchen and is not breathing, I think it's a heart attack, please hurry",
+    "Deep cut on my palm from a kitchen knife, bleeding heavily and I feel dizzy and lightheaded",
+    "Child touched a hot pan, small red blister on one finger, mild pain, I gave him paracetamol",
+    "Stung by a bee twenty minutes ago, now her lips are swelling and she is wheezing, we have an epipen",
+    "Twisted ankle playing football, swollen and bruised but can walk a little, took ibuprofen",
+    "Elderly woman fell down the stairs, severe hip pain, cannot stand up, she takes warfarin",
+    "He has had crushing chest pain spreading to the left arm for ten minutes and is sweating",
+    "My toddler swallowed some iron tablets and is vomiting, getting worse, what do I do",
+]
+SYLLABLES = ["ab", "ce", "di", "fo", "gu", "ha", "ki", "lo", "me", "nu", "pa", "ri", "so", "tu", "vy", "ze"]
+
+
+def bundled_terms() -> List[Tuple[str, str, str]]:
+    with open(DEFAULT_LEXICON_PATH) as f:
+        data = json.load(f)
+    return [
+        (term, canonical, category)
+        for category, concepts in data.items()
+        for canonical, synonyms in concepts.items()
+        for term in [canonical, *synonyms]
+    ]
+
+
+def synthetic_terms(count: int, seed: int = 0) -> List[Tuple[str, str, str]]:
+    rng = random.Random(seed)
+
+    def word():
+        return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+    terms = set()
+    while len(terms) < count:
+        terms.add(" ".join(word() for _ in range(rng.randint(1, 3))))
+    return [(term, term, "condition") for term in sorted(terms)]
+
+
+def time_per_doc(find, docs: List[str], repeat: int) -> float:
+    """Median microseconds per document over ``repeat`` passes"""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for doc in docs:
+            find(doc)
+        runs.append((time.perf_counter() - start) / len(docs) * 1e6)
+    return statistics.median(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 50000])
+    parser.add_argument("--docs", type=int, default=400, help="documents per pass, cycled from the sample reports")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--regex", action="store_true", help="also time one alternation regex over the terms")
+    args = parser.parse_args()
+
+    cleaner = TextProcessor(Lexicon([]))
+    docs = [cleaner.clean_text(REPORTS[i % len(REPORTS)]) for i in range(args.docs)]
+    base = bundled_terms()
+    print(f"{'terms':>8} {'build':>8} {'automaton':>12}" + (f" {'regex':>12}" if args.regex else ""))
+    for size in args.sizes:
+        terms = base + synthetic_terms(max(0, size - len(base)))
+        start = time.perf_counter()
+        lexicon = Lexicon(terms)
+        build_s = time.perf_counter() - start
+        line = f"{len(lexicon):>8} {build_s:>7.2f}s {time_per_doc(lexicon.find, docs, args.repeat):>9.1f} us"
+        if args.regex:
+            alternation = "|".join(re.escape(t) for t, _, _ in sorted(terms, key=lambda t: -len(t[0])))
+            pattern = re.compile(rf"\b(?:{alternation})\b", re.IGNORECASE)
+            line += f" {time_per_doc(pattern.findall, docs, args.repeat):>9.1f} us"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# rescura/components.py
+import os
+import logging
+from typing import Any, Optional
+from utils.model_registry import ModelRegistry, model_registry, EMBEDDING_MODEL
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.getenv("RESCURA_CACHE_PATH", "data/cache/responses.sqlite3")
+CACHE_THRESHOLD = float(os.getenv("RESCURA_CACHE_THRESHOLD", "0.92"))
+CACHE_TTL = float(os.getenv("RESCURA_CACHE_TTL", str(24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv("RESCURA_CACHE_MAX_ENTRIES", "1000"))
+
+
+class _Component:
+    """Attribute that builds the registry's component of the same name on first access"""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, registry, owner=None):
+        return self if registry is None else registry.get(self.name)
+
+
+class ComponentRegistry(ModelRegistry):
+    """The retriever, agents and input processors, each built on first use.
+
+    Importing this module (or anything that only holds a registry) imports
+    none of langchain, FAISS, torch or whisper; each ``_build_*`` imports what
+    its component needs. ``warm_up()`` builds everything up front.
+    """
+
+    kind = "component"
+
+    retriever = _Component()
+    response_cache = _Component()
+    triage_agent = _Component()
+    treatment_agent = _Component()
+    resource_agent = _Component()
+    sessions = _Component()
+    conversation_agent = _Component()
+    fast_triage = _Component()
+    transcriber = _Component()
+    analyzer = _Component()
+    caption_batcher = _Component()
+    media_jobs = _Component()
+
+    def __init__(self, groq_api_key: Optional[str] = None, cache_path: Optional[str] = CACHE_PATH, models: ModelRegistry = model_registry):
+        super().__init__()
+        self.groq_api_key = groq_api_key
+        self.cache_path = cache_path
+        self.models = models
+        for name in dir(type(self)):
+            if isinstance(getattr(type(self), name), _Component):
+                self.register(name, getattr(self, f"_build_{name}"))
+
+    def provide(self, name: str, component: Any) -> None:
+        """Use a ready-made component (e.g. a test double) instead of building one"""
+        if name not in self._loaders:
+            raise KeyError(f"No component registered under '{name}'")
+        self._models[name] = component
+
+    @property
+    def api_key(self) -> Optional[str]:
+        # Read late so a .env loaded after import still applies
+        return self.groq_api_key or os.getenv("GROQ_API_KEY")
+
+    def _embeddings(self):
+        # Cache and fast triage share the retriever's model without loading the index
+        return self.models.embeddings(EMBEDDING_MODEL)
+
+    def _build_retriever(self):
+        from retrieval.retriever import RescuraRetriever
+        return RescuraRetriever(embeddings=self._embeddings())
+
+    def _build_response_cache(self):
+        from agents.semantic_cache import SemanticCache
+        return SemanticCache(
+            self._embeddings(),
+            threshold=CACHE_THRESHOLD,
+            ttl=CACHE_TTL,
+            max_entries=CACHE_MAX_ENTRIES,
+            path=self.cache_path
+        )
+
+    def _build_triage_agent(self):
+        from agents.triage_agent import TriageAgent
+        return TriageAgent(self.retriever, self.api_key, cache=self.response_cache)
+
+    def _build_treatment_agent(self):
+        from agents.treatment_agent import TreatmentAgent
+        return TreatmentAgent(self.retriever, self.api_key, cache=self.response_cache)
+
+    def _build_resource_agent(self):
+        from agents.resource_agent import ResourceAgent
+        return ResourceAgent(self.api_key)
+
+    def _build_sessions(self):
+        from agents.session import SessionStore, SESSION_PATH
+        # On disk by default, so follow-ups reach their case from any prefork worker
+        return SessionStore(path=SESSION_PATH or None)
+
+    def _build_conversation_agent(self):
+        from agents.conversation import ConversationAgent
+        return ConversationAgent(
+            self.api_key,
+            retriever=self.retriever,
+            store=self.sessions,
+            fast_triage=self.fast_triage
+        )
+
+    def _build_fast_triage(self):
+        from agents.fast_triage import FastTriage
+        return FastTriage(self._embeddings())
+
+    def _build_transcriber(self):
+        from input_processing.audio_transcriber import AudioTranscriber
+        return AudioTranscriber()
+
+    def _build_analyzer(self):
+        from input_processing.image_analyzer import ImageAnalyzer
+        return ImageAnalyzer()
+
+    def _build_caption_batcher(self):
+        # Captions from concurrent requests share batched forward passes
+        from input_processing.image_analyzer import CaptionBatcher
+        return CaptionBatcher(self.analyzer)
+
+    def _build_media_jobs(self):
+        # Worker processes holding Whisper and BLIP, outside the API process
+        from jobs.pool import JobPool
+        return JobPool()
+
+
+components = ComponentRegistry()
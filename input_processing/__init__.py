@@ -1,5 +1,18 @@
-from .audio_transcriber import AudioTranscriber
-from .image_analyzer import ImageAnalyzer
-from .text_processor import TextProcessor
+import importlib
 
-__all__ = ["AudioTranscriber", "ImageAnalyzer"]
\ No newline at end of file
+# Whisper, BLIP and Pillow load only when the class that needs them is used
+_EXPORTS = {
+    "AudioTranscriber": ".audio_transcriber",
+    "ImageAnalyzer": ".image_analyzer",
+    "TextProcessor": ".text_processor",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
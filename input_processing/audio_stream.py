@@ -0,0 +1,248 @@
+# rescura/input_processing/audio_stream.py
+import os
+import shutil
+import asyncio
+import logging
+import tempfile
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Iterator, List, Optional, Union
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000  # what Whisper expects
+BYTES_PER_SAMPLE = 2  # s16le PCM
+# Energy threshold for the fallback VAD, in dBFS
+VAD_THRESHOLD_DB = float(os.getenv("RESCURA_VAD_THRESHOLD_DB", "-40"))
+# Pause that closes a segment, and the longest segment before a forced cut
+VAD_MIN_SILENCE_MS = int(os.getenv("RESCURA_VAD_MIN_SILENCE_MS", "500"))
+VAD_MAX_SEGMENT_S = float(os.getenv("RESCURA_VAD_MAX_SEGMENT_S", "15"))
+
+
+@dataclass
+class PartialTranscript:
+    """Text of one voiced segment plus everything transcribed so far"""
+    text: str
+    transcript: str
+    start: float  # seconds into the audio
+    end: float
+    final: bool = False
+
+
+def _webrtc_vad(aggressiveness: int):
+    try:
+        import webrtcvad
+    except ImportError:
+        return None
+    return webrtcvad.Vad(aggressiveness)
+
+
+class VoiceActivitySegmenter:
+    """Cuts a 16 kHz mono PCM stream into voiced segments at pauses.
+
+    Uses webrtcvad when installed and an RMS energy gate otherwise. Segments
+    end after ``min_silence_ms`` of silence or at ``max_segment_s``, keep
+    ``pad_ms`` of context on either side, and blips shorter than
+    ``min_speech_ms`` are discarded.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = SAMPLE_RATE,
+        frame_ms: int = 30,
+        threshold_db: float = VAD_THRESHOLD_DB,
+        min_silence_ms: int = VAD_MIN_SILENCE_MS,
+        max_segment_s: float = VAD_MAX_SEGMENT_S,
+        min_speech_ms: int = 250,
+        pad_ms: int = 200,
+        aggressiveness: int = 2
+    ):
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.frame_ms = frame_ms
+        self.threshold_db = threshold_db
+        self.silence_frames = max(1, min_silence_ms // frame_ms)
+        self.max_frames = int(max_segment_s * 1000 / frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.pad_frames = pad_ms // frame_ms
+        self.vad = _webrtc_vad(aggressiveness)
+
+        self._buffer = b""
+        self._frames: List[np.ndarray] = []  # frames of the open segment
+        self._history: List[np.ndarray] = []  # recent unvoiced frames, for leading padding
+        self._voiced = 0
+        self._silence = 0
+        self._frame_index = 0
+        self._segment_start = 0
+
+    def is_speech(self, frame: np.ndarray, raw: bytes) -> bool:
+        if self.vad is not None:
+            return self.vad.is_speech(raw, self.sample_rate)
+        rms = np.sqrt(np.mean(np.square(frame, dtype=np.float64)))
+        return 20 * np.log10(rms + 1e-10) > self.threshold_db
+
+    def feed(self, pcm: bytes) -> List[tuple]:
+        """Add s16le PCM; returns finished segments as (start_seconds, float32 samples)"""
+        self._buffer += pcm
+        frame_bytes = self.frame_samples * BYTES_PER_SAMPLE
+        segments = []
+        while len(self._buffer) >= frame_bytes:
+            raw, self._buffer = self._buffer[:frame_bytes], self._buffer[frame_bytes:]
+            frame = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+            segment = self._step(frame, self.is_speech(frame, raw))
+            if segment is not None:
+                segments.append(segment)
+            self._frame_index += 1
+        return segments
+
+    def flush(self) -> Optional[tuple]:
+        """Close the open segment at end of stream"""
+        if self._voiced >= self.min_speech_frames:
+            return self._close(trailing_silence=self._silence)
+        self._reset()
+        return None
+
+    def _step(self, frame: np.ndarray, speech: bool):
+        if not self._frames:
+            if not speech:
+                self._history = (self._history + [frame])[-self.pad_frames:] if self.pad_frames else []
+                return None
+            self._segment_start = self._frame_index - len(self._history)
+            self._frames = self._history + [frame]
+            self._history = []
+            self._voiced, self._silence = 1, 0
+            return None
+
+        self._frames.append(frame)
+        if speech:
+            self._voiced += 1
+            self._silence = 0
+        else:
+            self._silence += 1
+
+        if self._silence >= self.silence_frames:
+            if self._voiced < self.min_speech_frames:
+                self._reset()
+                return None
+            return self._close(trailing_silence=self._silence)
+        if len(self._frames) >= self.max_frames:
+            return self._close(trailing_silence=0)
+        return None
+
+    def _close(self, trailing_silence: int) -> tuple:
+        # Keep pad_frames of the trailing pause, drop the rest
+        drop = max(0, trailing_silence - self.pad_frames)
+        frames = self._frames[:len(self._frames) - drop] if drop else self._frames
+        start = self._segment_start * self.frame_ms / 1000
+        self._reset()
+        return start, np.concatenate(frames)
+
+    def _reset(self) -> None:
+        self._frames, self._history = [], []
+        self._voiced = self._silence = 0
+
+
+def _prompt(transcript: str) -> Optional[str]:
+    # The tail of what was said keeps names and terms consistent across segments
+    return transcript[-200:] or None
+
+
+def stream_segments(
+    transcribe: Callable[[np.ndarray, Optional[str]], str],
+    pcm_chunks: Iterable[bytes],
+    segmenter: Optional[VoiceActivitySegmenter] = None
+) -> Iterator[PartialTranscript]:
+    """Transcribe each voiced segment as soon as the VAD closes it"""
+    segmenter = segmenter or VoiceActivitySegmenter()
+    transcript = ""
+
+    def emit(start, samples, final=False):
+        nonlocal transcript
+        text = transcribe(samples, _prompt(transcript)).strip()
+        transcript = f"{transcript} {text}".strip()
+        return PartialTranscript(text, transcript, start, start + len(samples) / segmenter.sample_rate, final)
+
+    for chunk in pcm_chunks:
+        for start, samples in segmenter.feed(chunk):
+            yield emit(start, samples)
+    tail = segmenter.flush()
+    if tail is not None:
+        yield emit(*tail, final=True)
+    else:
+        yield PartialTranscript("", transcript, 0.0, 0.0, final=True)
+
+
+async def astream_segments(
+    transcribe: Callable[[np.ndarray, Optional[str]], str],
+    pcm_chunks: AsyncIterator[bytes],
+    run: Callable[..., Awaitable],
+    segmenter: Optional[VoiceActivitySegmenter] = None
+) -> AsyncIterator[PartialTranscript]:
+    """Async ``stream_segments``; ``run(func, *args)`` executes the blocking model call"""
+    segmenter = segmenter or VoiceActivitySegmenter()
+    transcript = ""
+
+    async def emit(start, samples, final=False):
+        nonlocal transcript
+        text = (await run(transcribe, samples, _prompt(transcript))).strip()
+        transcript = f"{transcript} {text}".strip()
+        return PartialTranscript(text, transcript, start, start + len(samples) / segmenter.sample_rate, final)
+
+    async for chunk in pcm_chunks:
+        for start, samples in segmenter.feed(chunk):
+            yield await emit(start, samples)
+    tail = segmenter.flush()
+    if tail is not None:
+        yield await emit(*tail, final=True)
+    else:
+        yield PartialTranscript("", transcript, 0.0, 0.0, final=True)
+
+
+async def decode_pcm(
+    encoded: Union[str, os.PathLike, AsyncIterator[bytes]],
+    read_size: int = 32000
+) -> AsyncIterator[bytes]:
+    """Decode any ffmpeg-readable audio to 16 kHz mono s16le as it arrives.
+
+    A file path lets ffmpeg seek, which containers indexed at the end need
+    (MP4/M4A/MOV from phones); an async byte stream is piped through stdin
+    for audio that is still being received.
+    """
+    piped = not isinstance(encoded, (str, os.PathLike))
+    process = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-nostdin", "-loglevel", "error", "-i", "pipe:0" if piped else os.fspath(encoded),
+        "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1",
+        stdin=asyncio.subprocess.PIPE if piped else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE
+    )
+
+    async def feed():
+        if not piped:
+            return
+        try:
+            async for chunk in encoded:
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+        finally:
+            process.stdin.close()
+
+    feeder = asyncio.ensure_future(feed())
+    try:
+        while True:
+            pcm = await process.stdout.read(read_size)
+            if not pcm:
+                break
+            yield pcm
+        await feeder
+    finally:
+        feeder.cancel()
+        if process.returncode is None:
+            process.kill()
+        await process.wait()
+
+
+def save_upload(file, suffix: str = ".audio") -> str:
+    """Copy an open file (e.g. an UploadFile's spooled file) to a named temp file; the caller deletes it"""
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+        shutil.copyfileobj(file, f)
+    return f.name
@@ -1,19 +1,60 @@
-import whisper
-from typing import Optional
+import os
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Iterator, Optional
+import numpy as np
 from config.logger import setup_logging
+from utils.model_registry import model_registry
+from input_processing.audio_stream import PartialTranscript, VoiceActivitySegmenter, stream_segments, astream_segments
 import logging
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
+# "whisper" (openai-whisper) or "faster-whisper" (CTranslate2, int8 on CPU)
+ASR_ENGINE = os.getenv("RESCURA_ASR_ENGINE", "whisper")
+ASR_COMPUTE_TYPE = os.getenv("RESCURA_ASR_COMPUTE_TYPE", "int8")
+
 class AudioTranscriber:
-    def __init__(self, model_size="base"):
-        self.model = whisper.load_model(model_size)
-        
+    def __init__(self, model_size="base", engine: str = None, compute_type: str = None):
+        self.model_size = model_size
+        self.engine = engine or ASR_ENGINE
+        self.compute_type = compute_type or ASR_COMPUTE_TYPE
+
+    @property
+    def model(self):
+        # Shared across instances; loaded once per process
+        if self.engine == "faster-whisper":
+            return model_registry.faster_whisper(self.model_size, self.compute_type)
+        return model_registry.whisper(self.model_size)
+
+    def _run(self, audio, initial_prompt: Optional[str] = None) -> str:
+        """Transcribe a path or 16 kHz float32 samples with the selected engine"""
+        if self.engine == "faster-whisper":
+            segments, _ = self.model.transcribe(audio, initial_prompt=initial_prompt, beam_size=1)
+            return "".join(segment.text for segment in segments)
+        # fp16 is GPU-only; saying so skips whisper's per-call warning on CPU
+        model = self.model
+        return model.transcribe(audio, initial_prompt=initial_prompt, fp16=model.device.type != "cpu")["text"]
+
     def transcribe(self, audio_path: str) -> Optional[str]:
         try:
-            result = self.model.transcribe(audio_path)
-            return result["text"]
+            return self._run(audio_path)
         except Exception as e:
             logger.error(f"Transcription failed: {str(e)}")
             return None
+
+    def transcribe_samples(self, samples: np.ndarray, initial_prompt: Optional[str] = None) -> str:
+        """Transcribe one VAD segment of 16 kHz mono float32 audio"""
+        return self._run(samples, initial_prompt)
+
+    def stream(self, pcm_chunks: Iterable[bytes], segmenter: VoiceActivitySegmenter = None) -> Iterator[PartialTranscript]:
+        """Partial transcripts of a 16 kHz s16le PCM stream, one per voiced segment"""
+        return stream_segments(self.transcribe_samples, pcm_chunks, segmenter)
+
+    def astream(
+        self,
+        pcm_chunks: AsyncIterator[bytes],
+        run: Callable[..., Awaitable],
+        segmenter: VoiceActivitySegmenter = None
+    ) -> AsyncIterator[PartialTranscript]:
+        """Async ``stream``; ``run(func, *args)`` keeps model calls off the event loop"""
+        return astream_segments(self.transcribe_samples, pcm_chunks, run, segmenter)
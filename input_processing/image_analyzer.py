@@ -1,18 +1,185 @@
-from transformers import pipeline
-from typing import Optional
+import io
+import os
+import time
+import queue
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, List, Optional, Sequence
+import numpy as np
+from PIL import Image
 from config.logger import setup_logging
+from utils.model_registry import model_registry, BLIP_MODEL
 import logging
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
+# BLIP sees 384x384 anyway; resizing first saves decode and preprocessing time
+MAX_SIDE = int(os.getenv("RESCURA_IMAGE_MAX_SIDE", "384"))
+CAPTION_CACHE_SIZE = int(os.getenv("RESCURA_CAPTION_CACHE_SIZE", "512"))
+# Micro-batching of concurrent requests
+CAPTION_BATCH_SIZE = int(os.getenv("RESCURA_CAPTION_BATCH_SIZE", "8"))
+CAPTION_BATCH_WAIT_MS = float(os.getenv("RESCURA_CAPTION_BATCH_WAIT_MS", "20"))
+
+
+def load_image(source: Any) -> Image.Image:
+    """An RGB image from a path, bytes, file object or PIL image"""
+    if isinstance(source, Image.Image):
+        image = source
+    elif isinstance(source, (bytes, bytearray)):
+        image = Image.open(io.BytesIO(source))
+    else:
+        image = Image.open(source)
+    return image.convert("RGB")
+
+
+def downscale(image: Image.Image, max_side: int = MAX_SIDE) -> Image.Image:
+    if max(image.size) <= max_side:
+        return image
+    image = image.copy()
+    image.thumbnail((max_side, max_side), Image.BILINEAR)
+    return image
+
+
+def perceptual_hash(image: Image.Image, hash_size: int = 16, color_grid: int = 4) -> str:
+    """Difference hash plus a coarse colour grid: survives re-encoding and resizing, unlike a byte hash.
+
+    The difference hash is grayscale, so the colour grid keeps e.g. a red
+    rash and clear skin of the same shape apart.
+    """
+    gray = np.asarray(image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR), dtype=np.int16)
+    bits = (gray[:, :-1] > gray[:, 1:]).flatten()
+    # Mean colour per cell, 8 levels per channel
+    colors = np.asarray(image.resize((color_grid, color_grid), Image.BOX), dtype=np.uint8) >> 5
+    return np.packbits(bits).tobytes().hex() + colors.tobytes().hex()
+
+
 class ImageAnalyzer:
-    def __init__(self):
-        self.model = pipeline("image-to-text", model="Salesforce/blip-image-captioning-base")
-        
+    def __init__(self, model_name=BLIP_MODEL, max_side: int = MAX_SIDE, cache_size: int = CAPTION_CACHE_SIZE):
+        self.model_name = model_name
+        self.max_side = max_side
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    @property
+    def model(self):
+        # Shared across instances; loaded once per process
+        return model_registry.blip(self.model_name)
+
     def describe(self, image_path: str) -> Optional[str]:
+        return self.describe_many([image_path])[0]
+
+    def describe_many(self, images: Sequence[Any]) -> List[Optional[str]]:
+        """Caption several images with one batched forward pass; None where an image fails"""
+        captions: List[Optional[str]] = [None] * len(images)
+        waiting: "OrderedDict[str, List[int]]" = OrderedDict()  # hash -> positions, so duplicates run once
+        inputs = []
+        for i, source in enumerate(images):
+            try:
+                image = downscale(load_image(source), self.max_side)
+            except Exception as e:
+                logger.error(f"Image analysis failed: {str(e)}")
+                continue
+            key = perceptual_hash(image)
+            cached = self._cache_get(key)
+            if cached is not None:
+                captions[i] = cached
+            elif key in waiting:
+                waiting[key].append(i)
+            else:
+                waiting[key] = [i]
+                inputs.append(image)
+
+        if not inputs:
+            return captions
         try:
-            return self.model(image_path)[0]["generated_text"]
+            outputs = self.model(inputs, batch_size=len(inputs))
         except Exception as e:
             logger.error(f"Image analysis failed: {str(e)}")
-            return None
+            return captions
+
+        for (key, positions), output in zip(waiting.items(), outputs):
+            caption = output[0]["generated_text"]
+            self._cache_set(key, caption)
+            for i in positions:
+                captions[i] = caption
+        return captions
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        with self._cache_lock:
+            caption = self._cache.get(key)
+            if caption is not None:
+                self._cache.move_to_end(key)
+            return caption
+
+    def _cache_set(self, key: str, caption: str) -> None:
+        with self._cache_lock:
+            self._cache[key] = caption
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+
+class CaptionBatcher:
+    """Collects images from concurrent requests into micro-batches for ``describe_many``.
+
+    A request waits at most ``max_wait_ms`` for others to join its batch;
+    under load batches fill to ``max_batch`` and per-image cost drops.
+    """
+
+    def __init__(self, analyzer: ImageAnalyzer, max_batch: int = CAPTION_BATCH_SIZE, max_wait_ms: float = CAPTION_BATCH_WAIT_MS):
+        self.analyzer = analyzer
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="rescura-captioning", daemon=True)
+        self._worker.start()
+
+    def submit(self, image: Any) -> Future:
+        future: Future = Future()
+        self._queue.put((image, future))
+        return future
+
+    def describe(self, image: Any) -> Optional[str]:
+        return self.submit(image).result()
+
+    async def adescribe(self, image: Any) -> Optional[str]:
+        return await asyncio.wrap_future(self.submit(image))
+
+    def _collect(self) -> List[tuple]:
+        batch = [self._queue.get()]
+        until = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = until - time.monotonic()
+            try:
+                # Past the window, still take whatever is already queued
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self._run_batch(self._collect())
+            except Exception as e:
+                # This thread serves every request; it must outlive any one batch
+                logger.error(f"Caption batch failed: {str(e)}")
+
+    def _run_batch(self, batch: List[tuple]) -> None:
+        # A request cancelled while queued (client gone) needs no caption; the
+        # rest are marked running so a late cancel can't race set_result
+        batch = [(image, future) for image, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            captions = self.analyzer.describe_many([image for image, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), caption in zip(batch, captions):
+            future.set_result(caption)
@@ -0,0 +1,154 @@
+# rescura/input_processing/lexicon.py
+import os
+import csv
+import json
+import logging
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEXICON_PATH = Path(__file__).with_name("medical_lexicon.json")
+# A larger lexicon (e.g. a terminology export) replaces the bundled one
+LEXICON_PATH = os.getenv("RESCURA_LEXICON_PATH", str(DEFAULT_LEXICON_PATH))
+
+
+class Match(NamedTuple):
+    start: int
+    end: int
+    text: str  # as written in the input
+    canonical: str
+    category: str  # symptom, condition, drug or severity
+
+
+def normalize_term(term: str) -> str:
+    return " ".join(term.lower().split())
+
+
+class Lexicon:
+    """Medical terms and their synonyms compiled into an Aho-Corasick automaton.
+
+    Every term maps to a canonical name and a category. ``find`` scans the
+    text once, whatever the number of terms, and returns whole-word matches,
+    leftmost-longest and non-overlapping ("chest pain" over "pain").
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str, str]]):
+        self._entries: List[Tuple[str, str]] = []  # (canonical, category) per term
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[Tuple[int, int], ...]] = [()]  # (term length, entry) ending at a state
+        terms = {}
+        for term, canonical, category in entries:
+            term = normalize_term(term)
+            if not term:
+                continue
+            if term in terms:
+                if terms[term] != (canonical, category):
+                    logger.debug(f"Lexicon term {term!r} already maps to {terms[term]}; ignoring {canonical!r}")
+                continue
+            terms[term] = (canonical, category)
+        for term, entry in terms.items():
+            self._add(term, entry)
+        self._link()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Dict[str, List[str]]]) -> "Lexicon":
+        """From ``{category: {canonical: [synonyms]}}``; each canonical name matches itself"""
+        return cls(
+            (term, canonical, category)
+            for category, concepts in data.items()
+            for canonical, synonyms in concepts.items()
+            for term in [canonical, *synonyms]
+        )
+
+    @classmethod
+    def from_file(cls, path) -> "Lexicon":
+        """Load a JSON lexicon (see ``from_dict``) or a TSV of term, canonical, category rows"""
+        path = Path(path)
+        with open(path, encoding="utf-8") as f:
+            if path.suffix == ".json":
+                return cls.from_dict(json.load(f))
+            return cls(tuple(row[:3]) for row in csv.reader(f, delimiter="\t") if len(row) >= 3)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def find(self, text: str) -> List[Match]:
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # A few characters lowercase to two; keep offsets aligned with the input
+            lowered = "".join(c.lower()[0] for c in text)
+        goto, fail, out, entries = self._goto, self._fail, self._out, self._entries
+        size = len(lowered)
+        hits = []
+        state = 0
+        for i, ch in enumerate(lowered):
+            nxt = goto[state].get(ch)
+            while nxt is None and state:
+                state = fail[state]
+                nxt = goto[state].get(ch)
+            state = nxt or 0
+            if not out[state]:
+                continue
+            end = i + 1
+            if end < size and lowered[end].isalnum():
+                continue
+            for length, entry in out[state]:
+                start = end - length
+                if start and lowered[start - 1].isalnum():
+                    continue
+                hits.append((start, end, entry))
+
+        matches, last_end = [], 0
+        for start, end, entry in sorted(hits, key=lambda hit: (hit[0], -hit[1])):
+            if start >= last_end:
+                canonical, category = entries[entry]
+                matches.append(Match(start, end, text[start:end], canonical, category))
+                last_end = end
+        return matches
+
+    def _add(self, term: str, entry: Tuple[str, str]) -> None:
+        state = 0
+        for ch in term:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        self._out[state] += ((len(term), len(self._entries)),)
+        self._entries.append(entry)
+
+    def _link(self) -> None:
+        # Breadth-first, so a state's failure target is linked before the state itself
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                target = self._fail[state]
+                while target and ch not in self._goto[target]:
+                    target = self._fail[target]
+                target = self._goto[target].get(ch, 0)
+                self._fail[nxt] = target
+                # Terms ending at the failure target (suffixes of this one) end here too
+                self._out[nxt] += self._out[target]
+
+
+_default: Optional[Lexicon] = None
+_default_lock = threading.Lock()
+
+
+def default_lexicon() -> Lexicon:
+    """The lexicon at RESCURA_LEXICON_PATH, compiled once per process"""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Lexicon.from_file(LEXICON_PATH)
+            logger.info(f"Compiled medical lexicon: {len(_default)} terms")
+        return _default
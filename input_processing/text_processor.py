@@ -1,18 +1,30 @@
 # rescura/input_processing/text_processor.py
 import re
 import logging
-from typing import Dict, Optional, List
+from typing import Dict, Iterable, Optional, List
 from langdetect import detect, LangDetectException
 from utils.validation import sanitize_input 
+from input_processing.lexicon import Lexicon, default_lexicon
 
 logger = logging.getLogger(__name__)
 
+# Compiled at import rather than on every call
+DISALLOWED_CHARS = re.compile(r'[^a-zA-Z0-9\s.,!?\-%\']')
+WHITESPACE = re.compile(r'\s+')
+EMERGENCY_KEYWORDS = re.compile(r"\b(emergency|911|urgent|help|accident)\b", re.IGNORECASE)
+
+# Lexicon category -> key in extract_medical_entities' result
+ENTITY_KEYS = {
+    "condition": "medical_terms",
+    "symptom": "symptoms",
+    "drug": "drugs",
+    "severity": "severity_keywords",
+}
+
 class TextProcessor:
-    def __init__(self):
-        self.medical_terms = {
-            'fracture', 'bleeding', 'burn', 'allergy', 'cardiac',
-            'respiratory', 'trauma', 'poison', 'seizure', 'shock'
-        }
+    def __init__(self, lexicon: Optional[Lexicon] = None):
+        # Shared by every processor in the process unless one is passed in
+        self.lexicon = lexicon if lexicon is not None else default_lexicon()
 
     def clean_text(self, text: str) -> str:
         """Clean and normalize input text"""
@@ -21,10 +33,10 @@ class TextProcessor:
             cleaned = sanitize_input(text)
             
             # Remove special characters except medical relevant ones
-            cleaned = re.sub(r'[^a-zA-Z0-9\s.,!?\-%\']', '', cleaned)
+            cleaned = DISALLOWED_CHARS.sub('', cleaned)
             
             # Normalize whitespace
-            cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+            cleaned = WHITESPACE.sub(' ', cleaned).strip()
             
             return cleaned.lower()  # Case-insensitive processing
             
@@ -45,40 +57,23 @@ class TextProcessor:
         # In production, integrate with DeepL/Google Translate API
         return text  # Implement actual translation logic here
 
-    def extract_medical_entities(self, text: str) -> Dict[str, List[str]]:
-        """Extract medical-related terms from text"""
+    def extract_medical_entities(self, text: str) -> Dict[str, List]:
+        """Extract medical-related terms from text in one pass over the lexicon automaton"""
         try:
-            found_terms = []
-            symptoms = []
-            
-            # Simple pattern matching (expand with regex patterns)
-            symptom_pattern = r"(pain|swelling|nausea|dizziness|shortness of breath)"
-            matches = re.findall(symptom_pattern, text, re.IGNORECASE)
-            if matches:
-                symptoms.extend(matches)
-            
-            # Check against medical terms dictionary
-            tokens = set(text.lower().split())
-            found_terms = list(tokens & self.medical_terms)
-            
-            return {
-                "medical_terms": found_terms,
-                "symptoms": symptoms,
-                "severity_keywords": self._detect_severity(text)
-            }
+            entities = {key: [] for key in ENTITY_KEYS.values()}
+            spans = self.lexicon.find(text)
+            for match in spans:
+                # Categories outside ENTITY_KEYS (custom lexicons) get a key of their own
+                found = entities.setdefault(ENTITY_KEYS.get(match.category, match.category), [])
+                if match.canonical not in found:
+                    found.append(match.canonical)
+            entities["spans"] = [match._asdict() for match in spans]
+            return entities
             
         except Exception as e:
             logger.error(f"Entity extraction failed: {str(e)}")
             return {}
 
-    def _detect_severity(self, text: str) -> List[str]:
-        """Identify severity indicators in text"""
-        severity_words = {
-            'mild', 'moderate', 'severe', 'critical',
-            'emergency', 'urgent', 'extreme'
-        }
-        return [word for word in text.lower().split() if word in severity_words]
-
     def process(self, raw_text: str) -> Dict[str, any]:
         """Full text processing pipeline"""
         try:
@@ -89,13 +84,13 @@ class TextProcessor:
                 "language": self.detect_language(cleaned),
                 "entities": self.extract_medical_entities(cleaned),
                 "word_count": len(cleaned.split()),
-                "contains_emergency_keywords": bool(re.search(
-                    r"\b(emergency|911|urgent|help|accident)\b", 
-                    cleaned, 
-                    re.IGNORECASE
-                ))
+                "contains_emergency_keywords": bool(EMERGENCY_KEYWORDS.search(cleaned))
             }
             
         except Exception as e:
             logger.error(f"Text processing failed: {str(e)}")
             return {}
+
+    def process_many(self, raw_texts: Iterable[str]) -> List[Dict[str, any]]:
+        """``process`` over a batch, sharing the compiled lexicon and patterns"""
+        return [self.process(text) for text in raw_texts]
@@ -0,0 +1,14 @@
+# jobs/__init__.py
+from .broker import Broker, LocalBroker, register_broker, create_broker
+from .pool import Job, JobPool, JobFailed, QueueFull
+
+__all__ = [
+    "Broker",
+    "LocalBroker",
+    "register_broker",
+    "create_broker",
+    "Job",
+    "JobPool",
+    "JobFailed",
+    "QueueFull",
+]
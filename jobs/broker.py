@@ -0,0 +1,93 @@
+# rescura/jobs/broker.py
+import os
+import queue
+import multiprocessing
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# How worker processes start; "spawn" never inherits the API's threads or sockets
+START_METHOD = os.getenv("RESCURA_JOB_START_METHOD", "spawn")
+
+# (job_id, kind, payload) from the API to the workers
+JobMessage = Tuple[str, str, Any]
+# (event, job_id, value) back from the workers: "started" (pid), "done" (result) or "failed" (error)
+ResultMessage = Tuple[str, str, Any]
+
+
+class Broker(ABC):
+    """Carries jobs to worker processes and their results back.
+
+    A broker is handed to every worker process, so it must be picklable for
+    the chosen start method. ``LocalBroker`` keeps everything on this host;
+    another transport (e.g. Redis lists) implements the abstract methods.
+    """
+
+    @abstractmethod
+    def put_job(self, message: JobMessage) -> None:
+        ...
+
+    @abstractmethod
+    def get_job(self, timeout: Optional[float] = None) -> Optional[JobMessage]:
+        """Next job, or None if none arrived within ``timeout``"""
+
+    @abstractmethod
+    def put_result(self, message: ResultMessage) -> None:
+        ...
+
+    @abstractmethod
+    def get_result(self, timeout: Optional[float] = None) -> Optional[ResultMessage]:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class LocalBroker(Broker):
+    """A multiprocessing queue for jobs and a pipe for results, on this host"""
+
+    def __init__(self, context=None):
+        context = context or multiprocessing.get_context(START_METHOD)
+        self._jobs = context.Queue()
+        # Results go straight down a pipe, not through a Queue's feeder thread:
+        # a "started" must reach the pool even if the worker dies right after
+        self._results_reader, self._results_writer = context.Pipe(duplex=False)
+        self._results_lock = context.Lock()
+
+    def put_job(self, message: JobMessage) -> None:
+        self._jobs.put(message)
+
+    def get_job(self, timeout: Optional[float] = None) -> Optional[JobMessage]:
+        try:
+            return self._jobs.get(timeout=timeout) if timeout != 0 else self._jobs.get_nowait()
+        except queue.Empty:
+            return None
+
+    def put_result(self, message: ResultMessage) -> None:
+        with self._results_lock:
+            self._results_writer.send(message)
+
+    def get_result(self, timeout: Optional[float] = None) -> Optional[ResultMessage]:
+        # Only the pool's collector thread reads
+        if not self._results_reader.poll(timeout):
+            return None
+        return self._results_reader.recv()
+
+    def close(self) -> None:
+        self._jobs.close()
+        self._jobs.cancel_join_thread()
+        self._results_reader.close()
+        self._results_writer.close()
+
+
+BROKERS: Dict[str, Callable[..., Broker]] = {"local": LocalBroker}
+
+
+def register_broker(name: str, factory: Callable[..., Broker]) -> None:
+    BROKERS[name] = factory
+
+
+def create_broker(name: Optional[str] = None, **kwargs) -> Broker:
+    name = name or os.getenv("RESCURA_JOB_BROKER", "local")
+    if name not in BROKERS:
+        raise ValueError(f"Unknown job broker '{name}'; registered: {', '.join(BROKERS)}")
+    return BROKERS[name](**kwargs)
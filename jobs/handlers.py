@@ -0,0 +1,61 @@
+# rescura/jobs/handlers.py
+"""Job handlers run inside worker processes.
+
+Each takes a list of payloads (a batch of jobs of its kind) and returns one
+result per payload. Models are loaded through the worker's own model
+registry on first use, or up front by ``warm_up``.
+"""
+import os
+import tempfile
+import logging
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_transcriber = None
+_analyzer = None
+
+
+def _get_transcriber():
+    global _transcriber
+    if _transcriber is None:
+        from input_processing.audio_transcriber import AudioTranscriber
+        _transcriber = AudioTranscriber()
+    return _transcriber
+
+
+def _get_analyzer():
+    global _analyzer
+    if _analyzer is None:
+        from input_processing.image_analyzer import ImageAnalyzer
+        _analyzer = ImageAnalyzer()
+    return _analyzer
+
+
+def transcribe(payloads: List[Any]) -> List[Optional[str]]:
+    """Audio bytes (any format ffmpeg reads) or file paths to transcripts"""
+    results = []
+    for audio in payloads:
+        if isinstance(audio, (bytes, bytearray)):
+            # Whisper decodes through ffmpeg, which wants a file
+            with tempfile.NamedTemporaryFile(suffix=".audio", delete=False) as f:
+                f.write(audio)
+            try:
+                results.append(_get_transcriber().transcribe(f.name))
+            finally:
+                os.unlink(f.name)
+        else:
+            results.append(_get_transcriber().transcribe(audio))
+    return results
+
+
+def caption(payloads: List[Any]) -> List[Optional[str]]:
+    """Image bytes or paths to captions, in one batched forward pass"""
+    return _get_analyzer().describe_many(payloads)
+
+
+def warm_up(kinds: List[str]) -> None:
+    if "transcribe" in kinds:
+        _get_transcriber().model
+    if "caption" in kinds:
+        _get_analyzer().model
@@ -0,0 +1,306 @@
+# rescura/jobs/pool.py
+import os
+import time
+import uuid
+import asyncio
+import logging
+import importlib
+import threading
+import multiprocessing
+from collections import OrderedDict, Counter
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from jobs.broker import Broker, START_METHOD, create_broker
+from utils.model_registry import limit_threads
+
+logger = logging.getLogger(__name__)
+
+# torch threads per worker process, and workers (0: one per MEDIA_THREADS cores)
+MEDIA_THREADS = int(os.getenv("RESCURA_MEDIA_THREADS", "2"))
+MEDIA_WORKERS = int(os.getenv("RESCURA_MEDIA_WORKERS", "0"))
+# Queued jobs beyond this are rejected; finished jobs beyond MAX_JOBS are forgotten
+MAX_PENDING_JOBS = int(os.getenv("RESCURA_MAX_PENDING_JOBS", "256"))
+MAX_JOBS = int(os.getenv("RESCURA_MAX_JOBS", "1024"))
+
+DEFAULT_HANDLERS = {
+    "transcribe": "jobs.handlers:transcribe",
+    "caption": "jobs.handlers:caption",
+}
+# Jobs a worker takes at once; BLIP captions batch well, Whisper runs one file at a time
+DEFAULT_BATCH_SIZES = {"caption": int(os.getenv("RESCURA_CAPTION_BATCH_SIZE", "8"))}
+WORKER_POLL_INTERVAL = 1.0
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobFailed(RuntimeError):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: str = "queued"  # queued, running, done, failed
+    result: Any = None
+    error: Optional[str] = None
+    worker: Optional[int] = None  # pid of the worker running it
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    future: Future = field(default_factory=Future, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def to_dict(self) -> dict:
+        started = self.started_at or self.finished_at
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "queue_ms": round((started - self.created_at) * 1000, 1) if started else None,
+            "run_ms": round((self.finished_at - started) * 1000, 1) if self.finished_at and started else None,
+        }
+
+
+def _resolve(path: str) -> Callable:
+    module, _, name = path.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def worker_main(broker: Broker, handlers: Dict[str, str], threads: int, batch_sizes: Dict[str, int], warm_up: Optional[str]) -> None:
+    """Worker process: load the models once, then run jobs until a stop message"""
+    # Before torch is imported, so its thread pool is sized from the start
+    limit_threads(threads)
+    funcs = {kind: _resolve(path) for kind, path in handlers.items()}
+    if warm_up:
+        try:
+            _resolve(warm_up)(list(funcs))
+        except Exception as e:
+            logger.error(f"Job worker warm-up failed: {str(e)}")
+
+    pid = os.getpid()
+    stopping = False
+    while not stopping:
+        first = broker.get_job()
+        if first is None:
+            continue
+        if first[0] is None:
+            break
+        batch = [first]
+        while len(batch) < batch_sizes.get(first[1], 1):
+            message = broker.get_job(timeout=0)
+            if message is None:
+                break
+            if message[0] is None:
+                stopping = True
+                break
+            batch.append(message)
+
+        by_kind: Dict[str, List[tuple]] = OrderedDict()
+        for job_id, kind, payload in batch:
+            broker.put_result(("started", job_id, pid))
+            by_kind.setdefault(kind, []).append((job_id, payload))
+
+        for kind, jobs in by_kind.items():
+            if kind not in funcs:
+                for job_id, _ in jobs:
+                    broker.put_result(("failed", job_id, f"No handler for job kind '{kind}'"))
+                continue
+            try:
+                results = funcs[kind]([payload for _, payload in jobs])
+            except Exception as e:
+                logger.error(f"{kind} batch of {len(jobs)} failed: {str(e)}")
+                for job_id, _ in jobs:
+                    broker.put_result(("failed", job_id, str(e)))
+                continue
+            for (job_id, _), result in zip(jobs, results):
+                broker.put_result(("done", job_id, result))
+
+
+class JobPool:
+    """Runs transcription and captioning jobs on worker processes that hold the models.
+
+    Whisper and BLIP then run outside the API process, on a fixed number of
+    workers with ``threads`` torch threads each, so media throughput scales
+    with cores while the event loop and agent calls stay responsive.
+    ``submit`` returns a ``Job`` at once; poll ``get(job_id)`` or await
+    ``wait(job_id)``. Workers that die are replaced and their running jobs
+    marked failed.
+    """
+
+    def __init__(
+        self,
+        workers: int = MEDIA_WORKERS,
+        threads: int = MEDIA_THREADS,
+        handlers: Optional[Dict[str, str]] = None,
+        batch_sizes: Optional[Dict[str, int]] = None,
+        broker: Optional[Broker] = None,
+        warm_up: Optional[str] = "jobs.handlers:warm_up",
+        max_pending: int = MAX_PENDING_JOBS,
+        max_jobs: int = MAX_JOBS,
+        start_method: str = START_METHOD
+    ):
+        self.threads = max(1, threads)
+        self.workers = workers or max(1, (os.cpu_count() or 1) // self.threads)
+        self.handlers = handlers or dict(DEFAULT_HANDLERS)
+        self.batch_sizes = DEFAULT_BATCH_SIZES if batch_sizes is None else batch_sizes
+        self.context = multiprocessing.get_context(start_method)
+        self.broker = broker or create_broker(context=self.context)
+        self.warm_up = warm_up
+        self.max_pending = max_pending
+        self.max_jobs = max_jobs
+
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._processes: List[multiprocessing.Process] = []
+        self._closed = False
+        for _ in range(self.workers):
+            self._processes.append(self._start_worker())
+        self._collector = threading.Thread(target=self._collect, name="rescura-job-results", daemon=True)
+        self._collector.start()
+
+    def _start_worker(self) -> multiprocessing.Process:
+        process = self.context.Process(
+            target=worker_main,
+            args=(self.broker, self.handlers, self.threads, self.batch_sizes, self.warm_up),
+            name="rescura-job-worker",
+            daemon=True
+        )
+        process.start()
+        return process
+
+    def submit(self, kind: str, payload: Any) -> Job:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind '{kind}'")
+        job = Job(uuid.uuid4().hex, kind)
+        # The future belongs to the pool: awaiters going away must not cancel it
+        job.future.set_running_or_notify_cancel()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Job pool is shut down")
+            if sum(not j.finished for j in self.jobs.values()) >= self.max_pending:
+                raise QueueFull(f"{self.max_pending} jobs already pending")
+            self.jobs[job.id] = job
+            self._evict()
+        self.broker.put_job((job.id, kind, payload))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def result(self, job_id: str, timeout: Optional[float] = None) -> Any:
+        return self._job(job_id).future.result(timeout)
+
+    async def wait(self, job_id: str) -> Any:
+        """The job's result once a worker finishes it; raises JobFailed if it failed"""
+        return await asyncio.shield(asyncio.wrap_future(self._job(job_id).future))
+
+    async def run(self, kind: str, payload: Any) -> Any:
+        return await self.wait(self.submit(kind, payload).id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = Counter(job.status for job in self.jobs.values())
+        return {
+            "workers": self.workers,
+            "workers_alive": sum(p.is_alive() for p in self._processes),
+            "threads_per_worker": self.threads,
+            **{status: counts.get(status, 0) for status in ("queued", "running", "done", "failed")}
+        }
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        for _ in self._processes:
+            self.broker.put_job((None, None, None))
+        deadline = time.monotonic() + timeout
+        for process in self._processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+        self._collector.join(timeout)
+        self.broker.close()
+
+    def _job(self, job_id: str) -> Job:
+        job = self.get(job_id)
+        if job is None:
+            raise KeyError(f"Unknown or expired job id '{job_id}'")
+        return job
+
+    def _evict(self) -> None:
+        # Oldest finished jobs go first; pending ones are never dropped
+        excess = len(self.jobs) - self.max_jobs
+        for job_id in [j.id for j in self.jobs.values() if j.finished][:max(0, excess)]:
+            del self.jobs[job_id]
+
+    def _collect(self) -> None:
+        # Liveness is checked on a timer: under steady traffic results never stop arriving
+        next_check = time.monotonic() + WORKER_POLL_INTERVAL
+        while True:
+            try:
+                message = self.broker.get_result(timeout=max(0.0, next_check - time.monotonic()))
+                if message is not None:
+                    self._record(*message)
+                elif self._closed:
+                    return
+                if time.monotonic() >= next_check:
+                    self._replace_dead_workers()
+                    next_check = time.monotonic() + WORKER_POLL_INTERVAL
+            except Exception as e:
+                # The only thread finishing jobs and replacing workers; keep it running
+                logger.error(f"Job result collection failed: {str(e)}")
+
+    def _record(self, event: str, job_id: str, value: Any) -> None:
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.finished:
+                return
+            if event == "started":
+                job.status, job.worker, job.started_at = "running", value, time.time()
+                return
+            job.finished_at = time.time()
+            if event == "done":
+                job.status, job.result = "done", value
+            else:
+                job.status, job.error = "failed", value
+        self._resolve(job)
+
+    def _resolve(self, job: Job) -> None:
+        if job.future.done():
+            return
+        if job.status == "done":
+            job.future.set_result(job.result)
+        else:
+            job.future.set_exception(JobFailed(job.error))
+
+    def _replace_dead_workers(self) -> None:
+        drained = False
+        for i, process in enumerate(self._processes):
+            if process.is_alive() or self._closed:
+                continue
+            if not drained:
+                # What a worker sent before dying is already waiting; record it before failing its jobs
+                message = self.broker.get_result(timeout=0)
+                while message is not None:
+                    self._record(*message)
+                    message = self.broker.get_result(timeout=0)
+                drained = True
+            logger.warning(f"Job worker {process.pid} exited with code {process.exitcode}; restarting")
+            with self._lock:
+                lost = [j for j in self.jobs.values() if j.status == "running" and j.worker == process.pid]
+                for job in lost:
+                    job.status, job.error, job.finished_at = "failed", "Worker process exited", time.time()
+            for job in lost:
+                self._resolve(job)
+            self._processes[i] = self._start_worker()
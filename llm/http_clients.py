@@ -0,0 +1,53 @@
+# rescura/llm/http_clients.py
+import asyncio
+import threading
+import weakref
+from typing import Optional, Tuple
+import httpx
+
+# Keep-alive pool shared by every Groq client in the process (agents and wrapper)
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30)
+
+
+class LoopLocalTransport(httpx.AsyncBaseTransport):
+    """One async connection pool per event loop.
+
+    Pooled connections belong to the loop that opened them, so a client
+    reused from a new loop (``asyncio.run`` in batch_triage and the tests)
+    must not see them. The pool of a loop goes away with the loop.
+    """
+
+    def __init__(self, limits: httpx.Limits = HTTP_LIMITS):
+        self.limits = limits
+        self._transports: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def for_loop(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transport = self._transports.get(loop)
+            if transport is None:
+                transport = self._transports[loop] = httpx.AsyncHTTPTransport(limits=self.limits)
+            return transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self.for_loop().handle_async_request(request)
+
+    async def aclose(self) -> None:
+        with self._lock:
+            transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
+
+_clients: Optional[Tuple[httpx.Client, httpx.AsyncClient]] = None
+_lock = threading.Lock()
+
+
+def get_http_clients() -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """Process-wide pooled sync and async HTTP clients; the async pool is kept per event loop"""
+    global _clients
+    with _lock:
+        if _clients is None:
+            _clients = (httpx.Client(limits=HTTP_LIMITS), httpx.AsyncClient(transport=LoopLocalTransport()))
+        return _clients
@@ -2,14 +2,17 @@
 import os
 import time
 import logging
-from typing import Any, Dict, List, Optional, Iterator
+import threading
+from typing import Any, AsyncIterator, Dict, List, Optional, Iterator, Tuple
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import BaseMessage, AIMessageChunk
 from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
-from langchain_core.callbacks import CallbackManagerForLLMRun
-from groq import Groq
-import tenacity
+from langchain_core.callbacks import CallbackManagerForLLMRun, AsyncCallbackManagerForLLMRun
+from groq import Groq, AsyncGroq
 from dotenv import load_dotenv
+from llm.retry import RetryPolicy
+from llm.http_clients import get_http_clients
+from llm.scheduler import ScheduledModelMixin, PRIORITY_DEFAULT, usage_tokens
 
 load_dotenv()
 
@@ -17,27 +20,55 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class LangChainLlama3Wrapper(BaseChatModel):
+# Groq clients per API key, all on the shared connection pool
+_clients: Dict[str, Tuple[Groq, AsyncGroq]] = {}
+_clients_lock = threading.Lock()
+
+def get_clients(api_key: str) -> Tuple[Groq, AsyncGroq]:
+    """Shared sync/async Groq clients; retries are ours, so the SDK's are disabled"""
+    with _clients_lock:
+        if api_key not in _clients:
+            http_client, http_async_client = get_http_clients()
+            _clients[api_key] = (
+                Groq(api_key=api_key, max_retries=0, http_client=http_client),
+                AsyncGroq(api_key=api_key, max_retries=0, http_client=http_async_client),
+            )
+        return _clients[api_key]
+
+class LangChainLlama3Wrapper(ScheduledModelMixin, BaseChatModel):
     """LangChain-compatible wrapper for Groq's Llama3 API"""
     
     client: Groq = None
+    async_client: AsyncGroq = None
     model_name: str = "llama3-70b-8192"
     temperature: float = 0.7
     max_tokens: int = 1024
+    max_attempts: int = 3
+    deadline: float = 30.0  # seconds for a whole call, retries included
+    priority: int = PRIORITY_DEFAULT
+    scheduler: Any = None  # defaults to the process-wide llm.scheduler.scheduler
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         api_key = os.getenv("GROQ_API_KEY")
         if not api_key:
             raise ValueError("GROQ_API_KEY environment variable not set")
-        self.client = Groq(api_key=api_key)
-
-    @tenacity.retry(
-        stop=tenacity.stop_after_attempt(3),
-        wait=tenacity.wait_exponential(multiplier=1, min=4, max=10),
-        retry=tenacity.retry_if_exception_type(Exception),
-        before_sleep=tenacity.before_sleep_log(logger, logging.WARNING),
-    )
+        self.client, self.async_client = get_clients(api_key)
+
+    @property
+    def retry_policy(self) -> RetryPolicy:
+        return RetryPolicy(max_attempts=self.max_attempts, deadline=self.deadline)
+
+    def _request(self, messages: List[BaseMessage], stop: Optional[List[str]], **kwargs: Any) -> dict:
+        return dict(
+            model=self.model_name,
+            messages=[self._convert_message(m) for m in messages],
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            stop=stop,
+            **kwargs
+        )
+
     def _generate(
         self,
         messages: List[BaseMessage],
@@ -46,18 +77,39 @@ class LangChainLlama3Wrapper(BaseChatModel):
         **kwargs: Any,
     ) -> ChatResult:
         """Main method to generate chat completion"""
-        formatted_messages = [self._convert_message(m) for m in messages]
-        
-        response = self.client.chat.completions.create(
-            model=self.model_name,
-            messages=formatted_messages,
-            temperature=self.temperature,
-            max_tokens=self.max_tokens,
-            stop=stop,
-            **kwargs
-        )
-        
-        return self._create_chat_result(response)
+        request = self._request(messages, stop, **kwargs)
+        ticket = self._acquire(messages)
+        actual = 0  # failed calls refund their estimate
+        try:
+            response = self.retry_policy.call(
+                lambda remaining: self.client.chat.completions.create(**request, timeout=remaining)
+            )
+            result = self._create_chat_result(response)
+            actual = usage_tokens(result.llm_output)
+            return result
+        finally:
+            self._complete(ticket, actual)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """Native async generation on the pooled async client"""
+        request = self._request(messages, stop, **kwargs)
+        ticket = await self._aacquire(messages)
+        actual = 0
+        try:
+            response = await self.retry_policy.acall(
+                lambda remaining: self.async_client.chat.completions.create(**request, timeout=remaining)
+            )
+            result = self._create_chat_result(response)
+            actual = usage_tokens(result.llm_output)
+            return result
+        finally:
+            self._complete(ticket, actual)
 
     def _convert_message(self, message: BaseMessage) -> dict:
         """Convert LangChain message to Groq format"""
@@ -100,23 +152,48 @@ class LangChainLlama3Wrapper(BaseChatModel):
         **kwargs: Any,
     ) -> Iterator[ChatGenerationChunk]:
         """Streaming implementation"""
-        formatted_messages = [self._convert_message(m) for m in messages]
-        
-        response = self.client.chat.completions.create(
-            model=self.model_name,
-            messages=formatted_messages,
-            temperature=self.temperature,
-            max_tokens=self.max_tokens,
-            stop=stop,
-            stream=True,
-            **kwargs
-        )
-        
-        for chunk in response:
-            content = chunk.choices[0].delta.content or ""
-            yield ChatGenerationChunk(message=AIMessageChunk(content=content))
-            if run_manager:
-                run_manager.on_llm_new_token(content)
+        request = self._request(messages, stop, stream=True, **kwargs)
+        ticket = self._acquire(messages)
+        actual = None  # streamed responses carry no usage; keep the estimate
+        try:
+            # Only opening the stream is retried; a stream that fails midway is not replayed
+            response = self.retry_policy.call(
+                lambda remaining: self.client.chat.completions.create(**request, timeout=remaining)
+            )
+
+            for chunk in response:
+                content = chunk.choices[0].delta.content or ""
+                generation = ChatGenerationChunk(message=AIMessageChunk(content=content))
+                # Notify callbacks first so astream_events consumers see tokens immediately
+                if run_manager:
+                    run_manager.on_llm_new_token(content, chunk=generation)
+                yield generation
+        finally:
+            self._complete(ticket, actual)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        """Native async streaming on the pooled async client"""
+        request = self._request(messages, stop, stream=True, **kwargs)
+        ticket = await self._aacquire(messages)
+        try:
+            response = await self.retry_policy.acall(
+                lambda remaining: self.async_client.chat.completions.create(**request, timeout=remaining)
+            )
+
+            async for chunk in response:
+                content = chunk.choices[0].delta.content or ""
+                generation = ChatGenerationChunk(message=AIMessageChunk(content=content))
+                if run_manager:
+                    await run_manager.on_llm_new_token(content, chunk=generation)
+                yield generation
+        finally:
+            self._complete(ticket, None)
 
 # Example usage
 if __name__ == "__main__":
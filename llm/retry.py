@@ -0,0 +1,166 @@
+# rescura/llm/retry.py
+import time
+import random
+import asyncio
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, TypeVar
+import httpx
+import groq
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(TimeoutError):
+    """The per-call deadline ran out before a successful attempt"""
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Only rate limits, server errors and transport failures are worth retrying"""
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return isinstance(exc, (groq.APIConnectionError, httpx.TransportError, ConnectionError, TimeoutError))
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait, from Retry-After(-ms) headers"""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryBudget:
+    """Caps retries to a fraction of traffic so provider outages don't snowball.
+
+    Every first attempt deposits ``ratio`` tokens (up to ``max_tokens``); every
+    retry withdraws one. ``min_per_second`` keeps a trickle of retries
+    available when traffic is low.
+    """
+
+    def __init__(self, ratio: float = 0.1, min_per_second: float = 1.0, max_tokens: float = 20.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.max_tokens, self._tokens + (now - self._last) * self.min_per_second)
+        self._last = now
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+# Shared by every LLM client in the process
+retry_budget = RetryBudget()
+
+
+class RetryPolicy:
+    """Classified retries with backoff, Retry-After, a global budget and a deadline.
+
+    The wrapped call receives the remaining time in seconds so each attempt's
+    HTTP timeout never outlives the overall deadline.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        deadline: float = 30.0,
+        budget: Optional[RetryBudget] = None
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.budget = budget or retry_budget
+
+    def _next_delay(self, exc: BaseException, attempt: int, remaining: float) -> Optional[float]:
+        """Delay before the next attempt, or None to give up and re-raise"""
+        if attempt >= self.max_attempts or not is_retryable(exc):
+            return None
+
+        delay = retry_after(exc)
+        if delay is None:
+            delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+            delay *= random.uniform(0.5, 1.0)
+        if delay >= remaining:
+            logger.warning(f"Not retrying: wait of {delay:.1f}s exceeds remaining deadline")
+            return None
+        if not self.budget.try_spend():
+            logger.warning("Not retrying: retry budget exhausted")
+            return None
+
+        logger.warning(f"Attempt {attempt} failed ({exc.__class__.__name__}), retrying in {delay:.2f}s")
+        return delay
+
+    def call(self, func: Callable[[float], T]) -> T:
+        start = time.monotonic()
+        self.budget.record_request()
+        attempt = 0
+        while True:
+            attempt += 1
+            remaining = self.deadline - (time.monotonic() - start)
+            if remaining <= 0:
+                raise DeadlineExceeded(f"LLM call exceeded {self.deadline}s deadline")
+            try:
+                return func(remaining)
+            except Exception as exc:
+                delay = self._next_delay(exc, attempt, self.deadline - (time.monotonic() - start))
+                if delay is None:
+                    raise
+                time.sleep(delay)
+
+    async def acall(self, func: Callable[[float], Awaitable[T]]) -> T:
+        start = time.monotonic()
+        self.budget.record_request()
+        attempt = 0
+        while True:
+            attempt += 1
+            remaining = self.deadline - (time.monotonic() - start)
+            if remaining <= 0:
+                raise DeadlineExceeded(f"LLM call exceeded {self.deadline}s deadline")
+            try:
+                return await func(remaining)
+            except Exception as exc:
+                delay = self._next_delay(exc, attempt, self.deadline - (time.monotonic() - start))
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
@@ -0,0 +1,184 @@
+# rescura/llm/router.py
+import os
+import time
+import logging
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+from input_processing.text_processor import TextProcessor
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+ROUTE_SMALL = "small"
+ROUTE_LARGE = "large"
+MODELS = {
+    ROUTE_SMALL: os.getenv("RESCURA_SMALL_MODEL", "llama3-8b-8192"),
+    ROUTE_LARGE: os.getenv("RESCURA_LARGE_MODEL", "llama3-70b-8192"),
+}
+
+# keywords: TextProcessor red flags, 70b when severe or ambiguous
+# confidence: 8b first, re-run on 70b when its answer is severe or unsure
+# small / large: pin one model
+POLICIES = ("keywords", "confidence", ROUTE_SMALL, ROUTE_LARGE)
+
+RED_FLAG_WORDS = {'severe', 'critical', 'emergency', 'urgent', 'extreme'}
+RED_FLAG_TERMS = {'bleeding', 'cardiac', 'respiratory', 'poison', 'seizure', 'shock', 'trauma',
+                  'anaphylaxis', 'stroke', 'drowning', 'electrical injury'}
+# Canonical lexicon symptoms that need the large model whatever else the text says
+RED_FLAG_SYMPTOMS = {'not breathing', 'chest pain', 'shortness of breath', 'unresponsive', 'loss of consciousness',
+                     'cyanosis', 'vomiting blood', 'slurred speech', 'facial droop', 'seizure activity', 'choking'}
+MILD_WORDS = {'mild', 'moderate'}
+
+
+def policy_for(agent: str, default: str) -> str:
+    """Routing policy for an agent, overridable with RESCURA_ROUTE_<AGENT>"""
+    policy = os.getenv(f"RESCURA_ROUTE_{agent.upper()}", default).lower()
+    if policy not in POLICIES:
+        logger.warning(f"Unknown routing policy {policy!r} for {agent}, using {default}")
+        return default
+    return policy
+
+
+class RouteStats:
+    """Per agent and route: call count, latency percentiles and tokens"""
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._lock = threading.Lock()
+        self._latencies = defaultdict(lambda: deque(maxlen=self.window))
+        self._counts = defaultdict(lambda: {"calls": 0, "tokens": 0, "escalations": 0})
+
+    def record(self, agent: str, route: str, seconds: float, tokens: int = 0, escalated: bool = False) -> None:
+        key = (agent, route)
+        with self._lock:
+            self._latencies[key].append(seconds)
+            counts = self._counts[key]
+            counts["calls"] += 1
+            counts["tokens"] += tokens
+            counts["escalations"] += int(escalated)
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        result: Dict[str, Dict[str, Dict[str, Any]]] = defaultdict(dict)
+        with self._lock:
+            for (agent, route), counts in self._counts.items():
+                latencies = sorted(self._latencies[(agent, route)])
+                result[agent][route] = {
+                    **counts,
+                    "model": MODELS[route],
+                    "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+                    "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 1),
+                }
+        return dict(result)
+
+
+# Shared by every agent in the process
+route_stats = RouteStats()
+
+
+class ModelRouter:
+    """Picks llama3-8b or llama3-70b per call so only hard cases pay for 70b.
+
+    Severe or ambiguous cases always reach the large model; the small model
+    only answers when the text (or its own answer) says the case is mild.
+    """
+
+    def __init__(
+        self,
+        agent: str,
+        policy: Optional[str] = None,
+        default_policy: str = "keywords",
+        escalate_at: int = 3,
+        min_confidence: float = 0.6,
+        text_processor: Optional[TextProcessor] = None,
+        stats: Optional[RouteStats] = None
+    ):
+        self.agent = agent
+        self.policy = policy or policy_for(agent, default_policy)
+        self.escalate_at = escalate_at
+        self.min_confidence = min_confidence
+        self.text_processor = text_processor or TextProcessor()
+        self.stats = stats or route_stats
+
+    def pre_route(self, text: str, severity: Optional[int] = None) -> Optional[str]:
+        """Route from the input alone; None when the text gives no clear signal"""
+        if self.policy in (ROUTE_SMALL, ROUTE_LARGE):
+            return self.policy
+        if severity is not None:
+            return ROUTE_LARGE if severity >= self.escalate_at else ROUTE_SMALL
+
+        entities = self.text_processor.extract_medical_entities(text)
+        severity_words = set(entities.get("severity_keywords", []))
+        # Checked before the mild words: "mild chest pain, not breathing" is not a mild case
+        if (severity_words & RED_FLAG_WORDS
+                or set(entities.get("medical_terms", [])) & RED_FLAG_TERMS
+                or set(entities.get("symptoms", [])) & RED_FLAG_SYMPTOMS):
+            return ROUTE_LARGE
+        if severity_words & MILD_WORDS:
+            return ROUTE_SMALL
+        return None
+
+    def choose(self, text: str, severity: Optional[int] = None) -> str:
+        """Single-pass route, for callers that cannot re-run (e.g. streaming)"""
+        return self.pre_route(text, severity) or ROUTE_LARGE
+
+    def needs_escalation(self, result: Any) -> bool:
+        """Whether a small-model answer is too severe or unsure to keep"""
+        if isinstance(result, str):
+            # Free-text answers (treatment plans) carry no severity or confidence to check
+            return not result.strip()
+        if hasattr(result, "model_dump"):
+            result = result.model_dump()
+        if not isinstance(result, dict) or "error" in result:
+            return True
+        severity = result.get("severity")
+        if not isinstance(severity, int) or severity >= self.escalate_at:
+            return True
+        try:
+            return float(result.get("confidence", 1.0)) < self.min_confidence
+        except (TypeError, ValueError):
+            return True
+
+    @contextmanager
+    def track(self, route: str, escalated: bool = False):
+        """Record latency and LLM tokens of the calls made inside the block"""
+        # langchain_core.callbacks drags in langsmith; keep it off the import path of route_stats
+        from langchain_core.callbacks import get_usage_metadata_callback
+
+        start = time.perf_counter()
+        with get_usage_metadata_callback() as usage:
+            try:
+                yield
+            finally:
+                tokens = sum(u.get("total_tokens", 0) for u in usage.usage_metadata.values())
+                self.stats.record(self.agent, route, time.perf_counter() - start, tokens, escalated)
+
+    def _first_route(self, text: str, severity: Optional[int]) -> str:
+        route = self.pre_route(text, severity)
+        if route is None:
+            # Ambiguous: the confidence policy lets 8b try first, keywords goes straight to 70b
+            route = ROUTE_SMALL if self.policy == "confidence" else ROUTE_LARGE
+        return route
+
+    def invoke(self, text: str, call: Callable[[str], T], severity: Optional[int] = None) -> T:
+        """Run ``call(route)``, escalating to the large model if the confidence policy asks for it"""
+        route = self._first_route(text, severity)
+        with self.track(route):
+            result = call(route)
+        if route == ROUTE_SMALL and self.policy == "confidence" and self.needs_escalation(result):
+            logger.info(f"{self.agent}: escalating to {MODELS[ROUTE_LARGE]}")
+            with self.track(ROUTE_LARGE, escalated=True):
+                result = call(ROUTE_LARGE)
+        return result
+
+    async def ainvoke(self, text: str, call: Callable[[str], Awaitable[T]], severity: Optional[int] = None) -> T:
+        route = self._first_route(text, severity)
+        with self.track(route):
+            result = await call(route)
+        if route == ROUTE_SMALL and self.policy == "confidence" and self.needs_escalation(result):
+            logger.info(f"{self.agent}: escalating to {MODELS[ROUTE_LARGE]}")
+            with self.track(ROUTE_LARGE, escalated=True):
+                result = await call(ROUTE_LARGE)
+        return result
@@ -0,0 +1,108 @@
+# rescura/llm/scheduled_chat.py
+from typing import Any, AsyncIterator, Iterator, List, Optional
+from langchain_core.language_models.chat_models import agenerate_from_stream, generate_from_stream
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_groq import ChatGroq
+from llm.retry import RetryPolicy
+from llm.scheduler import ScheduledModelMixin, PRIORITY_DEFAULT, usage_tokens
+
+
+class ScheduledChatGroq(ScheduledModelMixin, ChatGroq):
+    """ChatGroq whose calls wait for rate-limit capacity in priority order.
+
+    Retries go through ``RetryPolicy`` (classified errors, the process-wide
+    retry budget and a per-call deadline) instead of the SDK's own, so
+    ``max_retries`` defaults to 0.
+    """
+
+    priority: int = PRIORITY_DEFAULT
+    scheduler: Any = None
+    max_retries: int = 0
+    max_attempts: int = 3
+    deadline: float = 30.0  # seconds for a whole call, retries included
+
+    @property
+    def retry_policy(self) -> RetryPolicy:
+        return RetryPolicy(max_attempts=self.max_attempts, deadline=self.deadline)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.streaming:
+            # Scheduled and retried in _stream
+            return generate_from_stream(self._stream(messages, stop=stop, run_manager=run_manager, **kwargs))
+        generate = super()._generate
+        ticket = self._acquire(messages)
+        actual = 0  # failed calls refund their estimate
+        try:
+            result = self.retry_policy.call(
+                lambda remaining: generate(messages, stop=stop, run_manager=run_manager, timeout=remaining, **kwargs)
+            )
+            actual = usage_tokens(result.llm_output)
+            return result
+        finally:
+            self._complete(ticket, actual)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.streaming:
+            return await agenerate_from_stream(self._astream(messages, stop=stop, run_manager=run_manager, **kwargs))
+        agenerate = super()._agenerate
+        ticket = await self._aacquire(messages)
+        actual = 0
+        try:
+            result = await self.retry_policy.acall(
+                lambda remaining: agenerate(messages, stop=stop, run_manager=run_manager, timeout=remaining, **kwargs)
+            )
+            actual = usage_tokens(result.llm_output)
+            return result
+        finally:
+            self._complete(ticket, actual)
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        stream = super()._stream
+
+        def open_stream(remaining):
+            # Retried until the first chunk arrives; a stream that fails midway is not replayed
+            chunks = stream(messages, stop=stop, run_manager=run_manager, timeout=remaining, **kwargs)
+            return chunks, next(chunks, None)
+
+        ticket = self._acquire(messages)
+        actual = None
+        try:
+            chunks, first = self.retry_policy.call(open_stream)
+            if first is None:
+                return
+            actual = self._chunk_tokens(first) or actual
+            yield first
+            for chunk in chunks:
+                actual = self._chunk_tokens(chunk) or actual
+                yield chunk
+        finally:
+            self._complete(ticket, actual)
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        astream = super()._astream
+
+        async def open_stream(remaining):
+            chunks = astream(messages, stop=stop, run_manager=run_manager, timeout=remaining, **kwargs)
+            try:
+                return chunks, await chunks.__anext__()
+            except StopAsyncIteration:
+                return chunks, None
+
+        ticket = await self._aacquire(messages)
+        actual = None
+        try:
+            chunks, first = await self.retry_policy.acall(open_stream)
+            if first is None:
+                return
+            actual = self._chunk_tokens(first) or actual
+            yield first
+            async for chunk in chunks:
+                actual = self._chunk_tokens(chunk) or actual
+                yield chunk
+        finally:
+            self._complete(ticket, actual)
@@ -0,0 +1,276 @@
+# rescura/llm/scheduler.py
+import os
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first
+PRIORITY_CRITICAL = 0    # severity-5 cases
+PRIORITY_TRIAGE = 2
+PRIORITY_TREATMENT = 3
+PRIORITY_DEFAULT = 5
+PRIORITY_BACKGROUND = 8  # prevention tips, resource lookups, batch jobs
+
+_priority: contextvars.ContextVar = contextvars.ContextVar("rescura_llm_priority", default=None)
+
+
+@contextmanager
+def scheduling_priority(priority: int):
+    """Override the priority of LLM calls made in this context"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority(default: int = PRIORITY_DEFAULT) -> int:
+    priority = _priority.get()
+    return default if priority is None else priority
+
+
+def priority_for_severity(severity: int) -> int:
+    """Severity 5 pre-empts everything; milder cases fall back toward default"""
+    if severity >= 5:
+        return PRIORITY_CRITICAL
+    if severity >= 3:
+        return PRIORITY_TRIAGE
+    return PRIORITY_DEFAULT
+
+
+class TokenBucket:
+    """Refills ``per_minute`` units per minute up to ``capacity``"""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None, clock=time.monotonic):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` units are available (0 if they are now)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, delta: float) -> None:
+        """Correct a previous estimate: positive delta charges more, negative refunds"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+@dataclass
+class Ticket:
+    """Admission for one LLM call; hand it back to ``complete``"""
+    estimated_tokens: int
+    priority: int
+    queued_for: float = 0.0
+
+
+class RequestScheduler:
+    """Admits LLM calls under requests/min and tokens/min limits, by priority.
+
+    Waiting calls form a priority queue; only the head may take capacity, so
+    a severity-5 triage call queued after a prevention tip still goes first.
+    Token estimates are charged up front and corrected with the ``usage``
+    the provider reports once the call completes.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, clock=time.monotonic):
+        self.requests = TokenBucket(requests_per_minute, clock=clock)
+        self.tokens = TokenBucket(tokens_per_minute, clock=clock)
+        self.clock = clock
+        self._queue = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        # Async waiters by entry sequence number: (their loop, an event that wakes them)
+        self._waiters: Dict[int, Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = {}
+        self.counters: Dict[str, float] = {"admitted": 0, "estimated_tokens": 0, "actual_tokens": 0, "wait_seconds": 0.0}
+
+    def _try_admit(self, entry) -> Optional[float]:
+        """Admit ``entry`` if it heads the queue and capacity allows.
+
+        Otherwise returns the seconds until the buckets allow it, or None if
+        another entry is ahead and only a wake-up can change that.
+        """
+        if self._queue[0] is not entry:
+            return None
+        wait = max(self.requests.wait_time(1), self.tokens.wait_time(entry[2]))
+        if wait > 0:
+            return wait
+        heapq.heappop(self._queue)
+        self.requests.consume(1)
+        self.tokens.consume(entry[2])
+        self._wake()
+        return 0.0
+
+    def _wake(self) -> None:
+        """The head or the capacity changed: wake thread waiters and the async head"""
+        self._cond.notify_all()
+        if self._queue:
+            waiter = self._waiters.get(self._queue[0][1])
+            if waiter is not None:
+                loop, event = waiter
+                loop.call_soon_threadsafe(event.set)
+
+    def _enqueue(self, estimated_tokens: int, priority: Optional[int]):
+        priority = current_priority() if priority is None else priority
+        entry = (priority, next(self._counter), estimated_tokens)
+        heapq.heappush(self._queue, entry)
+        return entry
+
+    def _admitted(self, entry, start: float) -> Ticket:
+        waited = self.clock() - start
+        self.counters["admitted"] += 1
+        self.counters["estimated_tokens"] += entry[2]
+        self.counters["wait_seconds"] += waited
+        return Ticket(entry[2], entry[0], waited)
+
+    def _abandon(self, entry) -> None:
+        if entry in self._queue:
+            self._queue.remove(entry)
+            heapq.heapify(self._queue)
+            self._wake()
+
+    def _sleep_for(self, wait: Optional[float], start: float, timeout: Optional[float]) -> Optional[float]:
+        """How long to sleep before trying again (None: until woken); raises TimeoutError past ``timeout``"""
+        if timeout is None:
+            return wait
+        remaining = timeout - (self.clock() - start)
+        if remaining <= 0 or (wait is not None and wait > remaining):
+            raise TimeoutError(f"Rate limiter could not admit call within {timeout}s")
+        return remaining if wait is None else wait
+
+    def acquire(self, estimated_tokens: int, priority: Optional[int] = None, timeout: Optional[float] = None) -> Ticket:
+        """Block until the call may be sent"""
+        start = self.clock()
+        with self._cond:
+            entry = self._enqueue(estimated_tokens, priority)
+            try:
+                while True:
+                    wait = self._try_admit(entry)
+                    if wait == 0:
+                        return self._admitted(entry, start)
+                    sleep = self._sleep_for(wait, start, timeout)
+                    self._cond.wait(None if sleep is None else min(sleep, 1.0))
+            except BaseException:
+                self._abandon(entry)
+                raise
+
+    async def aacquire(self, estimated_tokens: int, priority: Optional[int] = None, timeout: Optional[float] = None) -> Ticket:
+        """Async acquire; waits on the event loop instead of blocking a thread.
+
+        A waiter behind others sleeps until an admission, abandonment or
+        refund wakes it; only the head sleeps on the buckets' refill time.
+        """
+        start = self.clock()
+        woken = asyncio.Event()
+        with self._cond:
+            entry = self._enqueue(estimated_tokens, priority)
+            self._waiters[entry[1]] = (asyncio.get_running_loop(), woken)
+        try:
+            while True:
+                with self._cond:
+                    woken.clear()
+                    wait = self._try_admit(entry)
+                    if wait == 0:
+                        return self._admitted(entry, start)
+                sleep = self._sleep_for(wait, start, timeout)
+                try:
+                    await asyncio.wait_for(woken.wait(), sleep)
+                except asyncio.TimeoutError:
+                    pass  # the head's refill time is up, or the call's timeout
+        except BaseException:
+            with self._cond:
+                self._abandon(entry)
+            raise
+        finally:
+            with self._cond:
+                self._waiters.pop(entry[1], None)
+
+    def stats(self) -> Dict[str, float]:
+        """Counters since start plus the number of calls waiting now"""
+        with self._cond:
+            return {**self.counters, "queued": len(self._queue)}
+
+    def complete(self, ticket: Ticket, actual_tokens: Optional[int]) -> None:
+        """Correct the token bucket with the provider-reported usage"""
+        if actual_tokens is None:
+            return
+        with self._cond:
+            self.tokens.adjust(actual_tokens - ticket.estimated_tokens)
+            self.counters["actual_tokens"] += actual_tokens
+            self._wake()
+
+
+def _limit(name: str, default: float) -> float:
+    # Provider limits are per account; split them across API worker processes
+    workers = max(1, int(os.getenv("RESCURA_WORKERS", "1")))
+    return float(os.getenv(name, str(default))) / workers
+
+
+scheduler = RequestScheduler(
+    requests_per_minute=_limit("RESCURA_GROQ_RPM", 30),
+    tokens_per_minute=_limit("RESCURA_GROQ_TPM", 6000)
+)
+
+
+DEFAULT_COMPLETION_TOKENS = 1024
+
+
+def usage_tokens(llm_output: Optional[dict]) -> Optional[int]:
+    """total_tokens from a ChatResult's llm_output (ChatGroq or the Llama3 wrapper)"""
+    if not llm_output:
+        return None
+    usage = llm_output.get("token_usage") or llm_output.get("usage") or {}
+    return usage.get("total_tokens")
+
+
+class ScheduledModelMixin:
+    """Routes a chat model's calls through the shared RequestScheduler.
+
+    Host classes declare ``priority`` and ``scheduler`` fields; a
+    ``scheduling_priority`` context overrides ``priority`` per call.
+    """
+
+    def _scheduler(self) -> RequestScheduler:
+        return self.scheduler or scheduler
+
+    def _estimate(self, messages) -> int:
+        from llm.tokenizer import count_message_tokens
+        return count_message_tokens(messages, getattr(self, "max_tokens", None) or DEFAULT_COMPLETION_TOKENS)
+
+    def _acquire(self, messages) -> Ticket:
+        return self._scheduler().acquire(self._estimate(messages), current_priority(self.priority))
+
+    async def _aacquire(self, messages) -> Ticket:
+        return await self._scheduler().aacquire(self._estimate(messages), current_priority(self.priority))
+
+    def _complete(self, ticket: Ticket, actual_tokens: Optional[int]) -> None:
+        self._scheduler().complete(ticket, actual_tokens)
+
+    @staticmethod
+    def _chunk_tokens(chunk) -> Optional[int]:
+        usage = getattr(chunk.message, "usage_metadata", None)
+        return usage.get("total_tokens") if usage else None
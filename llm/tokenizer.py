@@ -0,0 +1,51 @@
+# rescura/llm/tokenizer.py
+import os
+import logging
+import threading
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Llama 3 tokenizer: a Hub repo (gated, so HF_TOKEN must be set) or a local tokenizer.json
+TOKENIZER_NAME = os.getenv("RESCURA_TOKENIZER", "meta-llama/Meta-Llama-3-8B-Instruct")
+MESSAGE_OVERHEAD = 4  # role/header tokens the chat template adds per message
+
+_tokenizer = None
+_tokenizer_failed = False
+_lock = threading.Lock()
+
+
+def get_tokenizer():
+    """The Llama 3 tokenizer, or None when it cannot be loaded"""
+    global _tokenizer, _tokenizer_failed
+    if _tokenizer is not None or _tokenizer_failed:
+        return _tokenizer
+    with _lock:
+        if _tokenizer is None and not _tokenizer_failed:
+            try:
+                from tokenizers import Tokenizer
+                if os.path.isfile(TOKENIZER_NAME):
+                    _tokenizer = Tokenizer.from_file(TOKENIZER_NAME)
+                else:
+                    _tokenizer = Tokenizer.from_pretrained(TOKENIZER_NAME)
+            except Exception as e:
+                logger.warning(f"Tokenizer {TOKENIZER_NAME} unavailable, estimating tokens: {str(e)}")
+                _tokenizer_failed = True
+    return _tokenizer
+
+
+def count_tokens(text: str) -> int:
+    """Exact Llama 3 token count, falling back to ~4 characters per token"""
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        return len(text) // 4
+    return len(tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+def count_message_tokens(messages: Iterable, completion_tokens: Optional[int] = None) -> int:
+    """Prompt tokens for a list of chat messages, plus the completion allowance"""
+    total = 0
+    for message in messages:
+        content = message.content if hasattr(message, "content") else message.get("content", "")
+        total += count_tokens(content if isinstance(content, str) else str(content)) + MESSAGE_OVERHEAD
+    return total + (completion_tokens or 0)
@@ -1,10 +1,11 @@
 # rescura/main.py
 import sys
+import time
+import argparse
 from pathlib import Path
 from dotenv import load_dotenv
-from retrieval.retriever import RescuraRetriever
-from agents import TriageAgent, TreatmentAgent, PreventionAgent, FollowUpAgent, ResourceAgent
-from input_processing import AudioTranscriber, ImageAnalyzer
+from agents.orchestrator import build_post_triage_pipeline, format_timings
+from components import components
 
 # Load environment variables first
 load_dotenv()
@@ -16,23 +17,47 @@ from utils import (
     format_scratchpad
 )
 
-setup_logging()
-validate_environment()
-config = Settings()
+
+def print_stage(result):
+    """Print a post-triage section as soon as its agent finishes"""
+    if not result.ok:
+        print(f"\n⚠️ {result.name.capitalize()} unavailable: {result.error}")
+        return
+
+    if result.name == "treatment":
+        print("\n💊 Recommended Treatment:")
+        print(result.value)
+    elif result.name == "prevention":
+        print("\n🛡️ Prevention Measures:")
+        print(result.value)
+    elif result.name == "followup":
+        print("\n📅 Follow-up Plan:")
+        print(f"Monitoring schedule: {result.value['monitoring_schedule']}")
+        print(f"Red flags: {', '.join(result.value['red_flags'])}")
+    elif result.name == "resources":
+        print("\n🏥 Nearby Medical Facilities:")
+        for hospital in result.value.get('hospitals', [])[:3]:
+            print(f"- {hospital['name']} ({hospital['distance']})")
+
+
+def profile_startup(build: bool = False):
+    """Print where cold-start time goes: imports per entry point, then component builds"""
+    from utils.startup_profile import ENTRY_POINTS, profile_import, format_report, format_build_timings
+
+    for module in ENTRY_POINTS:
+        print(format_report(profile_import(module)))
+        print()
+    if build:
+        print("Building components:")
+        print(format_build_timings(components.warm_up()))
 
 
 def main():
-    # Initialize components
-    retriever = RescuraRetriever()
-    transcriber = AudioTranscriber()
-    analyzer = ImageAnalyzer()
-    
-    # Create agent instances
-    triage_agent = TriageAgent(retriever)
-    treatment_agent = TreatmentAgent(retriever)
-    prevention_agent = PreventionAgent(retriever)
-    followup_agent = FollowUpAgent(retriever)
-    resource_agent = ResourceAgent(retriever)
+    setup_logging()
+    validate_environment()
+    config = Settings()
+    # Retriever, agents and models are built on first use, so the menu shows at once
+    post_triage_agents = {}
 
     print("\n" + "="*40)
     print("🚑 Welcome to Rescura Emergency Assistant")
@@ -64,7 +89,7 @@ def main():
                     raise FileNotFoundError("Image file not found")
                 
                 # Analyze image and combine with text input
-                image_desc = analyzer.describe(image_path)
+                image_desc = components.analyzer.describe(image_path)
                 print(f"\n🖼️ Image analysis: {image_desc}")
                 user_input = image_desc + "\n" + input("Additional context about the image: ").strip()
             
@@ -72,12 +97,20 @@ def main():
                 print("\n⚠️ Invalid choice. Please try again.")
                 continue
 
+            # Red flags get first actions immediately, before the full assessment
+            provisional = components.fast_triage.assess(user_input)
+            if provisional:
+                print(f"\n🚨 Provisional severity {provisional['severity']}/5: {provisional['rationale']}")
+                print(f"Do now: {', '.join(provisional['immediate_actions'])}")
+
             # Triage assessment
             print("\n🔍 Assessing emergency severity...")
-            assessment = triage_agent.assess_emergency(
+            triage_start = time.perf_counter()
+            assessment = components.triage_agent.assess_emergency(
                 symptoms=user_input,
                 environment=environment
             )
+            triage_time = time.perf_counter() - triage_start
 
             print("\n" + "="*40)
             print(f"🚨 Triage Results (Severity {assessment['severity']}/5)")
@@ -85,44 +118,30 @@ def main():
             print(f"Rationale: {assessment['rationale']}")
             print(f"Immediate actions: {', '.join(assessment['immediate_actions'])}")
 
-            # Treatment plan for moderate+ severity
-            if assessment['severity'] >= 3:
-                print("\n🩺 Generating treatment plan...")
-                treatment = treatment_agent.generate_treatment_plan(
-                    assessment["diagnosis"],
-                    assessment
-                )
-                print("\n💊 Recommended Treatment:")
-                print(treatment)
-
-            # Prevention tips regardless of severity
-            print("\n🔒 Generating prevention advice...")
-            prevention = prevention_agent.suggest_prevention_measures(
-                incident=assessment["diagnosis"],
-                environment=environment
-            )
-            print("\n🛡️ Prevention Measures:")
-            print(prevention)
-
-            # Follow-up care
-            print("\n📋 Generating follow-up instructions...")
-            followup = followup_agent.create_plan(
-                treatment=treatment if assessment['severity'] >=3 else "Basic first aid applied",
-                severity=assessment['severity']
-            )
-            print("\n📅 Follow-up Plan:")
-            print(f"Monitoring schedule: {followup['monitoring_schedule']}")
-            print(f"Red flags: {', '.join(followup['red_flags'])}")
-
-            # Resource finding
-            print("\n📍 Locating nearby resources...")
-            resources = resource_agent.find_resources(
-                resource_type="hospital",
-                location=environment
+            if not post_triage_agents:
+                from agents import PreventionAgent, FollowUpAgent
+                post_triage_agents["prevention_agent"] = PreventionAgent(components.retriever)
+                post_triage_agents["followup_agent"] = FollowUpAgent(components.retriever)
+
+            # Post-triage agents run concurrently; only follow-up waits on treatment
+            pipeline = build_post_triage_pipeline(
+                assessment,
+                environment,
+                treatment_agent=components.treatment_agent,
+                resource_agent=components.resource_agent,
+                **post_triage_agents
             )
-            print("\n🏥 Nearby Medical Facilities:")
-            for hospital in resources.get('hospitals', [])[:3]:
-                print(f"- {hospital['name']} ({hospital['distance']})")
+            print("\n🩺 Generating treatment, prevention, follow-up and resources...")
+            result = pipeline.run(on_result=print_stage)
+
+            print("\n⏱️ Stage timings:")
+            print(format_timings(
+                [("triage", triage_time)]
+                + list(result.timings.items())
+                + [("total", triage_time + result.total_time)]
+            ))
+
+            follow_up(components.conversation_agent.start(user_input, assessment).case_id)
 
         except Exception as e:
             print(f"\n⚠️ Error: {str(e)}")
@@ -130,5 +149,27 @@ def main():
 
         input("\nPress Enter to handle another case or Ctrl+C to exit...")
 
+
+def follow_up(case_id: str):
+    """Answer follow-up questions on the case just triaged, without re-running the pipeline"""
+    while True:
+        message = input("\nFollow-up question (Enter to finish this case): ").strip()
+        if not message:
+            return
+        reply = components.conversation_agent.reply(case_id, message)
+        if reply["escalated"]:
+            print(f"\n🚨 Severity is now {reply['severity']}/5")
+        if reply["call_emergency_services"]:
+            print("📞 Call emergency services now.")
+        print(f"\n💬 {reply['answer']}")
+        print(f"({reply['elapsed_ms']:.0f} ms, {reply['tokens']} tokens)")
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Rescura emergency assistant")
+    parser.add_argument("--profile-startup", action="store_true", help="report import and build time, then exit")
+    parser.add_argument("--build", action="store_true", help="with --profile-startup, also time building each component")
+    args = parser.parse_args()
+    if args.profile_startup:
+        profile_startup(build=args.build)
+    else:
+        main()
@@ -0,0 +1,19 @@
+# retrieval/__init__.py
+import importlib
+
+# FAISS and langchain_community load only when the retriever is used
+_EXPORTS = {
+    "RescuraRetriever": ".retriever",
+    "ContextBuilder": ".context_builder",
+    "BM25Index": ".bm25",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
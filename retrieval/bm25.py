@@ -0,0 +1,125 @@
+# rescura/retrieval/bm25.py
+import re
+import json
+import logging
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, List, Tuple, Union
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BM25_DIR = "bm25"
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "in",
+    "is", "it", "of", "on", "or", "that", "the", "this", "to", "was", "with"
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over an inverted index whose doc ids are FAISS positions.
+
+    Postings are stored as flat numpy arrays (doc ids and term frequencies)
+    sliced per term by an offsets array, so the saved index is memory-mapped
+    rather than parsed into Python objects.
+    """
+
+    def __init__(self, vocab: dict, offsets, docs, tfs, doc_len, k1: float = 1.5, b: float = 0.75):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.docs = docs
+        self.tfs = tfs
+        self.doc_len = doc_len
+        self.k1 = k1
+        self.b = b
+        self.avg_len = float(doc_len.mean()) if len(doc_len) else 0.0
+
+    @classmethod
+    def build(cls, texts: Iterable[str], **kwargs) -> "BM25Index":
+        postings = {}
+        doc_len = []
+        for doc_id, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_len.append(sum(counts.values()))
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((doc_id, tf))
+
+        vocab = {term: i for i, term in enumerate(sorted(postings))}
+        offsets = [0]
+        docs, tfs = [], []
+        for term in sorted(postings):
+            for doc_id, tf in postings[term]:
+                docs.append(doc_id)
+                tfs.append(tf)
+            offsets.append(len(docs))
+
+        return cls(
+            vocab,
+            np.asarray(offsets, dtype=np.int64),
+            np.asarray(docs, dtype=np.int32),
+            np.asarray(tfs, dtype=np.float32),
+            np.asarray(doc_len, dtype=np.float32),
+            **kwargs
+        )
+
+    def __len__(self) -> int:
+        return len(self.doc_len)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[int, float]]:
+        """Top-k (position, score) pairs for a query"""
+        n = len(self.doc_len)
+        if not n:
+            return []
+        scores = np.zeros(n, dtype=np.float32)
+        norm = self.k1 * (1 - self.b + self.b * self.doc_len / max(self.avg_len, 1e-9))
+
+        for term in set(tokenize(query)):
+            row = self.vocab.get(term)
+            if row is None:
+                continue
+            start, end = self.offsets[row], self.offsets[row + 1]
+            docs, tfs = self.docs[start:end], self.tfs[start:end]
+            df = end - start
+            idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+            scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + norm[docs])
+
+        hits = np.flatnonzero(scores)
+        if not len(hits):
+            return []
+        top = hits[np.argsort(-scores[hits], kind="stable")[:k]]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def save(self, index_dir: Union[str, Path]) -> Path:
+        directory = Path(index_dir) / BM25_DIR
+        directory.mkdir(parents=True, exist_ok=True)
+        with open(directory / "vocab.json", "w") as f:
+            json.dump(self.vocab, f)
+        np.save(directory / "offsets.npy", self.offsets)
+        np.save(directory / "docs.npy", self.docs)
+        np.save(directory / "tfs.npy", self.tfs)
+        np.save(directory / "doc_len.npy", self.doc_len)
+        logger.info(f"Saved BM25 index ({len(self.vocab)} terms, {len(self)} chunks) to {directory}")
+        return directory
+
+    @classmethod
+    def exists(cls, index_dir: Union[str, Path]) -> bool:
+        return (Path(index_dir) / BM25_DIR / "vocab.json").exists()
+
+    @classmethod
+    def load(cls, index_dir: Union[str, Path], **kwargs) -> "BM25Index":
+        directory = Path(index_dir) / BM25_DIR
+        with open(directory / "vocab.json") as f:
+            vocab = json.load(f)
+        return cls(
+            vocab,
+            np.load(directory / "offsets.npy", mmap_mode="r"),
+            np.load(directory / "docs.npy", mmap_mode="r"),
+            np.load(directory / "tfs.npy", mmap_mode="r"),
+            np.load(directory / "doc_len.npy"),
+            **kwargs
+        )
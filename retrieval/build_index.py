@@ -1,10 +1,18 @@
 # rescura/retrieval/build_index.py
+import json
+import hashlib
 import logging
+import argparse
 from pathlib import Path
+from typing import Dict, List, Optional
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
+from retrieval.ingest import IngestionPipeline
+from retrieval.index_store import INDEX_TYPES, build_compact_index, index_path
+from retrieval.chunk_store import ChunkStore
+from retrieval.bm25 import BM25Index
 
 # Configure logging
 logging.basicConfig(
@@ -13,6 +21,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+DATA_DIRECTORIES = ["first_aid_manuals", "disaster_guides", "wilderness_guides"]
+INDEX_DIR = Path("data/faiss_index")
+MANIFEST_NAME = "manifest.json"
+
 def load_documents(directory: Path) -> list:
     """Load and split PDF documents from a directory"""
     documents = []
@@ -35,11 +47,7 @@ def load_documents(directory: Path) -> list:
 def process_documents() -> list:
     """Process all documents from data directories"""
     base_dir = Path("data")
-    directories = [
-        base_dir / "first_aid_manuals",
-        base_dir / "disaster_guides",
-        base_dir / "wilderness_guides"
-    ]
+    directories = [base_dir / name for name in DATA_DIRECTORIES]
     
     all_docs = []
     for directory in directories:
@@ -66,10 +74,7 @@ def build_and_save_index(chunks: list):
         return
     
     logger.info("Generating embeddings...")
-    embeddings = HuggingFaceEmbeddings(
-        model_name="BAAI/bge-small-en-v1.5",
-        model_kwargs={"device": "cpu"}  # Use "cuda" if you have GPU
-    )
+    embeddings = get_embeddings()
     
     logger.info("Building FAISS index...")
     vector_store = FAISS.from_documents(chunks, embeddings)
@@ -81,12 +86,160 @@ def build_and_save_index(chunks: list):
     vector_store.save_local(str(output_dir))
     logger.info("Index built and saved successfully!")
 
+def get_embeddings(batch_size: int = 64, multi_process: bool = False) -> HuggingFaceEmbeddings:
+    """Embedding model configured for batched (optionally multi-process) encoding"""
+    return HuggingFaceEmbeddings(
+        model_name="BAAI/bge-small-en-v1.5",
+        model_kwargs={"device": "cpu"},  # Use "cuda" if you have GPU
+        encode_kwargs={"batch_size": batch_size},
+        multi_process=multi_process
+    )
+
+def file_hash(path: Path) -> str:
+    """SHA-256 of a file's contents, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def chunk_id_prefix(path: str, digest: str) -> str:
+    """Chunk id prefix from path and content, so identical files at two paths don't collide"""
+    return hashlib.sha256(f"{path}\0{digest}".encode()).hexdigest()[:16]
+
+def load_manifest(index_dir: Path) -> Dict[str, dict]:
+    """Map of source file -> {"sha256", "chunk_ids"} for the saved index"""
+    manifest_path = index_dir / MANIFEST_NAME
+    if not manifest_path.exists():
+        return {}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+def save_manifest(index_dir: Path, manifest: Dict[str, dict]) -> None:
+    with open(index_dir / MANIFEST_NAME, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+def build_index_incremental(
+    directories: Optional[List[Path]] = None,
+    index_dir: Path = INDEX_DIR,
+    batch_size: int = 64,
+    multi_process: bool = False,
+    full_rebuild: bool = False,
+    parse_workers: Optional[int] = None,
+    index_type: str = "flat",
+    nlist: int = 256
+) -> Optional[FAISS]:
+    """Update the saved index in place for new, changed and deleted PDFs.
+
+    A manifest of content hashes next to the index records which chunk ids
+    each file produced, so unchanged files are never re-read or re-embedded.
+    """
+    directories = directories or [Path("data") / name for name in DATA_DIRECTORIES]
+    index_dir = Path(index_dir)
+    embeddings = get_embeddings(batch_size, multi_process)
+
+    manifest = {} if full_rebuild else load_manifest(index_dir)
+    vector_store = None
+    if manifest and (index_dir / "index.faiss").exists():
+        vector_store = FAISS.load_local(
+            str(index_dir),
+            embeddings,
+            allow_dangerous_deserialization=True
+        )
+    else:
+        manifest = {}
+
+    current = {}
+    for directory in directories:
+        if not directory.exists():
+            logger.warning(f"Directory {directory} does not exist, skipping...")
+            continue
+        for pdf_file in sorted(directory.glob("*.pdf")):
+            current[str(pdf_file)] = file_hash(pdf_file)
+
+    stale = [path for path, entry in manifest.items() if current.get(path) != entry["sha256"]]
+    fresh = [path for path, digest in current.items()
+             if path not in manifest or manifest[path]["sha256"] != digest]
+    logger.info(
+        f"{len(fresh)} new or changed, {len(stale)} stale, "
+        f"{len(current) - len(fresh)} unchanged files"
+    )
+
+    stale_ids = [chunk_id for path in stale for chunk_id in manifest[path]["chunk_ids"]]
+    if vector_store is not None and stale_ids:
+        logger.info(f"Removing {len(stale_ids)} vectors from the index...")
+        vector_store.delete(stale_ids)
+    for path in stale:
+        del manifest[path]
+
+    # Parse, chunk and embed new files as a stream, adding each batch as it lands
+    pipeline = IngestionPipeline(embeddings, batch_size=batch_size, parse_workers=parse_workers)
+    added: Dict[str, List[str]] = {}
+    for batch in pipeline.run(fresh, id_prefix=lambda path: chunk_id_prefix(path, current[path])):
+        text_embeddings = list(zip(batch.texts, batch.vectors))
+        if vector_store is None:
+            vector_store = FAISS.from_embeddings(text_embeddings, embeddings, metadatas=batch.metadatas, ids=batch.ids)
+        else:
+            vector_store.add_embeddings(text_embeddings, metadatas=batch.metadatas, ids=batch.ids)
+        for source, chunk_id in zip(batch.sources, batch.ids):
+            added.setdefault(source, []).append(chunk_id)
+        logger.info(f"Indexed {sum(len(ids) for ids in added.values())} chunks")
+
+    for path in fresh:
+        # Failed files stay out of the manifest so the next run retries them
+        if path not in pipeline.failed:
+            manifest[path] = {"sha256": current[path], "chunk_ids": added.get(path, [])}
+
+    if vector_store is None:
+        logger.error("No document chunks to process!")
+        return None
+
+    if fresh or stale or full_rebuild:
+        index_dir.mkdir(parents=True, exist_ok=True)
+        logger.info(f"Saving index to {index_dir}...")
+        vector_store.save_local(str(index_dir))
+        save_manifest(index_dir, manifest)
+        logger.info("Index updated and saved successfully!")
+    else:
+        logger.info("Index is up to date")
+
+    changed = bool(fresh or stale or full_rebuild)
+    # The chunk store is what the retriever reads at query time instead of index.pkl
+    if changed or not ChunkStore.exists(index_dir):
+        ChunkStore.write(index_dir, vector_store)
+    # BM25 postings are keyed by FAISS position, so they are rebuilt with the chunk store
+    if changed or not BM25Index.exists(index_dir):
+        texts = (
+            vector_store.docstore.search(vector_store.index_to_docstore_id[i]).page_content
+            for i in range(vector_store.index.ntotal)
+        )
+        BM25Index.build(texts).save(index_dir)
+    # Deletes renumber vectors, so compact indexes are re-encoded on every change
+    if index_type != "flat" and (changed or not index_path(index_dir, index_type).exists()):
+        build_compact_index(index_dir, index_type, nlist=nlist)
+    return vector_store
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build or update the Rescura FAISS index")
+    parser.add_argument("--full", action="store_true", help="Rebuild from scratch, ignoring the manifest")
+    parser.add_argument("--batch-size", type=int, default=64, help="Chunks embedded per forward pass")
+    parser.add_argument("--multi-process", action="store_true", help="Spread embedding across CPU cores")
+    parser.add_argument("--parse-workers", type=int, default=None, help="PDF parser processes (default: CPU count)")
+    parser.add_argument("--index-dir", type=Path, default=INDEX_DIR)
+    parser.add_argument("--index-type", default="flat", choices=sorted(INDEX_TYPES),
+                        help="Also write a compact, memory-mappable index of this type")
+    parser.add_argument("--nlist", type=int, default=256, help="IVF cells for compact IVF indexes")
+    return parser.parse_args()
+
 if __name__ == "__main__":
+    args = parse_args()
     logger.info("Starting FAISS index generation...")
-    chunks = process_documents()
-    
-    if chunks:
-        logger.info(f"Processing {len(chunks)} document chunks")
-        build_and_save_index(chunks)
-    else:
-        logger.error("No documents processed, exiting...")
+    build_index_incremental(
+        index_dir=args.index_dir,
+        batch_size=args.batch_size,
+        multi_process=args.multi_process,
+        full_rebuild=args.full,
+        parse_workers=args.parse_workers,
+        index_type=args.index_type,
+        nlist=args.nlist
+    )
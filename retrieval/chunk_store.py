@@ -0,0 +1,150 @@
+# rescura/retrieval/chunk_store.py
+import os
+import json
+import mmap
+import uuid
+import shutil
+import logging
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Iterable, Union
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+CHUNK_DIR = "chunks"
+COLUMNS = ("text", "metadata", "ids")
+
+
+class _Column:
+    """A variable-length bytes column: one blob plus an int64 offsets array"""
+
+    def __init__(self, directory: Path, name: str):
+        self.offsets = np.load(directory / f"{name}.offsets.npy", mmap_mode="r")
+        blob_path = directory / f"{name}.bin"
+        self._file = open(blob_path, "rb")
+        # mmap refuses empty files; an empty store simply has no rows to read
+        if blob_path.stat().st_size:
+            self.blob = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.blob = b""
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def view(self, row: int) -> memoryview:
+        """Zero-copy slice of one row's bytes"""
+        return memoryview(self.blob)[int(self.offsets[row]):int(self.offsets[row + 1])]
+
+    @staticmethod
+    def write(directory: Path, name: str, rows: Iterable[bytes]) -> None:
+        offsets = [0]
+        with open(directory / f"{name}.bin", "wb") as f:
+            for row in rows:
+                f.write(row)
+                offsets.append(offsets[-1] + len(row))
+        np.save(directory / f"{name}.offsets.npy", np.asarray(offsets, dtype=np.int64))
+
+
+class _PositionIds(Mapping):
+    """index_to_docstore_id for a ChunkStore: FAISS position is the row id"""
+
+    def __init__(self, size: int):
+        self.size = size
+
+    def __getitem__(self, position) -> int:
+        position = int(position)
+        if not 0 <= position < self.size:
+            raise KeyError(position)
+        return position
+
+    def __iter__(self):
+        return iter(range(self.size))
+
+    def __len__(self) -> int:
+        return self.size
+
+
+class ChunkStore(Docstore):
+    """Read-only, memory-mapped chunk text and metadata addressed by FAISS position.
+
+    Replaces LangChain's pickled InMemoryDocstore at query time: opening the
+    store maps three small files instead of unpickling every Document.
+    """
+
+    def __init__(self, index_dir: Union[str, Path]):
+        directory = Path(index_dir) / CHUNK_DIR
+        self.columns = {name: _Column(directory, name) for name in COLUMNS}
+
+    @classmethod
+    def exists(cls, index_dir: Union[str, Path]) -> bool:
+        return (Path(index_dir) / CHUNK_DIR / "text.offsets.npy").exists()
+
+    def __len__(self) -> int:
+        return len(self.columns["text"])
+
+    def text_view(self, position: int) -> memoryview:
+        """UTF-8 bytes of a chunk without copying"""
+        return self.columns["text"].view(position)
+
+    def get(self, position: int) -> Document:
+        metadata = self.columns["metadata"].view(position)
+        return Document(
+            page_content=str(self.text_view(position), "utf-8"),
+            metadata=json.loads(bytes(metadata)) if len(metadata) else {},
+            id=str(self.columns["ids"].view(position), "utf-8") or None
+        )
+
+    def search(self, search: Union[int, str]) -> Union[str, Document]:
+        """Docstore interface used by LangChain's FAISS wrapper"""
+        try:
+            return self.get(int(search))
+        except (ValueError, IndexError):
+            return f"ID {search} not found."
+
+    def index_to_docstore_id(self) -> Mapping:
+        return _PositionIds(len(self))
+
+    @staticmethod
+    def write(index_dir: Union[str, Path], vector_store) -> Path:
+        """Export a LangChain FAISS store's docstore in FAISS position order.
+
+        Readers in other processes may have the current files memory-mapped,
+        so they are never rewritten: the columns go to a new versioned
+        directory and the ``chunks`` symlink is swapped to it atomically.
+        Open stores keep reading the old version until they are reopened.
+        """
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        version = index_dir / f"{CHUNK_DIR}-{uuid.uuid4().hex[:12]}"
+        version.mkdir()
+
+        ids = [vector_store.index_to_docstore_id[i] for i in range(vector_store.index.ntotal)]
+        docs = [vector_store.docstore.search(doc_id) for doc_id in ids]
+        _Column.write(version, "text", (d.page_content.encode("utf-8") for d in docs))
+        _Column.write(version, "metadata", (
+            json.dumps(d.metadata, separators=(",", ":")).encode("utf-8") if d.metadata else b""
+            for d in docs
+        ))
+        _Column.write(version, "ids", (str(doc_id).encode("utf-8") for doc_id in ids))
+
+        target = index_dir / CHUNK_DIR
+        previous = None
+        if target.is_symlink():
+            previous = target.resolve()
+        elif target.exists():
+            # A plain directory from before versioning; move it aside so the link can take its name
+            previous = index_dir / f"{CHUNK_DIR}-{uuid.uuid4().hex[:12]}"
+            os.replace(target, previous)
+        link = index_dir / f".{CHUNK_DIR}.{os.getpid()}.tmp"
+        if link.is_symlink():
+            link.unlink()
+        os.symlink(version.name, link)
+        os.replace(link, target)
+        if previous is not None:
+            # Mapped files outlive their directory entry; open readers are unaffected
+            shutil.rmtree(previous, ignore_errors=True)
+        logger.info(f"Wrote {len(docs)} chunks to {version}")
+        return target
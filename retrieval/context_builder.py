@@ -0,0 +1,179 @@
+# rescura/retrieval/context_builder.py
+import os
+import re
+import logging
+from typing import Callable, List, Optional, Sequence
+import numpy as np
+from llm.tokenizer import count_tokens
+from retrieval.bm25 import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Tokens of retrieved guidelines each agent may put in its prompt;
+# override with RESCURA_CONTEXT_BUDGET_<AGENT>
+DEFAULT_BUDGETS = {"triage": 600, "treatment": 1200, "resource": 300, "followup": 800}
+DEFAULT_BUDGET = 800
+# Caller input (e.g. a long transcript) is cut to this many tokens
+MAX_INPUT_TOKENS = int(os.getenv("RESCURA_MAX_INPUT_TOKENS", "1500"))
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n{2,}|\n(?=\s*(?:[-•*]|\d+[.)])\s)")
+MIN_OVERLAP = 20   # shortest suffix/prefix match treated as splitter overlap
+MAX_OVERLAP = 300  # the index is built with chunk_overlap=100; allow for whitespace drift
+
+
+def budget_for(agent: str) -> int:
+    return int(os.getenv(f"RESCURA_CONTEXT_BUDGET_{agent.upper()}", DEFAULT_BUDGETS.get(agent, DEFAULT_BUDGET)))
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in SENTENCE_SPLIT.split(text) if s and s.strip()]
+
+
+def _normalize(sentence: str) -> str:
+    return " ".join(tokenize(sentence))
+
+
+def merge_overlap(first: str, second: str) -> Optional[str]:
+    """Join two chunks if ``second`` starts with the tail of ``first``; else None"""
+    longest = min(len(first), len(second), MAX_OVERLAP)
+    for size in range(longest, MIN_OVERLAP - 1, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return None
+
+
+def dedupe_chunks(texts: Sequence[str]) -> List[str]:
+    """Stitch chunks that overlap each other and drop exact repeats, keeping rank order"""
+    merged: List[str] = []
+    for text in texts:
+        text = text.strip()
+        if not text or any(text in kept for kept in merged):
+            continue
+        for i, kept in enumerate(merged):
+            joined = merge_overlap(kept, text) or merge_overlap(text, kept)
+            if joined:
+                merged[i] = joined
+                break
+        else:
+            merged.append(text)
+    return merged
+
+
+class ContextBuilder:
+    """Turns retrieved chunks into prompt context that fits a token budget.
+
+    Overlapping chunks are stitched, repeated sentences dropped, and the
+    sentences most relevant to the query kept (in document order) until the
+    budget is spent. Relevance is query-term overlap, or cosine similarity
+    when an embeddings model is given; sentences below ``min_relevance``
+    are left out.
+    """
+
+    def __init__(
+        self,
+        budget: int = DEFAULT_BUDGET,
+        embeddings=None,
+        min_relevance: float = 0.05,
+        counter: Callable[[str], int] = count_tokens
+    ):
+        self.budget = budget
+        self.embeddings = embeddings
+        self.min_relevance = min_relevance
+        self.count = counter
+
+    @classmethod
+    def for_agent(cls, agent: str, **kwargs) -> "ContextBuilder":
+        return cls(budget=budget_for(agent), **kwargs)
+
+    def build(self, query: str, docs: Sequence) -> str:
+        texts = [getattr(doc, "page_content", doc) for doc in docs]
+        seen = set()
+        chunks = [self._unique_sentences(chunk, seen) for chunk in dedupe_chunks(texts)]
+
+        sentences = [(c, i, s) for c, chunk in enumerate(chunks) for i, s in enumerate(chunk)]
+        if not sentences:
+            return ""
+        scores = self._relevance(query, [s for _, _, s in sentences])
+
+        # Earlier-ranked chunks win ties, as the retriever ordered them by relevance
+        order = sorted(range(len(sentences)), key=lambda j: (-scores[j], sentences[j][0], sentences[j][1]))
+        chosen, used = [], 0
+        for j in order:
+            if scores[j] < self.min_relevance and chosen:
+                break
+            cost = self.count(sentences[j][2]) + 1
+            if used + cost > self.budget:
+                continue
+            chosen.append(j)
+            used += cost
+
+        kept = sorted(chosen, key=lambda j: sentences[j][:2])
+        paragraphs, current, current_chunk = [], [], None
+        for j in kept:
+            chunk_id, _, sentence = sentences[j]
+            if current and chunk_id != current_chunk:
+                paragraphs.append(" ".join(current))
+                current = []
+            current.append(sentence)
+            current_chunk = chunk_id
+        if current:
+            paragraphs.append(" ".join(current))
+        return "\n\n".join(paragraphs)
+
+    def best_relevance(self, query: str, docs: Sequence) -> float:
+        """Relevance of the best-matching sentence in ``docs``; 0.0 if there are none"""
+        sentences = [s for doc in docs for s in split_sentences(getattr(doc, "page_content", doc))]
+        return max(self._relevance(query, sentences), default=0.0) if sentences else 0.0
+
+    def truncate(self, text: str, budget: Optional[int] = None) -> str:
+        """Cut free text (e.g. a long transcript) to a token budget at a sentence boundary"""
+        budget = budget or self.budget
+        if self.count(text) <= budget:
+            return text
+        kept, used = [], 0
+        sentences = split_sentences(text)
+        for sentence in sentences:
+            cost = self.count(sentence) + 1
+            if used + cost > budget:
+                break
+            kept.append(sentence)
+            used += cost
+        if not kept and sentences:
+            # Not even one sentence fits (e.g. an unpunctuated transcript): cut at a word
+            return self._cut_words(sentences[0], budget)
+        return " ".join(kept)
+
+    def _cut_words(self, text: str, budget: int) -> str:
+        """Longest word prefix of ``text`` within ``budget`` tokens"""
+        words = text.split()
+        low, high = 0, len(words)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self.count(" ".join(words[:mid])) <= budget:
+                low = mid
+            else:
+                high = mid - 1
+        return " ".join(words[:low])
+
+    @staticmethod
+    def _unique_sentences(chunk: str, seen: set) -> List[str]:
+        unique = []
+        for sentence in split_sentences(chunk):
+            key = _normalize(sentence)
+            if key and key not in seen:
+                seen.add(key)
+                unique.append(sentence)
+        return unique
+
+    def _relevance(self, query: str, sentences: List[str]) -> List[float]:
+        if self.embeddings is not None:
+            vectors = np.asarray(self.embeddings.embed_documents(sentences), dtype=np.float32)
+            q = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-8
+            q /= np.linalg.norm(q) + 1e-8
+            return (vectors @ q).tolist()
+
+        terms = set(tokenize(query))
+        if not terms:
+            return [0.0] * len(sentences)
+        return [len(terms & set(tokenize(s))) / len(terms) for s in sentences]
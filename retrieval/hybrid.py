@@ -0,0 +1,75 @@
+# rescura/retrieval/hybrid.py
+import time
+import logging
+from typing import Callable, Dict, Hashable, List, Sequence, Tuple
+from retrieval.bm25 import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Hashable]], k: int = 60) -> List[Tuple[Hashable, float]]:
+    """Merge ranked id lists; each list contributes 1 / (k + rank) per id"""
+    scores: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda pair: pair[1], reverse=True)
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def mmr_select(texts: List[str], relevance: List[float], k: int, lambda_mult: float = 0.7) -> List[int]:
+    """Maximal marginal relevance over candidate texts.
+
+    Redundancy is token-set Jaccard overlap, which is what separates the
+    overlapping chunks produced by the splitter's chunk_overlap and needs no
+    extra embedding calls. Returns indices into ``texts``.
+    """
+    if not texts:
+        return []
+    top = max(relevance) or 1.0
+    relevance = [r / top for r in relevance]
+    tokens = [set(tokenize(t)) for t in texts]
+
+    selected = [0]
+    remaining = list(range(1, len(texts)))
+    while remaining and len(selected) < k:
+        best = max(
+            remaining,
+            key=lambda i: lambda_mult * relevance[i]
+            - (1 - lambda_mult) * max(jaccard(tokens[i], tokens[j]) for j in selected)
+        )
+        selected.append(best)
+        remaining.remove(best)
+    return selected
+
+
+def rerank_with_budget(
+    query: str,
+    texts: List[str],
+    score_pairs: Callable[[List[Tuple[str, str]]], List[float]],
+    budget_ms: float = 150,
+    batch_size: int = 4
+) -> List[int]:
+    """Cross-encoder rerank that stops scoring once the latency budget is spent.
+
+    Candidates are scored in small batches in their incoming (fused) order;
+    anything left unscored when time runs out keeps its original order after
+    the scored ones. Returns indices into ``texts``.
+    """
+    deadline = time.perf_counter() + budget_ms / 1000
+    scored: List[Tuple[int, float]] = []
+    for start in range(0, len(texts), batch_size):
+        if scored and time.perf_counter() >= deadline:
+            logger.info(f"Rerank budget spent after {len(scored)}/{len(texts)} candidates")
+            break
+        batch = texts[start:start + batch_size]
+        scores = score_pairs([(query, text) for text in batch])
+        scored.extend(zip(range(start, start + len(batch)), scores))
+
+    order = [i for i, _ in sorted(scored, key=lambda pair: pair[1], reverse=True)]
+    return order + list(range(len(scored), len(texts)))
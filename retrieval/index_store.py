@@ -0,0 +1,194 @@
+# rescura/retrieval/index_store.py
+import time
+import pickle
+import logging
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from retrieval.chunk_store import ChunkStore
+
+logger = logging.getLogger(__name__)
+
+# faiss.index_factory specs; IVF variants take nlist and (for PQ) sub-quantizer count m
+INDEX_TYPES = {
+    "flat": "Flat",
+    "sq8": "SQ8",
+    "ivfflat": "IVF{nlist},Flat",
+    "ivfsq8": "IVF{nlist},SQ8",
+    "ivfpq": "IVF{nlist},PQ{m}",
+}
+# 8-bit PQ trains 256 centroids per sub-quantizer, so it needs at least that many vectors
+PQ_MIN_TRAINING = 256
+
+
+def index_path(index_dir: Path, index_type: str) -> Path:
+    """Flat stays in LangChain's index.faiss; compact types sit next to it"""
+    if index_type == "flat":
+        return Path(index_dir) / "index.faiss"
+    return Path(index_dir) / f"index.{index_type}.faiss"
+
+
+def is_ivf(index_type: str) -> bool:
+    return index_type.startswith("ivf")
+
+
+def build_compact_index(
+    index_dir: Path,
+    index_type: str = "ivfpq",
+    nlist: int = 256,
+    m: int = 48,
+    train_size: Optional[int] = None
+) -> Path:
+    """Re-encode the saved flat index as a quantized index with the same ids.
+
+    Vectors keep their positions, so LangChain's index_to_docstore_id mapping
+    (and the docstore) stay valid for the compact index.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}', choose from {sorted(INDEX_TYPES)}")
+
+    flat = faiss.read_index(str(index_path(index_dir, "flat")))
+    vectors = flat.reconstruct_n(0, flat.ntotal)
+    sample = vectors
+    if train_size and train_size < len(vectors):
+        rng = np.random.default_rng(0)
+        sample = vectors[rng.choice(len(vectors), train_size, replace=False)]
+    if is_ivf(index_type) and nlist > flat.ntotal:
+        logger.warning(f"nlist={nlist} exceeds {flat.ntotal} vectors, clamping")
+        nlist = max(1, flat.ntotal)
+
+    spec_type = index_type
+    if index_type == "ivfpq" and len(sample) < PQ_MIN_TRAINING:
+        # Same IVF layout under the same file name, so readers of "ivfpq" still open it
+        logger.warning(
+            f"PQ needs at least {PQ_MIN_TRAINING} training vectors, got {len(sample)}; "
+            f"encoding the {index_type} index with SQ8 instead"
+        )
+        spec_type = "ivfsq8"
+    spec = INDEX_TYPES[spec_type].format(nlist=nlist, m=m)
+    logger.info(f"Building {spec} index over {flat.ntotal} vectors...")
+    index = faiss.index_factory(flat.d, spec, flat.metric_type)
+
+    if not index.is_trained:
+        index.train(sample)
+    index.add(vectors)
+
+    output = index_path(index_dir, index_type)
+    faiss.write_index(index, str(output))
+    logger.info(f"Saved {index_type} index to {output} ({output.stat().st_size / 1e6:.1f} MB)")
+    return output
+
+
+def read_index(index_dir: Path, index_type: str = "flat", mmap: bool = True, nprobe: int = 16):
+    """Open a saved index, memory-mapped so worker processes share its pages"""
+    path = str(index_path(index_dir, index_type))
+    if not mmap:
+        index = faiss.read_index(path)
+    elif is_ivf(index_type):
+        index = faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    else:
+        index = faiss.read_index(path, faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+
+    if is_ivf(index_type):
+        faiss.extract_index_ivf(index).nprobe = nprobe
+    return index
+
+
+def load_vector_store(
+    index_dir: Path,
+    embeddings,
+    index_type: str = "flat",
+    mmap: bool = True,
+    nprobe: int = 16
+) -> FAISS:
+    """LangChain FAISS store backed by a (possibly compact, memory-mapped) index"""
+    index = read_index(index_dir, index_type, mmap=mmap, nprobe=nprobe)
+    if ChunkStore.exists(index_dir):
+        docstore = ChunkStore(index_dir)
+        index_to_docstore_id = docstore.index_to_docstore_id()
+    else:
+        logger.warning(f"No chunk store in {index_dir}, unpickling index.pkl")
+        with open(Path(index_dir) / "index.pkl", "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+    return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+
+def recall_latency_report(
+    index_dir: Path,
+    index_types: List[str],
+    k: int = 3,
+    num_queries: int = 200,
+    nprobes: List[int] = (1, 4, 16, 64)
+) -> List[Dict]:
+    """Recall@k against exact search and per-query latency for each index type.
+
+    Queries are a random sample of stored vectors with small noise added, so
+    the report needs no query log and reflects the corpus' own geometry.
+    """
+    exact = read_index(index_dir, "flat", mmap=False)
+    vectors = exact.reconstruct_n(0, exact.ntotal)
+    rng = np.random.default_rng(0)
+    sample = vectors[rng.choice(len(vectors), min(num_queries, len(vectors)), replace=False)]
+    queries = (sample + rng.normal(scale=0.01, size=sample.shape)).astype(np.float32)
+    _, truth = exact.search(queries, k)
+
+    rows = []
+    for index_type in index_types:
+        path = index_path(index_dir, index_type)
+        if not path.exists():
+            logger.warning(f"{path} not found, skipping {index_type}")
+            continue
+        for nprobe in (nprobes if is_ivf(index_type) else [None]):
+            index = read_index(index_dir, index_type, nprobe=nprobe or 1)
+            # One query at a time, as the agents issue them
+            start = time.perf_counter()
+            for query in queries:
+                index.search(query[None, :], k)
+            latency_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+            _, found = index.search(queries, k)
+            hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+            rows.append({
+                "index_type": index_type,
+                "nprobe": nprobe,
+                "recall": hits / truth.size,
+                "latency_ms": latency_ms,
+                "size_mb": path.stat().st_size / 1e6,
+            })
+    return rows
+
+
+def format_report(rows: List[Dict]) -> str:
+    lines = [f"{'index':<10} {'nprobe':>6} {'recall@k':>9} {'ms/query':>9} {'size MB':>8}"]
+    for row in rows:
+        nprobe = "-" if row["nprobe"] is None else str(row["nprobe"])
+        lines.append(
+            f"{row['index_type']:<10} {nprobe:>6} {row['recall']:>9.3f} "
+            f"{row['latency_ms']:>9.3f} {row['size_mb']:>8.1f}"
+        )
+    return "\n".join(lines)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build compact FAISS indexes and compare them")
+    parser.add_argument("command", choices=["build", "report"])
+    parser.add_argument("--index-dir", type=Path, default=Path("data/faiss_index"))
+    parser.add_argument("--type", dest="index_types", action="append", choices=sorted(INDEX_TYPES))
+    parser.add_argument("--nlist", type=int, default=256, help="IVF cells")
+    parser.add_argument("--m", type=int, default=48, help="PQ sub-quantizers (must divide the dimension)")
+    parser.add_argument("--k", type=int, default=3)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args()
+    if args.command == "build":
+        for index_type in args.index_types or ["ivfpq"]:
+            build_compact_index(args.index_dir, index_type, nlist=args.nlist, m=args.m)
+    else:
+        rows = recall_latency_report(args.index_dir, args.index_types or list(INDEX_TYPES), k=args.k)
+        print(format_report(rows))
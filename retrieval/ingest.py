@@ -0,0 +1,194 @@
+# rescura/retrieval/ingest.py
+import os
+import queue
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+def parse_pdf(path: str) -> list:
+    """Load the pages of one PDF; runs inside a worker process"""
+    return PyPDFLoader(path).load()
+
+
+@dataclass
+class EmbeddedBatch:
+    """A batch of chunks with their vectors, ready to add to the index"""
+    texts: List[str] = field(default_factory=list)
+    metadatas: List[dict] = field(default_factory=list)
+    ids: List[str] = field(default_factory=list)
+    sources: List[str] = field(default_factory=list)
+    vectors: List[List[float]] = field(default_factory=list)
+
+
+class IngestionPipeline:
+    """Streams PDFs through parse -> chunk -> embed stages.
+
+    PDFs are parsed in a process pool, pages are chunked in a thread as soon
+    as their file is parsed, and chunks are embedded in fixed-size batches.
+    Stages are connected by bounded queues and the pool never holds more than
+    ``max_pending_files`` parsed files, so memory stays bounded regardless
+    of corpus size.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        text_splitter: Optional[RecursiveCharacterTextSplitter] = None,
+        batch_size: int = 64,
+        parse_workers: Optional[int] = None,
+        max_pending_files: Optional[int] = None,
+        queue_size: int = 256,
+        loader: Optional[Callable[[str], list]] = None
+    ):
+        self.embeddings = embeddings
+        self.text_splitter = text_splitter or RecursiveCharacterTextSplitter(
+            chunk_size=1000,
+            chunk_overlap=100
+        )
+        self.batch_size = batch_size
+        self.parse_workers = (os.cpu_count() or 1) if parse_workers is None else parse_workers
+        self.max_pending_files = max_pending_files or max(2 * self.parse_workers, 1)
+        self.queue_size = queue_size
+        self.loader = loader or parse_pdf
+        self.failed: Set[str] = set()
+
+    def run(
+        self,
+        files: Iterable[str],
+        id_prefix: Optional[Callable[[str], str]] = None
+    ) -> Iterator[EmbeddedBatch]:
+        """Yield embedded batches; chunk ids are ``{id_prefix(path)}-{n}``"""
+        id_prefix = id_prefix or (lambda path: path)
+        pages: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        chunks: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        self.failed = set()
+
+        threads = [
+            threading.Thread(target=self._guard, args=(self._parse, pages, stop, list(files), pages), daemon=True),
+            threading.Thread(target=self._guard, args=(self._chunk, chunks, stop, pages, chunks, id_prefix), daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            batch = EmbeddedBatch()
+            while True:
+                item = chunks.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+
+                chunk_id, source, chunk = item
+                batch.texts.append(chunk.page_content)
+                batch.metadatas.append(chunk.metadata)
+                batch.ids.append(chunk_id)
+                batch.sources.append(source)
+                if len(batch.texts) >= self.batch_size:
+                    yield self._embed(batch)
+                    batch = EmbeddedBatch()
+
+            if batch.texts:
+                yield self._embed(batch)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join(timeout=1)
+
+    def _embed(self, batch: EmbeddedBatch) -> EmbeddedBatch:
+        batch.vectors = self.embeddings.embed_documents(batch.texts)
+        return batch
+
+    @staticmethod
+    def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+        """Blocking put that gives up once the consumer has gone away"""
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _guard(self, target, out: queue.Queue, stop: threading.Event, *args):
+        # Surface stage failures to the consumer instead of hanging it
+        try:
+            target(stop, *args)
+        except BaseException as e:
+            self._put(out, e, stop)
+
+    def _parse(self, stop: threading.Event, files: List[str], pages: queue.Queue):
+        if self.parse_workers == 0:
+            for path in files:
+                if stop.is_set():
+                    return
+                self._emit_pages(path, self._load(path), pages, stop)
+            self._put(pages, _DONE, stop)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.parse_workers) as pool:
+            remaining = iter(files)
+            running = {}
+            while not stop.is_set():
+                # Only keep a bounded number of files parsed-but-unconsumed
+                while len(running) < self.max_pending_files:
+                    path = next(remaining, None)
+                    if path is None:
+                        break
+                    running[pool.submit(self.loader, path)] = path
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    path = running.pop(future)
+                    try:
+                        docs = future.result()
+                    except Exception as e:
+                        logger.error(f"Failed to process {path}: {str(e)}")
+                        self.failed.add(path)
+                        continue
+                    self._emit_pages(path, docs, pages, stop)
+        self._put(pages, _DONE, stop)
+
+    def _load(self, path: str) -> list:
+        try:
+            return self.loader(path)
+        except Exception as e:
+            logger.error(f"Failed to process {path}: {str(e)}")
+            self.failed.add(path)
+            return []
+
+    def _emit_pages(self, path: str, docs: list, pages: queue.Queue, stop: threading.Event):
+        logger.info(f"Parsed {len(docs)} pages from {os.path.basename(path)}")
+        for doc in docs:
+            if not self._put(pages, (path, doc), stop):
+                return
+
+    def _chunk(self, stop: threading.Event, pages: queue.Queue, chunks: queue.Queue, id_prefix):
+        counters: Dict[str, int] = {}
+        while not stop.is_set():
+            try:
+                item = pages.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _DONE or isinstance(item, BaseException):
+                self._put(chunks, item, stop)
+                return
+
+            path, page = item
+            for chunk in self.text_splitter.split_documents([page]):
+                n = counters.get(path, 0)
+                counters[path] = n + 1
+                if not self._put(chunks, (f"{id_prefix(path)}-{n}", path, chunk), stop):
+                    return
@@ -1,23 +1,136 @@
 # rescura/retrieval/retriever.py
-from langchain_community.vectorstores import FAISS
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List
+import numpy as np
+from utils.model_registry import model_registry
+from retrieval.index_store import load_vector_store
+from retrieval.bm25 import BM25Index
+from retrieval.hybrid import reciprocal_rank_fusion, mmr_select, rerank_with_budget
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default) == "1"
 
 class RescuraRetriever:
-    def __init__(self):
-        self.embeddings = HuggingFaceEmbeddings(model_name="BAAI/bge-small-en-v1.5")
-        self.vector_store = FAISS.load_local(
-            "data/faiss_index", 
+    def __init__(
+        self,
+        index_dir: str = "data/faiss_index",
+        index_type: str = None,
+        nprobe: int = None,
+        hybrid: bool = None,
+        use_mmr: bool = None,
+        rerank: bool = None,
+        rerank_budget_ms: float = None,
+        embeddings=None
+    ):
+        self.embeddings = embeddings or model_registry.embeddings("BAAI/bge-small-en-v1.5")
+        # "flat" is the exact index; sq8/ivfflat/ivfsq8/ivfpq are compact,
+        # memory-mapped variants built with retrieval.index_store
+        self.index_type = index_type or os.getenv("RESCURA_INDEX_TYPE", "flat")
+        self.vector_store = load_vector_store(
+            Path(index_dir),
             self.embeddings,
-            allow_dangerous_deserialization=True  # Add this parameter
-)
+            index_type=self.index_type,
+            nprobe=nprobe or int(os.getenv("RESCURA_INDEX_NPROBE", "16"))
+        )
+
+        # Hybrid mode fuses BM25 (exact terms like drug names) with dense results
+        self.hybrid = _env_flag("RESCURA_HYBRID", "1") if hybrid is None else hybrid
+        self.use_mmr = _env_flag("RESCURA_MMR", "0") if use_mmr is None else use_mmr
+        self.rerank = _env_flag("RESCURA_RERANK", "0") if rerank is None else rerank
+        self.rerank_budget_ms = (
+            float(os.getenv("RESCURA_RERANK_BUDGET_MS", "150")) if rerank_budget_ms is None else rerank_budget_ms
+        )
+        self.bm25 = BM25Index.load(index_dir) if self.hybrid and BM25Index.exists(index_dir) else None
+
+        self.query_cache_size = int(os.getenv("RESCURA_QUERY_CACHE_SIZE", "1024"))
+        self._query_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
     
     def get_relevant_documents(self, query: str, k=3):
-        return self.vector_store.similarity_search(query, k=k)
+        return self.batch_search([query], k=k)[0]
+
+    def batch_search(self, queries: List[str], k=3) -> List[list]:
+        """Retrieve for many queries with one embedding pass and one FAISS search"""
+        if not queries:
+            return []
+        plain = self.bm25 is None and not self.use_mmr and not self.rerank
+        fetch_k = k if plain else max(4 * k, 20)
+        _, indices = self.vector_store.index.search(self.embed_queries(queries), fetch_k)
+
+        results = []
+        for query, row in zip(queries, indices):
+            dense = [int(i) for i in row if i != -1]
+            if plain:
+                results.append([self._document(pos) for pos in dense])
+            else:
+                results.append(self._hybrid(query, dense, k, fetch_k))
+        return results
+
+    def embed_query(self, query: str) -> np.ndarray:
+        return self.embed_queries([query])[0]
+
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Query vectors, served from an LRU cache keyed on normalized text"""
+        keys = [" ".join(q.lower().split()) for q in queries]
+        vectors = {}
+        with self._cache_lock:
+            for key in keys:
+                if key in self._query_cache:
+                    self._query_cache.move_to_end(key)
+                    vectors[key] = self._query_cache[key]
+
+        misses = list(dict.fromkeys(key for key in keys if key not in vectors))
+        if misses:
+            # One forward pass for every uncached query
+            embedded = self.embeddings.embed_documents(misses)
+            with self._cache_lock:
+                for key, vector in zip(misses, embedded):
+                    vectors[key] = self._query_cache[key] = np.asarray(vector, dtype=np.float32)
+                while len(self._query_cache) > self.query_cache_size:
+                    self._query_cache.popitem(last=False)
+
+        return np.stack([vectors[key] for key in keys])
+
+    def _hybrid(self, query: str, dense: list, k: int, fetch_k: int) -> list:
+        rankings = [dense]
+        if self.bm25 is not None:
+            rankings.append([pos for pos, _ in self.bm25.search(query, fetch_k)])
+        fused = reciprocal_rank_fusion(rankings)[:fetch_k]
+
+        positions = [pos for pos, _ in fused]
+        docs = [self._document(pos) for pos in positions]
+        if self.use_mmr:
+            # Leave the reranker some candidates to choose between
+            keep = mmr_select(
+                [d.page_content for d in docs],
+                [score for _, score in fused],
+                k=2 * k if self.rerank else k
+            )
+            docs = [docs[i] for i in keep]
+        if self.rerank:
+            cross_encoder = model_registry.cross_encoder()
+            order = rerank_with_budget(
+                query,
+                [d.page_content for d in docs],
+                lambda pairs: cross_encoder.predict(pairs).tolist(),
+                budget_ms=self.rerank_budget_ms
+            )
+            docs = [docs[i] for i in order]
+        return docs[:k]
+
+    def _document(self, position: int):
+        doc_id = self.vector_store.index_to_docstore_id[position]
+        return self.vector_store.docstore.search(doc_id)
     
     @classmethod
     def build_index(cls, pdf_directory: str):
+        from langchain_community.vectorstores import FAISS
+        from langchain_community.document_loaders import PyPDFLoader
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
         loaders = [PyPDFLoader(pdf) for pdf in Path(pdf_directory).glob("*.pdf")]
         docs = [doc for loader in loaders for doc in loader.load()]
         splitter = RecursiveCharacterTextSplitter(chunk_size=1000)
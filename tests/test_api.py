@@ -1,13 +1,247 @@
+import os
 import pytest
+import asyncio
+import httpx
+import numpy as np
 from fastapi.testclient import TestClient
+from types import SimpleNamespace
+from collections import OrderedDict
 from api.fastapi_app import app
+from components import components
+from agents.session import SessionStore
 
 client = TestClient(app)
 
 def test_process_emergency_text(monkeypatch):
     # Mock agents and input processing for fast test
-    monkeypatch.setattr("api.fastapi_app.transcriber", lambda: None)
-    monkeypatch.setattr("api.fastapi_app.triage_agent", lambda *a, **kw: {"severity": 3, "rationale": "test", "immediate_actions": ["rest"]})
+    async def aassess(*a, **kw):
+        return {"severity": 3, "rationale": "test", "immediate_actions": ["rest"]}
+
+    monkeypatch.setitem(components._models, "transcriber", SimpleNamespace(transcribe=lambda audio: "test"))
+    monkeypatch.setitem(components._models, "fast_triage", SimpleNamespace(assess=lambda text: None))
+    monkeypatch.setitem(components._models, "triage_agent", SimpleNamespace(aassess=aassess))
+    monkeypatch.setitem(components._models, "sessions", SessionStore())
     response = client.post("/process-emergency", files={"audio": ("test.wav", b"audio data")})
     assert response.status_code == 200
     assert "assessment" in response.json()
+
+def test_process_emergency_rejects_when_queue_full(monkeypatch):
+    import asyncio
+    monkeypatch.setattr("api.fastapi_app.MAX_QUEUED", 0)
+    # Every inference slot taken
+    monkeypatch.setattr("api.fastapi_app.admission", asyncio.Semaphore(0))
+    response = client.post("/process-emergency", files={"audio": ("test.wav", b"audio data")})
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+
+def test_no_queueing_still_admits_when_a_slot_is_free(monkeypatch):
+    async def aassess(*a, **kw):
+        return {"severity": 2, "rationale": "test"}
+
+    monkeypatch.setattr("api.fastapi_app.MAX_QUEUED", 0)
+    monkeypatch.setitem(components._models, "transcriber", SimpleNamespace(transcribe=lambda audio: "test"))
+    monkeypatch.setitem(components._models, "fast_triage", SimpleNamespace(assess=lambda text: None))
+    monkeypatch.setitem(components._models, "triage_agent", SimpleNamespace(aassess=aassess))
+    monkeypatch.setitem(components._models, "sessions", SessionStore())
+    response = client.post("/process-emergency", files={"audio": ("test.wav", b"audio data")})
+    assert response.status_code == 200
+
+def test_media_job_submit_poll_and_push(monkeypatch):
+    from jobs.pool import JobPool
+    pool = JobPool(workers=1, threads=1, handlers={"caption": "tests.test_jobs:size"}, warm_up=None)
+    monkeypatch.setitem(components._models, "media_jobs", pool)
+    try:
+        submitted = client.post("/jobs/caption", files={"file": ("x.png", b"12345")}).json()
+        events = client.get(submitted["events_url"])
+        assert "event: job" in events.text
+        job = client.get(submitted["status_url"]).json()
+        assert job["status"] == "done" and job["result"] == 5
+        assert client.post("/jobs/unknown", files={"file": ("x", b"1")}).status_code == 404
+        assert client.get("/jobs/missing").status_code == 404
+    finally:
+        pool.shutdown()
+
+
+def test_follow_up_on_case(monkeypatch):
+    async def areply(case_id, message):
+        return {"case_id": case_id, "answer": "Keep pressure on it."}
+
+    store = SessionStore()
+    monkeypatch.setitem(components._models, "sessions", store)
+    monkeypatch.setitem(components._models, "conversation_agent", SimpleNamespace(areply=areply))
+    case = store.create("cut arm", {"severity": 3})
+    reply = client.post(f"/cases/{case.case_id}/messages", json={"message": "still bleeding"})
+    assert reply.json()["answer"] == "Keep pressure on it."
+    assert client.get(f"/cases/{case.case_id}").json()["case_id"] == case.case_id
+    assert client.post("/cases/missing/messages", json={"message": "hi"}).status_code == 404
+
+def test_triage_runs_at_case_priority(monkeypatch):
+    from llm.scheduler import current_priority, PRIORITY_CRITICAL, PRIORITY_TRIAGE
+    priorities = []
+
+    async def aassess(*a, **kw):
+        priorities.append(current_priority())
+        return {"severity": 5, "rationale": "refined"}
+
+    monkeypatch.setitem(components._models, "transcriber", SimpleNamespace(transcribe=lambda audio: "test"))
+    monkeypatch.setitem(components._models, "triage_agent", SimpleNamespace(aassess=aassess))
+    monkeypatch.setitem(components._models, "sessions", SessionStore())
+
+    monkeypatch.setitem(components._models, "fast_triage", SimpleNamespace(assess=lambda text: None))
+    client.post("/process-emergency", files={"audio": ("test.wav", b"audio data")})
+    # Provisional severity 5: the background refinement is critical
+    monkeypatch.setitem(components._models, "fast_triage", SimpleNamespace(assess=lambda text: {"severity": 5}))
+    refined = client.post("/process-emergency", files={"audio": ("test.wav", b"audio data")}).json()["refined"]
+    for _ in range(50):
+        if client.get(refined).json()["status"] == "done":
+            break
+    assert priorities == [PRIORITY_TRIAGE, PRIORITY_CRITICAL]
+
+def test_scheduler_stats_endpoint():
+    stats = client.get("/scheduler/stats").json()
+    assert "admitted" in stats and "queued" in stats
+
+def stream_doubles(monkeypatch):
+    """Transcriber, triage and ffmpeg doubles for the SSE endpoints; the audio is raw PCM"""
+    from input_processing.audio_stream import VoiceActivitySegmenter, astream_segments
+    import api.fastapi_app as fastapi_app
+
+    async def passthrough(encoded):
+        if isinstance(encoded, str):
+            with open(encoded, "rb") as f:
+                yield f.read()
+            return
+        async for chunk in encoded:
+            yield chunk
+
+    def astream(pcm, run):
+        segmenter = VoiceActivitySegmenter()
+        segmenter.vad = None
+        return astream_segments(lambda samples, prompt: "help", pcm, run, segmenter)
+
+    async def astream_assess(text):
+        yield SimpleNamespace(type="triage", data={"severity": 1, "rationale": "minor"}, ttft=0.01)
+
+    monkeypatch.setattr(fastapi_app, "decode_pcm", passthrough)
+    monkeypatch.setattr(fastapi_app, "admission", asyncio.Semaphore(fastapi_app.MAX_IN_FLIGHT))
+    monkeypatch.setitem(components._models, "transcriber", SimpleNamespace(astream=astream))
+    monkeypatch.setitem(components._models, "fast_triage", SimpleNamespace(assess=lambda text: None))
+    monkeypatch.setitem(components._models, "triage_agent", SimpleNamespace(astream_assess=astream_assess))
+    monkeypatch.setitem(components._models, "sessions", SessionStore())
+    return fastapi_app
+
+
+def speech():
+    from tests.test_audio_stream import tone, silence
+    return np.concatenate([tone(0.6), silence(0.7)]).tobytes()
+
+
+def test_emergency_stream_over_http(monkeypatch):
+    fastapi_app = stream_doubles(monkeypatch)
+    decoded, decode = [], fastapi_app.decode_pcm
+    monkeypatch.setattr(fastapi_app, "decode_pcm", lambda encoded: decoded.append(encoded) or decode(encoded))
+    response = client.post("/process-emergency/stream", files={"audio": ("call.m4a", speech())})
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "event: transcript_partial" in response.text and "event: done" in response.text
+    assert fastapi_app.admission._value == fastapi_app.MAX_IN_FLIGHT
+    # ffmpeg reads a seekable copy of the upload, deleted with the response
+    assert decoded[0].endswith(".m4a") and not os.path.exists(decoded[0])
+
+
+def asgi_scope(request: httpx.Request, spec_version: str = "2.3") -> dict:
+    path = request.url.path
+    return {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": spec_version}, "http_version": "1.1",
+        "method": request.method, "scheme": "http", "server": ("test", 80), "client": ("client", 1),
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(k.lower(), v) for k, v in request.headers.raw],
+    }
+
+
+def test_stream_releases_slot_when_client_leaves_before_first_event(monkeypatch):
+    fastapi_app = stream_doubles(monkeypatch)
+    request = httpx.Request("POST", "http://test/process-emergency/stream", files={"audio": ("call.pcm", speech())})
+    scope = asgi_scope(request)
+    messages = [{"type": "http.request", "body": request.read(), "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            # The client is gone before the first event: the response is cancelled here
+            await asyncio.sleep(3600)
+
+    async def call():
+        await asyncio.wait_for(app(scope, receive, send), timeout=10)
+        # Checked before the loop runs again: a dropped generator's cleanup is only scheduled
+        return fastapi_app.admission._value
+
+    assert asyncio.run(call()) == fastapi_app.MAX_IN_FLIGHT
+
+
+def test_live_stream_reads_chunked_audio(monkeypatch):
+    fastapi_app = stream_doubles(monkeypatch)
+    audio = speech()
+    chunks = [audio[i:i + 8000] for i in range(0, len(audio), 8000)]
+    request = httpx.Request("POST", "http://test/process-emergency/live", headers={"transfer-encoding": "chunked"})
+    # Below spec 2.4 Starlette would listen for disconnects on the same receive
+    messages = [{"type": "http.request", "body": chunk, "more_body": True} for chunk in chunks]
+    messages.append({"type": "http.request", "body": b"", "more_body": False})
+    response_done = asyncio.Event()
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+        if message["type"] == "http.response.body" and not message.get("more_body"):
+            response_done.set()
+
+    async def call():
+        await asyncio.wait_for(app(asgi_scope(request), receive, send), timeout=10)
+
+    asyncio.run(call())
+    body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body").decode()
+    assert "event: transcript_partial" in body and "event: done" in body
+    assert fastapi_app.admission._value == fastapi_app.MAX_IN_FLIGHT
+
+    # The test client speaks the default spec version too
+    response = client.post("/process-emergency/live", content=iter(chunks))
+    assert "event: transcript_partial" in response.text and "event: done" in response.text
+
+
+def test_refinements_evict_finished_entries_first(monkeypatch):
+    import api.fastapi_app as fastapi_app
+    monkeypatch.setattr(fastapi_app, "MAX_REFINEMENTS", 2)
+    monkeypatch.setattr(fastapi_app, "refinements", OrderedDict())
+    release = None
+
+    async def aassess(*a, **kw):
+        await release.wait()
+        return {"severity": 4, "rationale": "refined"}
+
+    monkeypatch.setitem(components._models, "triage_agent", SimpleNamespace(aassess=aassess))
+    monkeypatch.setattr(fastapi_app, "admission", asyncio.Semaphore(fastapi_app.MAX_IN_FLIGHT))
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        pending = fastapi_app.start_refinement("chest pain")
+        fastapi_app.refinements["old"] = {"status": "done", "assessment": {}}
+        newest = fastapi_app.start_refinement("chest pain")
+        # Over the bound: the finished entry goes, the still-running one stays polled and referenced
+        assert list(fastapi_app.refinements) == [pending, newest]
+        assert len(fastapi_app.refinement_tasks) == 2
+        release.set()
+        await asyncio.gather(*fastapi_app.refinement_tasks)
+        return fastapi_app.refinements[pending]["status"]
+
+    assert asyncio.run(scenario()) == "done"
+    assert not fastapi_app.refinement_tasks
@@ -0,0 +1,94 @@
+import asyncio
+import numpy as np
+from input_processing.audio_stream import VoiceActivitySegmenter, stream_segments, astream_segments
+
+RATE = 16000
+
+
+def tone(seconds):
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (0.3 * np.sin(2 * np.pi * 220 * t) * 32767).astype(np.int16)
+
+
+def silence(seconds):
+    return np.zeros(int(RATE * seconds), dtype=np.int16)
+
+
+def pcm_chunks(*parts, chunk_bytes=3200):
+    data = np.concatenate(parts).tobytes()
+    return [data[i:i + chunk_bytes] for i in range(0, len(data), chunk_bytes)]
+
+
+def segmenter(**kwargs):
+    s = VoiceActivitySegmenter(**kwargs)
+    s.vad = None  # deterministic energy gate even if webrtcvad is installed
+    return s
+
+
+def test_segments_split_at_pauses():
+    seg = segmenter(min_silence_ms=300, pad_ms=90)
+    chunks = pcm_chunks(silence(0.5), tone(1.0), silence(0.6), tone(0.8), silence(0.1))
+    segments = [s for chunk in chunks for s in seg.feed(chunk)]
+    tail = seg.flush()
+
+    assert len(segments) == 1 and tail is not None
+    start, samples = segments[0]
+    assert abs(start - 0.41) < 0.05  # speech at 0.5s, minus padding
+    assert 1.0 <= len(samples) / RATE <= 1.4
+
+
+def test_short_blips_and_long_speech():
+    seg = segmenter(min_speech_ms=200, max_segment_s=2)
+    blip = [s for chunk in pcm_chunks(tone(0.06), silence(1.0)) for s in seg.feed(chunk)]
+    assert blip == [] and seg.flush() is None
+
+    long = [s for chunk in pcm_chunks(tone(5.0)) for s in seg.feed(chunk)]
+    assert len(long) == 2  # forced cuts every 2s keep partials flowing
+
+
+def test_partial_transcripts_accumulate_with_context():
+    prompts = []
+
+    def transcribe(samples, prompt):
+        prompts.append(prompt)
+        return f"part{len(prompts)}"
+
+    chunks = pcm_chunks(tone(0.6), silence(0.7), tone(0.6))
+    partials = list(stream_segments(transcribe, chunks, segmenter()))
+
+    assert [p.text for p in partials] == ["part1", "part2"]
+    assert partials[-1].transcript == "part1 part2" and partials[-1].final
+    assert prompts == [None, "part1"]
+
+
+def test_async_stream_uses_runner():
+    calls = []
+
+    async def run(func, *args):
+        calls.append(func)
+        return func(*args)
+
+    async def source():
+        for chunk in pcm_chunks(tone(0.6), silence(0.7)):
+            yield chunk
+
+    async def collect():
+        return [p async for p in astream_segments(lambda s, p: "help", source(), run, segmenter())]
+
+    partials = asyncio.run(collect())
+    assert partials[0].text == "help" and partials[-1].final
+    assert len(calls) == 1
+
+
+def test_save_upload_gives_ffmpeg_a_seekable_file():
+    import io
+    import os
+    from input_processing.audio_stream import save_upload
+
+    path = save_upload(io.BytesIO(b"ftyp...moov"), ".m4a")
+    try:
+        assert path.endswith(".m4a")
+        with open(path, "rb") as f:
+            assert f.read() == b"ftyp...moov"
+    finally:
+        os.unlink(path)
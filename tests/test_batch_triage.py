@@ -0,0 +1,87 @@
+import json
+import asyncio
+from batch_triage import read_cases, completed_ids, run_batch, drop_failed, ThroughputReport
+
+
+def test_reads_jsonl_and_csv(tmp_path):
+    jsonl = tmp_path / "cases.jsonl"
+    jsonl.write_text('{"case_id": 7, "symptoms": "burn on hand"}\n\n{"text": "cut finger"}\n')
+    csv_file = tmp_path / "cases.csv"
+    csv_file.write_text("id,report\na1,fell off ladder\n")
+
+    assert [(c["id"], c["text"]) for c in read_cases(jsonl)] == [("7", "burn on hand"), ("1", "cut finger")]
+    assert [(c["id"], c["text"]) for c in read_cases(csv_file)] == [("a1", "fell off ladder")]
+
+
+def test_bounded_concurrency_and_incremental_output(tmp_path):
+    output = tmp_path / "out.jsonl"
+    active, peak = 0, 0
+
+    async def process(case):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return {"assessment": {"severity": 2}, "tokens": 100}
+
+    cases = ({"id": str(i), "text": "x"} for i in range(20))
+    report = asyncio.run(run_batch(cases, process, output, concurrency=3, report_every=0))
+
+    assert peak == 3
+    assert len(output.read_text().splitlines()) == 20
+    assert report.summary()["cases"] == 20 and report.tokens == 2000
+
+
+def test_resume_skips_checkpointed_cases(tmp_path):
+    output = tmp_path / "out.jsonl"
+    output.write_text('{"id": "0", "assessment": {}}\n{"id": "1", "error": "boom"}\n{"id": "2", "assess')
+    seen = []
+
+    async def process(case):
+        seen.append(case["id"])
+        return {"assessment": {}}
+
+    asyncio.run(run_batch([{"id": str(i), "text": ""} for i in range(3)], process, output, report_every=0))
+    # The torn last line is not a checkpoint, so case 2 runs again
+    assert seen == ["2"]
+
+    drop_failed(output)
+    assert completed_ids(output) == {"0", "2"}
+
+
+def test_failures_are_recorded_not_raised(tmp_path):
+    output = tmp_path / "out.jsonl"
+
+    async def process(case):
+        raise RuntimeError("provider down")
+
+    report = asyncio.run(run_batch([{"id": "a", "text": ""}], process, output, report_every=0))
+    assert report.failures == 1
+    assert "provider down" in json.loads(output.read_text())["error"]
+
+
+def test_throughput_report():
+    now = [0.0]
+    report = ThroughputReport(clock=lambda: now[0])
+    for _ in range(30):
+        report.record(0.5, 200, True)
+    now[0] = 30.0
+    summary = report.summary()
+    assert summary["cases_per_min"] == 60
+    assert summary["tokens_per_min"] == 12000
+
+
+def test_provider_batch_results_are_parsed():
+    from batch_triage import ProviderBatch
+    ok = {"custom_id": "c1", "response": {"status_code": 200, "body": {
+        "usage": {"total_tokens": 321},
+        "choices": [{"message": {"content": json.dumps({"severity": 3, "confidence": 0.7, "rationale": "r"})}}]
+    }}}
+    failed = {"custom_id": "c2", "response": {"status_code": 429, "body": {"error": {"message": "rate limited"}}}}
+
+    assert ProviderBatch._parse(ok) == {
+        "id": "c1", "tokens": 321,
+        "assessment": {"severity": 3, "confidence": 0.7, "rationale": "r", "immediate_actions": []}
+    }
+    assert "rate limited" in ProviderBatch._parse(failed)["error"]
@@ -0,0 +1,107 @@
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from retrieval import build_index, ingest
+from retrieval.ingest import IngestionPipeline
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    """Text files standing in for PDFs, one chunk per line"""
+    monkeypatch.setattr(build_index, "get_embeddings", lambda *a, **kw: DeterministicFakeEmbedding(size=8))
+    loaded = []
+
+    def fake_parse(path):
+        loaded.append(path.rsplit("/", 1)[-1])
+        return [Document(page_content=line, metadata={"source": path})
+                for line in open(path).read().splitlines()]
+
+    monkeypatch.setattr(ingest, "parse_pdf", fake_parse)
+    docs = tmp_path / "manuals"
+    docs.mkdir()
+    return docs, tmp_path / "index", loaded
+
+
+def build(docs, index_dir):
+    return build_index.build_index_incremental([docs], index_dir=index_dir, batch_size=2, parse_workers=0)
+
+
+def test_only_new_or_changed_files_are_embedded(corpus):
+    docs, index_dir, loaded = corpus
+    (docs / "burns.pdf").write_text("cool the burn\ncover loosely")
+    (docs / "bites.pdf").write_text("keep still")
+    assert len(build(docs, index_dir).index_to_docstore_id) == 3
+
+    loaded.clear()
+    (docs / "bites.pdf").write_text("keep still\nremove rings")
+    store = build(docs, index_dir)
+    assert loaded == ["bites.pdf"]
+    assert len(store.index_to_docstore_id) == 4
+
+
+def test_deleted_files_are_removed(corpus):
+    docs, index_dir, loaded = corpus
+    (docs / "burns.pdf").write_text("cool the burn")
+    (docs / "bites.pdf").write_text("keep still")
+    build(docs, index_dir)
+
+    (docs / "bites.pdf").unlink()
+    store = build(docs, index_dir)
+    assert [d.page_content for d in store.docstore._dict.values()] == ["cool the burn"]
+    assert list(build_index.load_manifest(index_dir)) == [str(docs / "burns.pdf")]
+
+
+def test_pipeline_batches_and_skips_failed_files(tmp_path):
+    def parse(path):
+        if path.endswith("broken.pdf"):
+            raise ValueError("not a pdf")
+        return [Document(page_content=f"page {i}", metadata={}) for i in range(5)]
+
+    pipeline = IngestionPipeline(DeterministicFakeEmbedding(size=4), batch_size=2, parse_workers=0, loader=parse)
+    batches = list(pipeline.run(["a.pdf", "broken.pdf", "b.pdf"]))
+    assert [len(b.ids) for b in batches] == [2, 2, 2, 2, 2]
+    assert batches[0].ids == ["a.pdf-0", "a.pdf-1"]
+    assert all(len(b.vectors) == len(b.texts) for b in batches)
+    assert pipeline.failed == {"broken.pdf"}
+
+
+def test_compact_index_matches_flat_ids(corpus):
+    from retrieval.index_store import load_vector_store
+
+    docs, index_dir, _ = corpus
+    (docs / "manual.pdf").write_text("\n".join(f"step {i}" for i in range(50)))
+    build_index.build_index_incremental(
+        [docs], index_dir=index_dir, parse_workers=0, index_type="ivfflat", nlist=4
+    )
+    store = load_vector_store(index_dir, DeterministicFakeEmbedding(size=8), index_type="ivfflat", nprobe=4)
+    assert store.similarity_search("step 7", k=1)[0].page_content == "step 7"
+
+
+def test_small_corpus_ivfpq_falls_back_to_sq8(corpus, caplog):
+    import faiss
+    from retrieval.index_store import build_compact_index, load_vector_store
+
+    docs, index_dir, _ = corpus
+    (docs / "manual.pdf").write_text("\n".join(f"step {i}" for i in range(50)))
+    build_index.build_index_incremental([docs], index_dir=index_dir, parse_workers=0)
+    build_compact_index(index_dir, "ivfpq", nlist=4, m=4)
+    assert "encoding the ivfpq index with SQ8" in caplog.text
+    store = load_vector_store(index_dir, DeterministicFakeEmbedding(size=8), index_type="ivfpq", nprobe=4)
+    assert isinstance(store.index, faiss.IndexIVFScalarQuantizer)
+    assert store.similarity_search("step 7", k=1)[0].page_content == "step 7"
+
+
+def test_identical_files_at_different_paths_get_distinct_ids(corpus):
+    docs, index_dir, _ = corpus
+    (docs / "burns.pdf").write_text("cool the burn\ncover loosely")
+    (docs / "burns-copy.pdf").write_text("cool the burn\ncover loosely")
+    store = build(docs, index_dir)
+    assert len(store.index_to_docstore_id) == 4
+
+    manifest = build_index.load_manifest(index_dir)
+    ids = [set(entry["chunk_ids"]) for entry in manifest.values()]
+    assert len(ids) == 2 and not ids[0] & ids[1]
+
+    (docs / "burns-copy.pdf").unlink()
+    store = build(docs, index_dir)
+    assert sorted(d.page_content for d in store.docstore._dict.values()) == ["cool the burn", "cover loosely"]
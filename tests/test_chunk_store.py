@@ -0,0 +1,58 @@
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from retrieval.chunk_store import ChunkStore
+from retrieval.index_store import load_vector_store
+
+
+def make_store(tmp_path):
+    docs = [
+        Document(page_content="Apply a tourniquet above the wound", metadata={"source": "a.pdf", "page": 3}),
+        Document(page_content="Cool burns under running water", metadata={}),
+        Document(page_content="Ne pas déplacer la victime", metadata={"source": "b.pdf", "page": 0}),
+    ]
+    store = FAISS.from_documents(docs, DeterministicFakeEmbedding(size=8))
+    store.save_local(str(tmp_path))
+    ChunkStore.write(tmp_path, store)
+    return store
+
+
+def test_roundtrip_by_faiss_position(tmp_path):
+    store = make_store(tmp_path)
+    chunks = ChunkStore(tmp_path)
+    assert len(chunks) == 3
+    for position, doc_id in store.index_to_docstore_id.items():
+        original = store.docstore.search(doc_id)
+        loaded = chunks.get(position)
+        assert loaded.page_content == original.page_content
+        assert loaded.metadata == original.metadata
+        assert loaded.id == doc_id
+
+
+def test_text_view_is_zero_copy(tmp_path):
+    make_store(tmp_path)
+    view = ChunkStore(tmp_path).text_view(2)
+    assert isinstance(view, memoryview)
+    assert str(view, "utf-8") == "Ne pas déplacer la victime"
+
+
+def test_vector_store_skips_pickle(tmp_path):
+    make_store(tmp_path)
+    (tmp_path / "index.pkl").unlink()
+    store = load_vector_store(tmp_path, DeterministicFakeEmbedding(size=8))
+    result = store.similarity_search("Cool burns under running water", k=1)
+    assert result[0].page_content == "Cool burns under running water"
+
+
+def test_rewrite_swaps_in_a_new_version(tmp_path):
+    make_store(tmp_path)
+    before = ChunkStore(tmp_path)
+    docs = [Document(page_content="Check for breathing", metadata={})]
+    ChunkStore.write(tmp_path, FAISS.from_documents(docs, DeterministicFakeEmbedding(size=8)))
+
+    # A reader that mapped the old files keeps seeing them intact
+    assert len(before) == 3
+    assert str(before.text_view(1), "utf-8") == "Cool burns under running water"
+    after = ChunkStore(tmp_path)
+    assert len(after) == 1 and after.get(0).page_content == "Check for breathing"
+    assert len([p for p in tmp_path.iterdir() if p.name.startswith("chunks-")]) == 1
@@ -0,0 +1,35 @@
+import pytest
+from components import ComponentRegistry
+
+
+def test_components_built_on_first_use_once():
+    calls = []
+    registry = ComponentRegistry()
+    registry.register("fast_triage", lambda: calls.append(1) or object())
+    assert not registry.is_loaded("fast_triage")
+    assert registry.fast_triage is registry.fast_triage
+    assert len(calls) == 1
+
+
+def test_components_registered_from_attributes():
+    registry = ComponentRegistry()
+    assert {"retriever", "triage_agent", "treatment_agent", "transcriber", "caption_batcher"} <= set(registry.names())
+    assert not any(registry.is_loaded(name) for name in registry.names())
+
+
+def test_components_provide_replaces_builder():
+    registry = ComponentRegistry()
+    double = object()
+    registry.provide("retriever", double)
+    assert registry.retriever is double
+    with pytest.raises(KeyError):
+        registry.provide("unknown", double)
+
+
+def test_components_dependencies_resolved_lazily():
+    registry = ComponentRegistry()
+    registry.register("retriever", lambda: "retriever")
+    registry.register("triage_agent", lambda: ("agent", registry.retriever))
+    assert registry.warm_up(["triage_agent"]).keys() == {"triage_agent"}
+    assert registry.triage_agent == ("agent", "retriever")
+    assert registry.is_loaded("retriever")
@@ -0,0 +1,42 @@
+from langchain_core.documents import Document
+from retrieval.context_builder import ContextBuilder, dedupe_chunks, merge_overlap, split_sentences
+
+WORDS = lambda text: len(text.split())  # deterministic token counter for tests
+
+BURN = ("Cool the burn under running water for twenty minutes. Do not apply ice. "
+        "Cover the burn loosely with cling film. Seek care for burns larger than a palm.")
+
+
+def test_overlapping_chunks_are_stitched():
+    first, second = BURN[:90], BURN[60:]
+    assert merge_overlap(first, second) == BURN
+    assert dedupe_chunks([first, second, BURN[10:50]]) == [BURN]
+
+
+def test_repeated_sentences_are_dropped():
+    docs = [Document(page_content=BURN), Document(page_content="Do not apply ice. Elevate a sprained ankle.")]
+    context = ContextBuilder(budget=1000, counter=WORDS, min_relevance=0).build("burn", docs)
+    assert context.count("Do not apply ice.") == 1
+    assert "Elevate a sprained ankle." in context
+
+
+def test_only_relevant_sentences_within_budget():
+    docs = [Document(page_content=BURN), Document(page_content="Splint a suspected fracture. Check pulses below the injury.")]
+    context = ContextBuilder(budget=25, counter=WORDS).build("how to cool a burn with water", docs)
+    assert "fracture" not in context
+    assert WORDS(context) <= 25
+    # Kept sentences stay in document order
+    assert context.index("Cool the burn") < context.index("Cover the burn")
+
+
+def test_truncate_long_input_at_sentence_boundary():
+    builder = ContextBuilder(budget=15, counter=WORDS)
+    assert builder.truncate(BURN) == "Cool the burn under running water for twenty minutes. Do not apply ice."
+    assert split_sentences(builder.truncate(BURN, budget=100)) == split_sentences(BURN)
+
+
+def test_truncate_unpunctuated_transcript_cuts_at_a_word():
+    transcript = " ".join(["my son fell off the trampoline and his arm looks bent"] * 10)
+    truncated = ContextBuilder(budget=20, counter=WORDS).truncate(transcript)
+    assert WORDS(truncated) == 20
+    assert transcript.startswith(truncated)
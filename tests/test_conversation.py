@@ -0,0 +1,134 @@
+import json
+import asyncio
+import httpx
+import pytest
+from langchain_core.documents import Document
+from langchain_groq import ChatGroq
+from agents.conversation import ConversationAgent
+from agents.session import SessionStore
+from llm.router import ModelRouter, ROUTE_SMALL, ROUTE_LARGE
+
+
+class FakeRetriever:
+    def __init__(self):
+        self.queries = []
+
+    def get_relevant_documents(self, query, k=3):
+        self.queries.append(query)
+        if "numb" in query:
+            return [Document(page_content="Numb or cold fingers below a dressing mean it is too tight; loosen it.")]
+        return [Document(page_content="Apply firm direct pressure to a bleeding wound with a clean cloth.")]
+
+
+class FakeFastTriage:
+    def assess(self, text):
+        if "not breathing" in text:
+            return {"severity": 5, "rationale": "Matched red flag 'not breathing'"}
+        return None
+
+
+def mock_llm(requests, severity=3):
+    def handler(request):
+        body = json.loads(request.content)
+        requests.append(body)
+        usage = {"prompt_tokens": 80, "completion_tokens": 20, "total_tokens": 100}
+        if body.get("tools"):
+            message = {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [{
+                    "id": "call_1",
+                    "type": "function",
+                    "function": {"name": "FollowUpAnswer", "arguments": json.dumps({
+                        "answer": "Keep the dressing on.", "severity": severity
+                    })}
+                }]
+            }
+        else:
+            message = {"role": "assistant", "content": "Deep cut on the arm; pressure applied."}
+        return httpx.Response(200, json={
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "llama3-8b-8192",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": message}],
+            "usage": usage
+        })
+
+    transport = httpx.MockTransport(handler)
+    return ChatGroq(
+        model_name="llama3-8b-8192",
+        api_key="test",
+        max_retries=0,
+        http_client=httpx.Client(transport=transport),
+        http_async_client=httpx.AsyncClient(transport=transport)
+    )
+
+
+def make_agent(requests, **kwargs):
+    llm = mock_llm(requests, **kwargs.pop("severity_args", {}))
+    retriever = FakeRetriever()
+    agent = ConversationAgent(
+        retriever=retriever,
+        store=SessionStore(),
+        fast_triage=FakeFastTriage(),
+        router=ModelRouter("followup", policy=ROUTE_LARGE),
+        llms={ROUTE_SMALL: llm, ROUTE_LARGE: llm},
+        **kwargs
+    )
+    return agent, retriever
+
+
+def test_follow_up_reuses_session_and_retrieves_once():
+    requests = []
+    agent, retriever = make_agent(requests)
+    case = agent.start("Deep cut on the forearm, bleeding heavily", {"severity": 3, "rationale": "Heavy bleeding"})
+
+    first = agent.reply(case.case_id, "How hard should I press on the bleeding wound?")
+    second = agent.reply(case.case_id, "Should I keep pressure on the wound?")
+
+    assert first["answer"] == "Keep the dressing on."
+    assert first["retrieved"] and not second["retrieved"]
+    assert retriever.queries == ["Deep cut on the forearm, bleeding heavily"]
+    assert len(requests) == 2  # one LLM call per turn, no triage
+    assert first["tokens"] == 100
+    assert "Apply firm direct pressure" in requests[1]["messages"][0]["content"]
+    assert "How hard should I press" in requests[1]["messages"][1]["content"]
+    assert len(agent.store.get(case.case_id).history) == 4
+
+
+def test_follow_up_retrieves_for_uncovered_question():
+    requests = []
+    agent, retriever = make_agent(requests)
+    case = agent.start("Deep cut on the forearm, bleeding heavily", {"severity": 3})
+    agent.reply(case.case_id, "How hard should I press on the bleeding wound?")
+    reply = agent.reply(case.case_id, "His fingers feel numb and cold now")
+    assert reply["retrieved"]
+    assert retriever.queries[-1] == "His fingers feel numb and cold now"
+    assert len(agent.store.get(case.case_id).guidelines) == 2
+
+
+def test_follow_up_red_flag_escalates():
+    requests = []
+    agent, _ = make_agent(requests)
+    case = agent.start("Fell off a bike, grazed knee", {"severity": 2})
+    reply = asyncio.run(agent.areply(case.case_id, "Now he is not breathing"))
+    assert reply["escalated"] and reply["severity"] == 5
+
+
+def test_follow_up_history_is_summarized():
+    requests = []
+    agent, _ = make_agent(requests, history_tokens=20)
+    case = agent.start("Deep cut on the forearm", {"severity": 3})
+    for i in range(3):
+        agent.reply(case.case_id, f"Question {i} about pressing on the bleeding wound for a while longer")
+    session = agent.store.get(case.case_id)
+    assert session.summary == "Deep cut on the arm; pressure applied."
+    assert len(session.history) < 6
+    assert any(not r.get("tools") for r in requests)
+
+
+def test_follow_up_unknown_case():
+    agent, _ = make_agent([])
+    with pytest.raises(KeyError):
+        agent.reply("missing", "hello")
@@ -0,0 +1,71 @@
+import time
+from agents.fast_triage import FastTriage
+
+
+class KeywordEmbeddings:
+    """Bag-of-words vectors over a tiny vocabulary, enough to exercise similarity"""
+    vocab = ["shaking", "floor", "uncontrollably", "she", "is", "on", "the", "sore", "knee"]
+
+    def _embed(self, text):
+        words = text.lower().split()
+        return [float(w in words) for w in self.vocab] + [0.01]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+
+def test_red_flags_return_provisional_assessment():
+    result = FastTriage().assess("My dad collapsed and he's NOT BREATHING!")
+    assert result["severity"] == 5
+    assert result["provisional"] and result["source"] == "rules"
+    assert any("CPR" in action for action in result["immediate_actions"])
+
+
+def test_most_severe_rule_wins_and_extra_flags_raise_confidence():
+    single = FastTriage().assess("he is having a seizure")
+    multiple = FastTriage().assess("he is having a seizure and now he is not breathing")
+    assert single["severity"] == 4
+    assert multiple["severity"] == 5 and multiple["rule"] == "cardiac_arrest"
+    assert multiple["confidence"] > 0.97
+
+
+def test_unclear_input_is_left_to_the_agent():
+    assert FastTriage().assess("I twisted my ankle a bit while jogging") is None
+
+
+def test_low_confidence_rules_are_withheld():
+    assert FastTriage(min_confidence=0.99).assess("please call an ambulance") is None
+
+
+def test_embeddings_catch_paraphrases():
+    triage = FastTriage(embeddings=KeywordEmbeddings(), similarity_threshold=0.9)
+    result = triage.assess("she is shaking uncontrollably on the floor")
+    assert result["source"] == "embeddings" and result["rule"] == "seizure"
+    assert triage.assess("sore knee") is None
+
+
+def test_fast_path_is_fast():
+    triage = FastTriage()
+    start = time.perf_counter()
+    for _ in range(100):
+        triage.assess("there is severe bleeding from his arm")
+    assert (time.perf_counter() - start) / 100 < 0.005
+
+
+def test_negated_red_flags_are_ignored():
+    triage = FastTriage()
+    assert triage.assess("no chest pain, just a mild headache") is None
+    assert triage.assess("denies chest pain, twisted ankle") is None
+    assert triage.assess("no more chest pain since this morning") is None
+    assert triage.assess("he never had a seizure before") is None
+    # Negation is scoped to its own clause
+    assert triage.assess("no fever but now he is not breathing")["rule"] == "cardiac_arrest"
+    assert triage.assess("no chest pain before, now crushing chest pain")["rule"] == "chest_pain"
+
+
+def test_negated_red_flag_blocks_embedding_match():
+    triage = FastTriage(embeddings=KeywordEmbeddings(), similarity_threshold=0.5)
+    assert triage.assess("she is not fitting on the floor") is None
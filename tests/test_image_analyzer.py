@@ -0,0 +1,118 @@
+import io
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from input_processing.image_analyzer import ImageAnalyzer, CaptionBatcher, downscale, perceptual_hash
+
+
+class FakeCaptioner:
+    """Stands in for the BLIP pipeline: records batch sizes and input sizes"""
+
+    def __init__(self):
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def __call__(self, images, batch_size=1):
+        with self.lock:
+            self.batches.append([image.size for image in images])
+        return [[{"generated_text": f"caption {image.getpixel((0, 0))[0]}"}] for image in images]
+
+
+def analyzer_with(captioner, **kwargs):
+    class FakeModelAnalyzer(ImageAnalyzer):
+        model = captioner
+    return FakeModelAnalyzer(**kwargs)
+
+
+def photo(shade, size=(1600, 1200), stripes=97):
+    image = Image.new("RGB", size, (shade, 0, 0))
+    for x in range(0, size[0], stripes):
+        image.paste((255, 255, 255), (x, 0, x + 20, size[1]))
+    return image
+
+
+def jpeg_bytes(image, quality):
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def test_downscale_keeps_aspect_ratio():
+    assert downscale(photo(10), 384).size == (384, 288)
+    small = photo(10, (200, 100))
+    assert downscale(small, 384) is small
+
+
+def test_resubmitted_photo_is_served_from_cache():
+    captioner = FakeCaptioner()
+    analyzer = analyzer_with(captioner)
+    original = photo(10)
+
+    first = analyzer.describe(jpeg_bytes(original, 95))
+    # Same photo, re-encoded and resized by the client
+    again = analyzer.describe(jpeg_bytes(original.resize((800, 600)), 70))
+
+    assert first == again
+    assert len(captioner.batches) == 1
+    assert captioner.batches[0] == [(384, 288)]
+
+
+def test_describe_many_batches_and_dedupes():
+    captioner = FakeCaptioner()
+    analyzer = analyzer_with(captioner)
+    images = [photo(10), photo(10), Image.new("RGB", (500, 500), (200, 200, 200)), b"not an image"]
+
+    captions = analyzer.describe_many(images)
+
+    assert captions[0] == captions[1] and captions[2] and captions[3] is None
+    assert len(captioner.batches) == 1 and len(captioner.batches[0]) == 2
+    assert perceptual_hash(downscale(photo(10))) != perceptual_hash(downscale(images[2]))
+
+
+def test_concurrent_requests_share_a_batch():
+    captioner = FakeCaptioner()
+    batcher = CaptionBatcher(analyzer_with(captioner), max_batch=8, max_wait_ms=200)
+    photos = [photo(40 * i) for i in range(6)]
+
+    with ThreadPoolExecutor(6) as pool:
+        captions = list(pool.map(batcher.describe, photos))
+
+    assert all(captions)
+    assert sum(len(b) for b in captioner.batches) == 6
+    assert len(captioner.batches) < 6
+
+
+def test_color_is_part_of_the_cache_key():
+    # Same structure, different colour: e.g. a red rash and clear skin
+    assert perceptual_hash(downscale(photo(10))) != perceptual_hash(downscale(photo(200)))
+
+
+class BlockingCaptioner(FakeCaptioner):
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def __call__(self, images, batch_size=1):
+        self.release.wait(5)
+        return super().__call__(images, batch_size)
+
+
+def test_cancelled_request_does_not_stop_the_batcher():
+    captioner = BlockingCaptioner()
+    batcher = CaptionBatcher(analyzer_with(captioner), max_batch=1, max_wait_ms=0)
+
+    async def scenario():
+        running = asyncio.ensure_future(batcher.adescribe(photo(10)))
+        await asyncio.sleep(0.1)
+        queued = asyncio.ensure_future(batcher.adescribe(photo(100)))
+        await asyncio.sleep(0.05)
+        # Clients disconnect: one image is being captioned, one is still queued
+        running.cancel()
+        queued.cancel()
+        captioner.release.set()
+        return await asyncio.wait_for(batcher.adescribe(photo(200)), 5)
+
+    assert asyncio.run(scenario())
+    assert batcher._worker.is_alive()
+
@@ -0,0 +1,164 @@
+import os
+import time
+import asyncio
+import pytest
+from jobs.broker import LocalBroker, create_broker
+from jobs.pool import JobPool, JobFailed, QueueFull
+
+HANDLERS = {
+    "double": "tests.test_jobs:double",
+    "size": "tests.test_jobs:size",
+    "fail": "tests.test_jobs:fail",
+    "pid": "tests.test_jobs:pid",
+    "crash": "tests.test_jobs:crash",
+}
+
+
+def double(payloads):
+    return [p * 2 for p in payloads]
+
+
+def size(payloads):
+    return [len(p) for p in payloads]
+
+
+def fail(payloads):
+    raise ValueError("bad input")
+
+
+def pid(payloads):
+    return [(os.getpid(), len(payloads), os.environ.get("OMP_NUM_THREADS")) for _ in payloads]
+
+
+def crash(payloads):
+    os._exit(3)
+
+
+@pytest.fixture
+def pool():
+    pool = JobPool(workers=2, threads=1, handlers=HANDLERS, batch_sizes={"pid": 4}, warm_up=None)
+    yield pool
+    pool.shutdown()
+
+
+def test_job_pool_runs_jobs_in_workers(pool):
+    jobs = [pool.submit("double", i) for i in range(6)]
+    assert [pool.result(job.id, timeout=30) for job in jobs] == [0, 2, 4, 6, 8, 10]
+    done = pool.get(jobs[0].id).to_dict()
+    assert done["status"] == "done" and done["result"] == 0
+    assert done["queue_ms"] is not None and done["run_ms"] is not None
+    assert pool.stats()["done"] == 6
+
+
+def test_job_pool_worker_processes_and_thread_limit(pool):
+    job = pool.submit("pid", None)
+    worker_pid, batch, threads = pool.result(job.id, timeout=30)
+    assert worker_pid != os.getpid()
+    assert threads == "1"
+    assert pool.get(job.id).worker == worker_pid
+
+
+def test_job_pool_failures(pool):
+    job = pool.submit("fail", 1)
+    with pytest.raises(JobFailed, match="bad input"):
+        pool.result(job.id, timeout=30)
+    assert pool.get(job.id).status == "failed"
+    with pytest.raises(ValueError):
+        pool.submit("unknown", 1)
+
+
+def test_job_pool_async_wait(pool):
+    assert asyncio.run(pool.run("double", 21)) == 42
+
+
+def test_job_pool_replaces_crashed_worker(pool):
+    job = pool.submit("crash", None)
+    with pytest.raises(JobFailed, match="exited"):
+        pool.result(job.id, timeout=30)
+    assert pool.result(pool.submit("double", 2).id, timeout=30) == 4
+    deadline = time.monotonic() + 10
+    while pool.stats()["workers_alive"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.1)
+    assert pool.stats()["workers_alive"] == 2
+
+
+def test_job_pool_rejects_when_full():
+    pool = JobPool(workers=1, threads=1, handlers=HANDLERS, warm_up=None, max_pending=0)
+    try:
+        with pytest.raises(QueueFull):
+            pool.submit("double", 1)
+    finally:
+        pool.shutdown()
+
+
+def test_create_broker():
+    assert isinstance(create_broker("local"), LocalBroker)
+    with pytest.raises(ValueError):
+        create_broker("nope")
+
+
+def test_incomplete_broker_fails_when_created(monkeypatch):
+    from jobs import broker
+
+    class JobsOnly(broker.Broker):
+        def put_job(self, message):
+            pass
+
+        def get_job(self, timeout=None):
+            return None
+
+    monkeypatch.setitem(broker.BROKERS, "jobs-only", JobsOnly)
+    with pytest.raises(TypeError, match="put_result"):
+        create_broker("jobs-only")
+
+
+def test_job_pool_survives_cancelled_awaiters():
+    pool = JobPool(workers=1, threads=1, handlers=HANDLERS, warm_up=None)
+
+    async def scenario():
+        job = pool.submit("double", 1)
+        waiter = asyncio.ensure_future(pool.wait(job.id))
+        # e.g. the /jobs/{id}/events client disconnects
+        raw = asyncio.ensure_future(asyncio.wrap_future(job.future))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        raw.cancel()
+        await asyncio.sleep(0)
+        assert not job.future.cancelled()
+        return await asyncio.wait_for(pool.run("double", 5), 30), pool.result(job.id, timeout=30)
+
+    try:
+        assert asyncio.run(scenario()) == (10, 2)
+        assert pool._collector.is_alive()
+    finally:
+        pool.shutdown()
+
+
+def test_job_pool_replaces_crashed_worker_under_steady_traffic(monkeypatch):
+    import threading
+    import jobs.pool
+    monkeypatch.setattr(jobs.pool, "WORKER_POLL_INTERVAL", 0.2)
+    pool = JobPool(workers=2, threads=1, handlers=HANDLERS, warm_up=None)
+    stop = threading.Event()
+
+    def traffic():
+        # Results keep arriving more often than the poll interval
+        while not stop.is_set():
+            pool.result(pool.submit("double", 1).id, timeout=30)
+            time.sleep(0.02)
+
+    feeder = threading.Thread(target=traffic, daemon=True)
+    try:
+        feeder.start()
+        time.sleep(0.3)
+        job = pool.submit("crash", None)
+        with pytest.raises(JobFailed, match="exited"):
+            pool.result(job.id, timeout=10)
+        deadline = time.monotonic() + 10
+        while pool.stats()["workers_alive"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.1)
+        assert pool.stats()["workers_alive"] == 2 and pool.stats()["running"] <= 2
+    finally:
+        stop.set()
+        feeder.join(30)
+        pool.shutdown()
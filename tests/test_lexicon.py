@@ -0,0 +1,55 @@
+from input_processing.lexicon import Lexicon, default_lexicon
+from input_processing.text_processor import TextProcessor
+
+
+def make_lexicon():
+    return Lexicon.from_dict({
+        "symptom": {"pain": ["ache"], "chest pain": ["tight chest"], "shortness of breath": ["can't breathe"]},
+        "condition": {"burn": ["scald"], "bleeding": []},
+    })
+
+
+def test_lexicon_matches_whole_words_with_spans():
+    text = "Tight chest and PAIN; she can't breathe. Painful? no. Heartburn, a scald."
+    matches = make_lexicon().find(text)
+    assert [(m.text, m.canonical, m.category) for m in matches] == [
+        ("Tight chest", "chest pain", "symptom"),
+        ("PAIN", "pain", "symptom"),
+        ("can't breathe", "shortness of breath", "symptom"),
+        ("scald", "burn", "condition"),
+    ]
+    assert all(text[m.start:m.end] == m.text for m in matches)
+
+
+def test_lexicon_prefers_longest_match():
+    matches = make_lexicon().find("crushing chest pain")
+    assert [m.canonical for m in matches] == ["chest pain"]
+
+
+def test_lexicon_suffix_terms_found_through_failure_links():
+    lexicon = Lexicon([("she", "she", "x"), ("he", "he", "x"), ("hers", "hers", "x"), ("his", "his", "x")])
+    assert [m.text for m in lexicon.find("ushers he his")] == ["he", "his"]
+
+
+def test_lexicon_from_tsv(tmp_path):
+    path = tmp_path / "terms.tsv"
+    path.write_text("paracetamol\tacetaminophen\tdrug\nbad row\n")
+    lexicon = Lexicon.from_file(path)
+    assert len(lexicon) == 1
+    assert lexicon.find("took paracetamol")[0].canonical == "acetaminophen"
+
+
+def test_extract_entities_maps_synonyms():
+    tp = TextProcessor()
+    assert tp.lexicon is default_lexicon()
+    entities = tp.extract_medical_entities("he is bleeding heavily after a car crash and took an epipen")
+    assert entities["medical_terms"] == ["bleeding", "trauma"]
+    assert entities["severity_keywords"] == ["severe"]
+    assert entities["drugs"] == ["epinephrine"]
+    assert [s["text"] for s in entities["spans"]] == ["bleeding", "heavily", "car crash", "epipen"]
+
+
+def test_process_many():
+    results = TextProcessor(make_lexicon()).process_many(["Severe burn!", "mild ache"])
+    assert [r["entities"]["medical_terms"] for r in results] == [["burn"], []]
+    assert results[1]["entities"]["symptoms"] == ["pain"]
@@ -0,0 +1,171 @@
+import time
+import pytest
+from llm.retry import RetryBudget, RetryPolicy, DeadlineExceeded, is_retryable, retry_after
+
+
+class FakeResponse:
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+
+
+class FakeStatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = FakeResponse(headers)
+
+
+def flaky(*errors, result="ok"):
+    """A call that raises the given errors in order, then succeeds"""
+    errors = list(errors)
+    calls = []
+
+    def call(remaining):
+        calls.append(remaining)
+        if errors:
+            raise errors.pop(0)
+        return result
+
+    return call, calls
+
+
+def test_only_rate_limits_and_server_errors_are_retryable():
+    assert is_retryable(FakeStatusError(429))
+    assert is_retryable(FakeStatusError(503))
+    assert not is_retryable(FakeStatusError(400))
+    assert not is_retryable(FakeStatusError(401))
+    assert not is_retryable(ValueError("bad prompt"))
+
+
+def test_retry_after_headers():
+    assert retry_after(FakeStatusError(429, {"retry-after": "2"})) == 2.0
+    assert retry_after(FakeStatusError(429, {"retry-after-ms": "250"})) == 0.25
+    assert retry_after(FakeStatusError(429)) is None
+
+
+def test_client_errors_fail_fast():
+    call, calls = flaky(FakeStatusError(400))
+    with pytest.raises(FakeStatusError):
+        RetryPolicy(budget=RetryBudget()).call(call)
+    assert len(calls) == 1
+
+
+def test_retries_honor_retry_after():
+    call, calls = flaky(FakeStatusError(429, {"retry-after-ms": "50"}))
+    start = time.monotonic()
+    assert RetryPolicy(budget=RetryBudget()).call(call) == "ok"
+    assert len(calls) == 2
+    assert time.monotonic() - start >= 0.05
+
+
+def test_wait_longer_than_deadline_is_not_attempted():
+    call, calls = flaky(FakeStatusError(429, {"retry-after": "60"}))
+    with pytest.raises(FakeStatusError):
+        RetryPolicy(deadline=1, budget=RetryBudget()).call(call)
+    assert len(calls) == 1
+
+
+def test_attempts_receive_remaining_deadline():
+    call, calls = flaky(FakeStatusError(500, {"retry-after-ms": "10"}))
+    RetryPolicy(deadline=5, budget=RetryBudget()).call(call)
+    assert calls[0] <= 5 and calls[1] < calls[0]
+
+
+def test_exhausted_budget_stops_retries():
+    budget = RetryBudget(ratio=0, min_per_second=0, max_tokens=1)
+    policy = RetryPolicy(budget=budget, base_delay=0.001)
+    call, calls = flaky(FakeStatusError(503), FakeStatusError(503))
+    with pytest.raises(FakeStatusError):
+        policy.call(call)
+    assert len(calls) == 2
+
+
+def test_deadline_exceeded():
+    with pytest.raises(DeadlineExceeded):
+        RetryPolicy(deadline=0).call(lambda remaining: "never")
+
+
+def groq_with(handler, **kwargs):
+    import httpx
+    from llm.scheduled_chat import ScheduledChatGroq
+    from llm.scheduler import RequestScheduler
+    transport = httpx.MockTransport(handler)
+    return ScheduledChatGroq(
+        model_name="llama3-8b-8192",
+        api_key="test",
+        http_client=httpx.Client(transport=transport),
+        http_async_client=httpx.AsyncClient(transport=transport),
+        scheduler=RequestScheduler(requests_per_minute=1000, tokens_per_minute=100000),
+        **kwargs
+    )
+
+
+def failing_then_ok(*statuses):
+    import httpx
+    statuses = list(statuses)
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if statuses:
+            return httpx.Response(statuses.pop(0), headers={"retry-after-ms": "1"}, json={"error": {"message": "busy"}})
+        return httpx.Response(200, json={
+            "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "llama3-8b-8192",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+        })
+
+    return handler, calls
+
+
+def test_scheduled_chat_groq_retries_through_the_policy():
+    import asyncio
+    handler, calls = failing_then_ok(503, 429)
+    llm = groq_with(handler)
+    assert llm.client._client.max_retries == 0  # the SDK's own retries are off
+    assert llm.invoke("hi").content == "ok"
+    assert len(calls) == 3
+
+    handler, calls = failing_then_ok(503)
+    assert asyncio.run(groq_with(handler).ainvoke("hi")).content == "ok"
+    assert len(calls) == 2
+
+
+def test_scheduled_chat_groq_client_errors_fail_fast():
+    handler, calls = failing_then_ok(400)
+    with pytest.raises(Exception):
+        groq_with(handler).invoke("hi")
+    assert len(calls) == 1
+
+
+def test_async_http_client_survives_new_event_loops():
+    import asyncio
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from llm.http_clients import get_http_clients
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so the pool holds the connection
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    _, client = get_http_clients()
+
+    async def fetch():
+        return (await client.get(url)).text
+
+    try:
+        # e.g. batch_triage and tests each run their own loop
+        assert [asyncio.run(fetch()) for _ in range(3)] == ["ok"] * 3
+    finally:
+        server.shutdown()
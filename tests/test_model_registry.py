@@ -0,0 +1,18 @@
+from utils.model_registry import ModelRegistry
+
+
+def test_model_registry_loads_once():
+    calls = []
+    registry = ModelRegistry()
+    registry.register("dummy", lambda: calls.append(1) or object())
+    assert registry.get("dummy") is registry.get("dummy")
+    assert len(calls) == 1
+
+
+def test_model_registry_warm_up():
+    registry = ModelRegistry()
+    registry.register("a", lambda: "model-a")
+    registry.register("b", lambda: "model-b")
+    timings = registry.warm_up()
+    assert set(timings) == {"a", "b"}
+    assert registry.is_loaded("a") and registry.is_loaded("b")
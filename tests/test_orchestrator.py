@@ -0,0 +1,49 @@
+import time
+from agents.orchestrator import AgentPipeline, build_post_triage_pipeline
+
+
+def test_independent_stages_run_concurrently():
+    pipeline = AgentPipeline(max_workers=3)
+    for name in ("a", "b", "c"):
+        pipeline.add_stage(name, lambda _: time.sleep(0.2) or "done")
+    result = pipeline.run()
+    assert result.total_time < 0.5
+    assert all(r.ok for r in result.results.values())
+
+
+def test_dependent_stage_receives_upstream_value():
+    pipeline = AgentPipeline()
+    pipeline.add_stage("treatment", lambda _: "apply pressure")
+    pipeline.add_stage("followup", lambda deps: deps["treatment"].upper(), depends_on=("treatment",))
+    assert pipeline.run().value("followup") == "APPLY PRESSURE"
+
+
+def test_failed_dependency_skips_dependents():
+    def boom(_):
+        raise RuntimeError("provider down")
+
+    pipeline = AgentPipeline()
+    pipeline.add_stage("treatment", boom)
+    pipeline.add_stage("followup", lambda deps: "never", depends_on=("treatment",))
+    result = pipeline.run()
+    assert result.results["treatment"].error == "provider down"
+    assert result.results["followup"].error.startswith("Skipped")
+
+
+def test_low_severity_followup_does_not_wait_on_treatment():
+    class FollowUp:
+        def create_plan(self, treatment, severity):
+            return {"treatment": treatment}
+
+    class Treatment:
+        def generate_treatment_plan(self, diagnosis, assessment):
+            raise AssertionError("treatment should not run for severity < 3")
+
+    pipeline = build_post_triage_pipeline(
+        {"severity": 1, "diagnosis": "scrape"},
+        "urban",
+        treatment_agent=Treatment(),
+        followup_agent=FollowUp()
+    )
+    result = pipeline.run()
+    assert result.value("followup") == {"treatment": "Basic first aid applied"}
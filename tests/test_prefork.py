@@ -0,0 +1,58 @@
+import gc
+import os
+import signal
+from pathlib import Path
+import pytest
+from api.prefork import PreforkServer, memory_usage, threads_per_worker
+
+
+def _read_lines(fd, count):
+    data = b""
+    while data.count(b"\n") < count:
+        data += os.read(fd, 1024)
+    return data.decode().split()
+
+
+def test_prefork_workers_inherit_preloaded_state():
+    shared = {}
+    read_fd, write_fd = os.pipe()
+
+    def worker(index):
+        os.write(write_fd, f"{index}:{shared['model']}\n".encode())
+        signal.pause()
+
+    server = PreforkServer(worker, workers=2, preload=lambda: shared.update(model="loaded"), threads=1)
+    try:
+        server.start()
+        assert gc.get_freeze_count() > 0
+        lines = _read_lines(read_fd, 2)
+    finally:
+        server.stop()
+        server.wait()
+        gc.unfreeze()
+        gc.enable()
+        os.close(read_fd)
+        os.close(write_fd)
+
+    assert sorted(lines) == ["0:loaded", "1:loaded"]
+    assert server.pids == {}
+
+
+def test_prefork_worker_exit_code():
+    server = PreforkServer(lambda index: None, workers=1, freeze=False, threads=1)
+    server.start()
+    pid = next(iter(server.pids))
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+
+
+def test_threads_per_worker():
+    assert threads_per_worker(1, threads=3) == 3
+    assert threads_per_worker(10 ** 6) == 1
+
+
+@pytest.mark.skipif(not Path("/proc/self/smaps_rollup").exists(), reason="needs /proc smaps_rollup")
+def test_memory_usage_of_current_process():
+    usage = memory_usage(os.getpid())
+    assert usage["rss"] > 0
+    assert 0 < usage["uss"] <= usage["rss"]
@@ -0,0 +1,94 @@
+import time
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from retrieval.bm25 import BM25Index
+from retrieval.chunk_store import ChunkStore
+from retrieval.hybrid import reciprocal_rank_fusion, mmr_select, rerank_with_budget
+from retrieval.retriever import RescuraRetriever
+
+CHUNKS = [
+    "Apply direct pressure to the wound to control bleeding.",
+    "Apply direct pressure to the wound to control bleeding. Elevate the limb.",
+    "If bleeding does not stop, apply a tourniquet above the wound.",
+    "Give epinephrine for anaphylaxis using an auto-injector.",
+    "Cool a burn under running water for twenty minutes.",
+]
+
+
+def test_bm25_finds_exact_terms(tmp_path):
+    BM25Index.build(CHUNKS).save(tmp_path)
+    index = BM25Index.load(tmp_path)
+    assert index.search("tourniquet", k=1)[0][0] == 2
+    assert index.search("epinephrine dose", k=1)[0][0] == 3
+    assert index.search("unrelated words") == []
+
+
+def test_rrf_rewards_agreement():
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1, 4]])
+    assert [item for item, _ in fused][:2] == [1, 3]
+
+
+def test_mmr_drops_near_duplicates():
+    keep = mmr_select(CHUNKS[:3], [1.0, 0.99, 0.8], k=2, lambda_mult=0.5)
+    assert keep == [0, 2]
+
+
+def test_rerank_respects_budget():
+    def slow_scores(pairs):
+        time.sleep(0.02)
+        return [len(text) for _, text in pairs]
+
+    order = rerank_with_budget("q", CHUNKS, slow_scores, budget_ms=1, batch_size=2)
+    # Only the first batch fits in the budget; the rest keep fused order
+    assert order == [1, 0, 2, 3, 4]
+
+
+@pytest.fixture
+def index_dir(tmp_path):
+    store = FAISS.from_texts(CHUNKS, DeterministicFakeEmbedding(size=16))
+    store.save_local(str(tmp_path))
+    ChunkStore.write(tmp_path, store)
+    BM25Index.build(CHUNKS).save(tmp_path)
+    return tmp_path
+
+
+def test_hybrid_retriever_surfaces_keyword_match(index_dir):
+    retriever = RescuraRetriever(
+        index_dir=str(index_dir),
+        index_type="flat",
+        hybrid=True,
+        use_mmr=False,
+        rerank=False,
+        embeddings=DeterministicFakeEmbedding(size=16)
+    )
+    docs = retriever.get_relevant_documents("tourniquet", k=2)
+    assert "tourniquet" in " ".join(d.page_content for d in docs)
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    calls: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return super().embed_documents(texts)
+
+
+def test_query_embeddings_are_cached_and_batched(index_dir):
+    embeddings = CountingEmbeddings(size=16)
+    retriever = RescuraRetriever(index_dir=str(index_dir), hybrid=False, use_mmr=False, rerank=False, embeddings=embeddings)
+
+    results = retriever.batch_search(["tourniquet", "burn", "Tourniquet  "], k=2)
+    assert embeddings.calls == 1
+    assert [len(docs) for docs in results] == [2, 2, 2]
+    assert results[0] == results[2]
+
+    retriever.get_relevant_documents("BURN")
+    assert embeddings.calls == 1
+
+
+def test_zero_rerank_budget_is_kept(index_dir):
+    retriever = RescuraRetriever(
+        index_dir=str(index_dir), rerank=True, rerank_budget_ms=0, embeddings=DeterministicFakeEmbedding(size=16)
+    )
+    assert retriever.rerank_budget_ms == 0
@@ -0,0 +1,82 @@
+import asyncio
+from llm.router import ModelRouter, RouteStats, ROUTE_SMALL, ROUTE_LARGE
+
+
+def router(policy, stats=None):
+    return ModelRouter("test", policy=policy, stats=stats or RouteStats())
+
+
+def test_keywords_route_red_flags_and_ambiguity_to_large():
+    r = router("keywords")
+    assert r.pre_route("severe chest pain, possible cardiac arrest") == ROUTE_LARGE
+    assert r.pre_route("mild rash on forearm") == ROUTE_SMALL
+    assert r.pre_route("my friend feels strange") is None
+    assert r.choose("my friend feels strange") == ROUTE_LARGE
+
+
+def test_known_severity_decides_route():
+    r = router("keywords")
+    assert r.pre_route("anything", severity=4) == ROUTE_LARGE
+    assert r.pre_route("anything", severity=1) == ROUTE_SMALL
+
+
+def test_pinned_policy_ignores_text():
+    assert router("small").choose("critical bleeding") == ROUTE_SMALL
+    assert router("large").choose("mild rash") == ROUTE_LARGE
+
+
+def test_confidence_policy_escalates_severe_or_unsure_answers():
+    stats = RouteStats()
+    r = router("confidence", stats)
+    answers = {
+        ROUTE_SMALL: {"severity": 2, "confidence": 0.3},
+        ROUTE_LARGE: {"severity": 2, "confidence": 0.9},
+    }
+    calls = []
+
+    def call(route):
+        calls.append(route)
+        return answers[route]
+
+    assert r.invoke("my friend feels strange", call) == answers[ROUTE_LARGE]
+    assert calls == [ROUTE_SMALL, ROUTE_LARGE]
+
+    calls.clear()
+    answers[ROUTE_SMALL] = {"severity": 1, "confidence": 0.95}
+    assert r.invoke("my friend feels strange", call)["severity"] == 1
+    assert calls == [ROUTE_SMALL]
+
+    summary = stats.summary()["test"]
+    assert summary[ROUTE_SMALL]["calls"] == 2
+    assert summary[ROUTE_LARGE]["escalations"] == 1
+
+
+def test_confidence_policy_keeps_red_flags_on_large():
+    r = router("confidence")
+    calls = []
+
+    async def call(route):
+        calls.append(route)
+        return {"severity": 5, "confidence": 1.0}
+
+    asyncio.run(r.ainvoke("unconscious and not breathing, critical", call))
+    assert calls == [ROUTE_LARGE]
+
+
+def test_red_flag_symptoms_outrank_mild_words():
+    r = router("keywords")
+    assert r.pre_route("mild chest pain, not breathing") == ROUTE_LARGE
+    assert r.pre_route("slight cough, lips are blue") == ROUTE_LARGE
+
+
+def test_confidence_policy_keeps_free_text_answers_from_small():
+    r = router("confidence")
+    calls = []
+
+    def call(route):
+        calls.append(route)
+        return "Rest, ice and elevate the ankle." if route == ROUTE_SMALL else "large plan"
+
+    assert r.invoke("mild sprain", call) == "Rest, ice and elevate the ankle."
+    assert calls == [ROUTE_SMALL]
+    assert r.needs_escalation("  ")
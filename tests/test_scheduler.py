@@ -0,0 +1,134 @@
+import asyncio
+import httpx
+import pytest
+from langchain_core.messages import HumanMessage
+from llm.scheduler import RequestScheduler, TokenBucket, scheduling_priority, priority_for_severity, PRIORITY_CRITICAL, PRIORITY_BACKGROUND
+from llm.scheduled_chat import ScheduledChatGroq
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refills_over_time():
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock=clock)
+    bucket.consume(60)
+    assert bucket.wait_time(10) == pytest.approx(10)
+    clock.now = 10
+    assert bucket.wait_time(10) == 0
+
+
+def test_usage_correction_refunds_overestimate():
+    clock = FakeClock()
+    scheduler = RequestScheduler(requests_per_minute=100, tokens_per_minute=1000, clock=clock)
+    ticket = scheduler.acquire(800)
+    assert scheduler.tokens.wait_time(500) > 0
+    scheduler.complete(ticket, 200)
+    assert scheduler.tokens.wait_time(500) == 0
+    assert scheduler.stats()["actual_tokens"] == 200
+
+
+def test_acquire_times_out_and_leaves_queue():
+    scheduler = RequestScheduler(requests_per_minute=1, tokens_per_minute=1000)
+    scheduler.acquire(10)
+    with pytest.raises(TimeoutError):
+        scheduler.acquire(10, timeout=0.1)
+    assert scheduler._queue == []
+
+
+def test_high_priority_calls_are_admitted_first():
+    scheduler = RequestScheduler(requests_per_minute=600, tokens_per_minute=100000)
+    scheduler.requests.tokens = 0
+    order = []
+
+    async def call(name, priority):
+        await scheduler.aacquire(10, priority=priority)
+        order.append(name)
+
+    async def main():
+        await asyncio.gather(
+            call("prevention", PRIORITY_BACKGROUND),
+            call("background", PRIORITY_BACKGROUND),
+            call("critical", PRIORITY_CRITICAL),
+        )
+
+    asyncio.run(main())
+    assert order == ["critical", "prevention", "background"]
+
+
+def test_priority_for_severity():
+    assert priority_for_severity(5) == PRIORITY_CRITICAL
+    assert priority_for_severity(1) > priority_for_severity(3)
+
+
+def completion(request):
+    return httpx.Response(200, json={
+        "id": "chatcmpl-1",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "llama3-8b-8192",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "Apply pressure."}}],
+        "usage": {"prompt_tokens": 12, "completion_tokens": 3, "total_tokens": 15}
+    })
+
+
+def test_scheduled_chat_groq_charges_reported_usage():
+    scheduler = RequestScheduler(requests_per_minute=100, tokens_per_minute=10000)
+    llm = ScheduledChatGroq(
+        model_name="llama3-8b-8192",
+        api_key="test",
+        max_tokens=256,
+        max_retries=0,
+        http_client=httpx.Client(transport=httpx.MockTransport(completion)),
+        scheduler=scheduler,
+        priority=PRIORITY_BACKGROUND
+    )
+
+    with scheduling_priority(PRIORITY_CRITICAL):
+        assert llm.invoke([HumanMessage(content="Deep cut on arm")]).content == "Apply pressure."
+
+    assert scheduler.stats()["admitted"] == 1
+    assert scheduler.stats()["estimated_tokens"] >= 256
+    assert scheduler.stats()["actual_tokens"] == 15
+
+
+def test_queued_async_calls_wait_to_be_woken_instead_of_polling():
+    scheduler = RequestScheduler(requests_per_minute=120, tokens_per_minute=100000)
+    scheduler.requests.tokens = 0  # one call every 0.5s
+    attempts = []
+    try_admit = scheduler._try_admit
+
+    def counting(entry):
+        attempts.append(entry)
+        return try_admit(entry)
+
+    scheduler._try_admit = counting
+
+    async def main():
+        await asyncio.gather(*(scheduler.aacquire(10, priority=PRIORITY_BACKGROUND) for _ in range(3)))
+
+    asyncio.run(main())
+    # Each call: one attempt on arrival and one per wake-up at the head; no 50 ms polling
+    assert len(attempts) <= 3 * 3
+    assert scheduler.stats()["admitted"] == 3 and not scheduler._waiters
+
+
+def test_async_acquire_times_out_behind_the_head():
+    scheduler = RequestScheduler(requests_per_minute=1, tokens_per_minute=1000)
+    scheduler.requests.tokens = 0
+
+    async def main():
+        head = asyncio.ensure_future(scheduler.aacquire(10))
+        await asyncio.sleep(0)
+        with pytest.raises(TimeoutError):
+            await scheduler.aacquire(10, timeout=0.1)
+        head.cancel()
+        await asyncio.gather(head, return_exceptions=True)
+
+    asyncio.run(main())
+    assert scheduler._queue == [] and not scheduler._waiters
@@ -0,0 +1,54 @@
+import time
+import pytest
+from agents.semantic_cache import SemanticCache
+
+
+class KeywordEmbeddings:
+    """Tiny deterministic embedding: one dimension per known keyword"""
+    vocab = ["snake", "bite", "burn", "hand", "bleeding", "leg"]
+
+    def embed_query(self, text):
+        words = text.lower().split()
+        return [float(sum(w.startswith(v) for w in words)) for v in self.vocab]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SemanticCache(KeywordEmbeddings(), threshold=0.9, path=str(tmp_path / "cache.sqlite3"))
+
+
+def test_similar_input_hits(cache):
+    cache.set("triage", "snake bite", {"severity": 4})
+    assert cache.get("triage", "Snake bites!") == {"severity": 4}
+    assert cache.get("triage", "burn on hand") is None
+    assert cache.stats()["triage"] == {"hits": 1, "misses": 1}
+
+
+def test_context_must_match(cache):
+    cache.set("treatment", "burn on hand", "cool with water", context="2")
+    assert cache.get("treatment", "burn on hand", context="2") == "cool with water"
+    assert cache.get("treatment", "burn on hand", context="5") is None
+
+
+def test_lru_eviction():
+    cache = SemanticCache(KeywordEmbeddings(), max_entries=2)
+    cache.set("triage", "snake bite", 1)
+    cache.set("triage", "burn hand", 2)
+    cache.get("triage", "snake bite")
+    cache.set("triage", "bleeding leg", 3)
+    assert cache.get("triage", "burn hand") is None
+    assert cache.get("triage", "snake bite") == 1
+
+
+def test_ttl_expiry():
+    cache = SemanticCache(KeywordEmbeddings(), ttl=0.01)
+    cache.set("triage", "snake bite", 1)
+    time.sleep(0.02)
+    assert cache.get("triage", "snake bite") is None
+
+
+def test_persists_to_disk(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    SemanticCache(KeywordEmbeddings(), path=path).set("triage", "snake bite", {"severity": 4})
+    reloaded = SemanticCache(KeywordEmbeddings(), path=path)
+    assert reloaded.get("triage", "snake bite") == {"severity": 4}
@@ -0,0 +1,101 @@
+from agents.session import SessionStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_session_store_create_and_get():
+    store = SessionStore()
+    session = store.create("collapsed, not breathing", {"severity": 5})
+    assert store.get(session.case_id) is session
+    assert store.get("missing") is None
+    assert store.stats()["hits"] == 1 and store.stats()["misses"] == 1
+
+
+def test_session_store_ttl_from_last_turn():
+    clock = Clock()
+    store = SessionStore(ttl=60, clock=clock)
+    session = store.create("burn", {"severity": 2})
+    clock.now += 50
+    session.add_turn("user", "it blistered")
+    store.save(session)
+    clock.now += 50
+    assert store.get(session.case_id) is session
+    clock.now += 61
+    assert store.get(session.case_id) is None
+    assert store.stats()["expired"] == 1
+
+
+def test_session_store_evicts_least_recently_used():
+    store = SessionStore(max_sessions=2)
+    first = store.create("a", {})
+    second = store.create("b", {})
+    store.get(first.case_id)
+    store.create("c", {})
+    assert store.get(second.case_id) is None
+    assert store.get(first.case_id) is first
+    assert len(store) == 2
+
+
+def test_session_store_memory_bound_recounts_on_save():
+    store = SessionStore(max_bytes=4000)
+    old = store.create("a", {})
+    new = store.create("b", {})
+    new.guidelines = ["x" * 3000]
+    store.save(new)
+    assert store.get(old.case_id) is None
+    assert store.get(new.case_id) is new
+    assert store.stats()["bytes"] == new.size()
+
+
+def test_shared_store_serves_sessions_across_processes(tmp_path):
+    path = tmp_path / "sessions.sqlite3"
+    clock = Clock()
+    # Two stores on one file stand in for two prefork workers
+    first, second = SessionStore(path=path, clock=clock), SessionStore(path=path, clock=clock)
+    session = first.create("burn on hand", {"severity": 2})
+
+    other = second.get(session.case_id)
+    assert other is not session and other.input == "burn on hand"
+    other.add_turn("user", "it blistered")
+    clock.now += 1
+    second.save(other)
+
+    assert [t.text for t in first.get(session.case_id).history] == ["it blistered"]
+    assert first.get(session.case_id) is first.get(session.case_id)
+    second.delete(session.case_id)
+    assert first.get(session.case_id) is None
+
+
+def test_shared_store_bounds_apply_to_the_file(tmp_path):
+    path = tmp_path / "sessions.sqlite3"
+    clock = Clock()
+    first = SessionStore(path=path, max_sessions=2, ttl=60, clock=clock)
+    second = SessionStore(path=path, max_sessions=2, ttl=60, clock=clock)
+    old = first.create("a", {})
+    clock.now += 1
+    second.create("b", {})
+    clock.now += 1
+    second.create("c", {})
+    assert first.get(old.case_id) is None
+    assert len(first) == 2
+    clock.now += 120
+    second.create("d", {})
+    assert len(first) == 1
+
+
+def test_refined_assessment_keeps_raised_severity():
+    session = SessionStore().create("fell off a bike", {"severity": 2, "provisional": True})
+    session.assessment.update(severity=5, rationale="Matched red flag 'not breathing'")
+    session.update_assessment({"severity": 3, "rationale": "Possible fracture", "diagnosis": "Wrist fracture"})
+    assert session.assessment["severity"] == 5
+    assert session.assessment["rationale"] == "Matched red flag 'not breathing'"
+    assert session.assessment["diagnosis"] == "Wrist fracture"
+    assert "provisional" not in session.assessment
+    session.update_assessment({"severity": 5, "rationale": "Respiratory arrest"})
+    assert session.assessment["rationale"] == "Respiratory arrest"
@@ -0,0 +1,42 @@
+import sys
+import subprocess
+from pathlib import Path
+from utils.startup_profile import HEAVY_MODULES, StartupProfile, parse_importtime, package_totals
+
+ROOT = Path(__file__).resolve().parents[1]
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      3000 |       5000 |     langchain_core.messages
+import time:      2000 |       7000 |   langchain_core
+import time:       500 |       7500 | agents.triage_agent
+"""
+
+
+def test_parse_importtime():
+    records = parse_importtime(SAMPLE)
+    assert [r.module for r in records] == ["_io", "langchain_core.messages", "langchain_core", "agents.triage_agent"]
+    assert records[1].self_us == 3000 and records[1].cumulative_us == 5000
+    assert [r.depth for r in records] == [1, 2, 1, 0]
+
+
+def test_package_totals_sums_self_time():
+    totals = package_totals(parse_importtime(SAMPLE))
+    assert list(totals)[0] == "langchain_core"
+    assert totals["langchain_core"] == 0.005
+
+
+def test_heavy_modules_detected():
+    profile = StartupProfile("x", 0.1, parse_importtime(SAMPLE + "import time:  10 |  10 |     torch\n"))
+    assert profile.heavy() == ["torch"]
+
+
+def test_entry_points_do_not_import_heavy_modules():
+    # Fresh interpreter: this test process may already have them loaded
+    code = (
+        "import sys, api.fastapi_app, main, agents, input_processing, retrieval, components; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
@@ -0,0 +1,28 @@
+import asyncio
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from agents.streaming import stream_executor
+
+
+def fake_executor(text):
+    llm = GenericFakeChatModel(messages=iter([AIMessage(content=text)]))
+    return RunnableLambda(lambda inputs: inputs["input"]) | llm | RunnableLambda(lambda m: {"output": m.content})
+
+
+def collect(executor, inputs):
+    async def run():
+        return [event async for event in stream_executor(executor, inputs)]
+    return asyncio.run(run())
+
+
+def test_tokens_stream_before_result():
+    events = collect(fake_executor("apply firm pressure"), {"input": "bleeding"})
+    tokens = [e.text for e in events if e.type == "token"]
+    assert "".join(tokens) == "apply firm pressure"
+    assert len(tokens) > 1
+
+    result = events[-1]
+    assert result.type == "result"
+    assert result.data == {"output": "apply firm pressure"}
+    assert result.ttft is not None
@@ -0,0 +1,84 @@
+import json
+import httpx
+from langchain_core.documents import Document
+from langchain_groq import ChatGroq
+from agents.structured import StructuredResponder, TriageResult, TreatmentPlan
+
+
+class FakeRetriever:
+    def __init__(self):
+        self.queries = []
+
+    def get_relevant_documents(self, query, k=3):
+        self.queries.append((query, k))
+        return [Document(page_content="Apply direct pressure to bleeding wounds.")]
+
+
+def tool_call_llm(name, arguments, requests):
+    def handler(request):
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, json={
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "llama3-70b-8192",
+            "choices": [{
+                "index": 0,
+                "finish_reason": "tool_calls",
+                "message": {
+                    "role": "assistant",
+                    "content": None,
+                    "tool_calls": [{
+                        "id": "call_1",
+                        "type": "function",
+                        "function": {"name": name, "arguments": json.dumps(arguments)}
+                    }]
+                }
+            }],
+            "usage": {"prompt_tokens": 80, "completion_tokens": 20, "total_tokens": 100}
+        })
+
+    return ChatGroq(
+        model_name="llama3-70b-8192",
+        api_key="test",
+        max_retries=0,
+        http_client=httpx.Client(transport=httpx.MockTransport(handler))
+    )
+
+
+def test_single_call_returns_typed_result_with_retrieved_context():
+    requests = []
+    retriever = FakeRetriever()
+    llm = tool_call_llm("TriageResult", {
+        "severity": 4,
+        "confidence": 0.8,
+        "rationale": "Arterial bleeding",
+        "immediate_actions": ["Apply pressure"]
+    }, requests)
+    responder = StructuredResponder(
+        llm, TriageResult, "Assess severity.", "Symptoms: {symptoms}",
+        retriever=retriever, query_field="symptoms"
+    )
+
+    result = responder.invoke(symptoms="deep cut on the thigh")
+
+    assert isinstance(result, TriageResult) and result.severity == 4
+    assert len(requests) == 1
+    assert retriever.queries == [("deep cut on the thigh", 3)]
+    assert "Apply direct pressure" in requests[0]["messages"][0]["content"]
+
+
+def test_explicit_context_skips_retrieval():
+    requests = []
+    retriever = FakeRetriever()
+    llm = tool_call_llm("TreatmentPlan", {"steps": ["Cool the burn"]}, requests)
+    responder = StructuredResponder(
+        llm, TreatmentPlan, "Plan treatment.", "Diagnosis: {diagnosis}",
+        retriever=retriever, query_field="diagnosis"
+    )
+
+    plan = responder.invoke(diagnosis="burn", context="Hold under cool water for 20 minutes.")
+
+    assert retriever.queries == []
+    assert "cool water" in requests[0]["messages"][0]["content"]
+    assert plan.to_text() == "Steps:\n1. Cool the burn"
@@ -5,6 +5,7 @@ from .logger import setup_logging
 from .helpers import safe_get, calculate_tokens, format_timestamp
 from .message_helpers import format_scratchpad
 from .validation import validate_triage_response, sanitize_input
+from .model_registry import ModelRegistry, model_registry
 
 __all__ = [
     "Settings",
@@ -16,4 +17,6 @@ __all__ = [
     "format_scratchpad",
     "validate_triage_response",
     "sanitize_input",
+    "ModelRegistry",
+    "model_registry",
 ]
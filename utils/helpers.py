@@ -1,5 +1,6 @@
 from typing import Any, Dict
 import re
+from llm.tokenizer import count_tokens
 
 def safe_get(data: Dict, *keys: str, default: Any = None) -> Any:
     """Safely retrieve nested dictionary values"""
@@ -12,8 +13,8 @@ def safe_get(data: Dict, *keys: str, default: Any = None) -> Any:
     return current
 
 def calculate_tokens(text: str) -> int:
-    """Approximate token count for a string"""
-    return len(text) // 4  # Rough approximation
+    """Llama 3 token count for a string (estimated if the tokenizer is unavailable)"""
+    return count_tokens(text)
 
 def format_timestamp(seconds: float) -> str:
     """Convert seconds to HH:MM:SS format"""
@@ -1,8 +1,10 @@
-from langchain_core.messages import AIMessage, ToolMessage
 from typing import List, Tuple
 
 def format_scratchpad(intermediate_steps: List[Tuple]) -> List:
     """Convert agent steps to proper message sequence"""
+    # Imported here: utils is on every startup path, langchain_core is not needed on most
+    from langchain_core.messages import AIMessage, ToolMessage
+
     formatted = []
     for action, observation in intermediate_steps:
         formatted.append(AIMessage(
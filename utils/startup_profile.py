@@ -0,0 +1,112 @@
+# rescura/utils/startup_profile.py
+import re
+import sys
+import time
+import logging
+import subprocess
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Modules that must not load until a component that needs them is built
+HEAVY_MODULES = (
+    "langchain.agents",
+    "langchain_community",
+    "langchain_huggingface",
+    "transformers",
+    "torch",
+    "whisper",
+    "faster_whisper",
+    "faiss",
+)
+ENTRY_POINTS = ("api.fastapi_app", "main")
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+@dataclass
+class ImportRecord:
+    """One line of ``python -X importtime`` output; times in microseconds"""
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class StartupProfile:
+    module: str
+    wall_s: float  # whole interpreter run, including interpreter start-up
+    records: List[ImportRecord]
+
+    @property
+    def import_s(self) -> float:
+        return sum(r.self_us for r in self.records) / 1e6
+
+    def heavy(self, heavy: Sequence[str] = HEAVY_MODULES) -> List[str]:
+        loaded = {r.module for r in self.records}
+        return [name for name in heavy if name in loaded]
+
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    records = []
+    for line in output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append(ImportRecord(module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return records
+
+
+def profile_import(module: str, python: str = sys.executable, cwd: Optional[str] = None) -> StartupProfile:
+    """Import ``module`` in a fresh interpreter under ``-X importtime``"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd,
+        capture_output=True,
+        text=True
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        # Keep what was imported before the failure; it is still where the time went
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "unknown error"
+        logger.warning(f"Importing {module} failed: {error}")
+    return StartupProfile(module, wall, parse_importtime(result.stderr))
+
+
+def package_totals(records: Iterable[ImportRecord]) -> Dict[str, float]:
+    """Self import time per top-level package, in seconds, slowest first"""
+    totals = defaultdict(int)
+    for record in records:
+        totals[record.module.split(".")[0]] += record.self_us
+    return {name: us / 1e6 for name, us in sorted(totals.items(), key=lambda item: -item[1])}
+
+
+def format_report(profile: StartupProfile, top: int = 15) -> str:
+    lines = [
+        f"{profile.module}: {profile.wall_s:.2f}s cold start, {profile.import_s:.2f}s importing "
+        f"{len(profile.records)} modules"
+    ]
+    lines.append(f"  {'package':<32} {'self (s)':>9}")
+    for name, seconds in list(package_totals(profile.records).items())[:top]:
+        lines.append(f"  {name:<32} {seconds:>9.3f}")
+
+    slowest = sorted(profile.records, key=lambda r: -r.cumulative_us)[:top]
+    lines.append(f"  {'module (incl. its imports)':<48} {'cumul (s)':>9}")
+    for record in slowest:
+        lines.append(f"  {record.module:<48} {record.cumulative_us / 1e6:>9.3f}")
+
+    heavy = profile.heavy()
+    lines.append(f"  heavy modules imported: {', '.join(heavy) if heavy else 'none'}")
+    return "\n".join(lines)
+
+
+def format_build_timings(timings: Dict[str, float]) -> str:
+    lines = [f"  {'component':<32} {'build (s)':>9}"]
+    for name, seconds in sorted(timings.items(), key=lambda item: -item[1]):
+        lines.append(f"  {name:<32} {seconds:>9.3f}")
+    lines.append(f"  {'total':<32} {sum(timings.values()):>9.3f}")
+    return "\n".join(lines)